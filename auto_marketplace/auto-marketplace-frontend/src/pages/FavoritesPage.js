@@ -150,7 +150,7 @@ const FavoritesPage = () => {
   
   const handleViewDetails = async (id) => {
     try {
-      await recommendationsAPI.recordInteraction({
+      recommendationsAPI.queueInteraction({
         listing_id: id,
         type: 'view' 
       });
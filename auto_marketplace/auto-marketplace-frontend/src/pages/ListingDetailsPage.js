@@ -105,7 +105,7 @@ const SimilarListings = ({ currentListing }) => {
   const handleListingClick = async (listingId) => {
     try {
      
-      await recommendationsAPI.recordInteraction({
+      recommendationsAPI.queueInteraction({
         listing_id: listingId,
         type: 'click'
       });
@@ -288,7 +288,7 @@ const ListingDetailsPage = () => {
      
       try {
         console.log('Înregistrare vizualizare pentru anunțul ID:', id);
-        recommendationsAPI.recordInteraction({
+        recommendationsAPI.queueInteraction({
           listing_id: id,
           type: 'view'
         });
@@ -818,7 +818,7 @@ const ListingDetailsPage = () => {
                 onClick={() => {
                   
                   try {
-                    recommendationsAPI.recordInteraction({
+                    recommendationsAPI.queueInteraction({
                       listing_id: listing.id,
                       type: 'contact'
                     });
@@ -846,7 +846,7 @@ const ListingDetailsPage = () => {
                   } else{
                     
                     try {
-                      recommendationsAPI.recordInteraction({
+                      recommendationsAPI.queueInteraction({
                         listing_id: listing.id,
                         type: 'contact'
                       });
@@ -98,7 +98,7 @@ const RecommendationsPage = () => {
   
   const handleViewDetails = async (id) => {
     try {
-      await recommendationsAPI.recordInteraction({
+      recommendationsAPI.queueInteraction({
         listing_id: id,
         type: 'click'
       });
@@ -362,6 +362,77 @@ export const listingsAPI = {
 
 
 
+const recordInteractionsBatch = async (events) => {
+  try {
+    const token = localStorage.getItem('token');
+    if (!token || !events.length) {
+      return;
+    }
+
+    const response = await axios.post(`${baseURL}recommendations/interactions/batch/`, { events }, {
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    });
+
+    return response;
+  } catch (error) {
+    console.error('Eroare la înregistrarea interacțiunilor:', error);
+
+  }
+};
+
+
+// Vizualizările, click-urile și contactele se trimit grupate prin endpoint-ul batch
+const INTERACTION_BATCH_SIZE = 20;
+const INTERACTION_FLUSH_DELAY = 5000;
+
+let pendingInteractions = [];
+let flushTimer = null;
+
+const flushInteractions = async () => {
+  if (flushTimer) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+  }
+  const events = pendingInteractions;
+  pendingInteractions = [];
+  await recordInteractionsBatch(events);
+};
+
+const queueInteraction = (data) => {
+  if (!localStorage.getItem('token')) {
+    return;
+  }
+
+  pendingInteractions.push({ ...data, timestamp: new Date().toISOString() });
+  if (pendingInteractions.length >= INTERACTION_BATCH_SIZE) {
+    flushInteractions();
+  } else if (!flushTimer) {
+    flushTimer = setTimeout(flushInteractions, INTERACTION_FLUSH_DELAY);
+  }
+};
+
+// La închiderea paginii coada se trimite cu keepalive, ca cererea să nu fie anulată
+window.addEventListener('pagehide', () => {
+  const token = localStorage.getItem('token');
+  if (!token || !pendingInteractions.length) {
+    return;
+  }
+
+  fetch(`${baseURL}recommendations/interactions/batch/`, {
+    method: 'POST',
+    keepalive: true,
+    headers: {
+      'Content-Type': 'application/json',
+      'Authorization': `Bearer ${token}`
+    },
+    body: JSON.stringify({ events: pendingInteractions })
+  });
+  pendingInteractions = [];
+});
+
+
 export const recommendationsAPI = {
   getForYou: async () => {
     try {
@@ -423,6 +494,9 @@ export const recommendationsAPI = {
         return; 
       }
       
+      // Evenimentele din coadă sunt anterioare acestuia
+      await flushInteractions();
+
       await axios.post(`${baseURL}recommendations/interactions/`, data, {
         headers: {
           'Authorization': `Bearer ${token}`
@@ -430,9 +504,15 @@ export const recommendationsAPI = {
       });
     } catch (error) {
       console.error('Eroare la înregistrarea interacțiunii:', error);
-      
+
     }
   },
+
+  recordInteractionsBatch,
+
+  queueInteraction,
+
+  flushInteractions,
 };
 
 const calculateLoan = async (data) => {
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'auto_marketplace_backend.settings')
 
 application = get_asgi_application()
+
+from recommendations.warmup import warm_up_enabled, warm_up  # noqa: E402
+
+if warm_up_enabled():
+    warm_up()
@@ -114,6 +114,40 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Modele de recomandare precalculate (matrici, indexuri)
+RECOMMENDATION_ARTIFACTS_DIR = os.path.join(BASE_DIR, 'recommendation_artifacts')
+
+# Sursele de candidați pentru etapa de retrieval și plafonul total de candidați
+RECOMMENDATION_CANDIDATE_SOURCES = [
+    'recommendations.candidates.BrandSource',
+    'recommendations.candidates.FuelTypeSource',
+    'recommendations.candidates.PriceBandSource',
+    'recommendations.candidates.PopularSource',
+    'recommendations.candidates.CollaborativeSource',
+]
+RECOMMENDATION_MAX_CANDIDATES = 500
+
+# Durata (secunde) pentru care se păstrează feed-ul de recomandări al unui utilizator
+RECOMMENDATION_FEED_CACHE_TIMEOUT = 15 * 60
+
+# Ingestia în lot a interacțiunilor: evenimentele sunt confirmate imediat și scrise periodic
+RECOMMENDATION_BUFFERED_INGESTION = False
+RECOMMENDATION_INGESTION_FLUSH_INTERVAL = 2.0
+RECOMMENDATION_INGESTION_FLUSH_SIZE = 500
+RECOMMENDATION_INGESTION_MAX_BUFFER = 20000
+
+# La câte secunde matricea de interacțiuni a fiecărui worker preia activitatea scrisă de celelalte procese
+RECOMMENDATION_MATRIX_SYNC_INTERVAL = 60
+
+# La câte secunde indexul și coloanele anunțurilor preiau modificările altor procese, când cache-ul nu e comun
+RECOMMENDATION_LISTING_SYNC_INTERVAL = 60
+
+# Interacțiunile mai vechi de atâtea zile sunt agregate în interaction_rollups (comanda rollup_interactions)
+RECOMMENDATION_INTERACTION_RETENTION_DAYS = 180
+
+# Încarcă modelele de recomandare și cache-urile la pornirea fiecărui worker (wsgi/asgi)
+RECOMMENDATION_WARM_UP = False
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -187,6 +221,8 @@ SIMPLE_JWT = {
 }
 
 
+# Cache-ul local nu este comun worker-ilor: feed-urile și fațetele nu se păstrează în el
+# (vezi listings.caching.cache_is_shared); în producție se configurează Redis sau Memcached
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
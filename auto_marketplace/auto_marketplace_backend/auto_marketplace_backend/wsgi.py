@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'auto_marketplace_backend.settings')
 
 application = get_wsgi_application()
+
+from recommendations.warmup import warm_up_enabled, warm_up  # noqa: E402
+
+if warm_up_enabled():
+    warm_up()
@@ -0,0 +1,17 @@
+from django.conf import settings
+
+# Backend-uri din memoria procesului: o scriere nu este văzută de celelalte procese
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared(alias='default'):
+    """
+    Dacă cache-ul este comun tuturor proceselor (Redis, Memcached, baza de
+    date, fișiere). Doar atunci o invalidare scrisă de un worker (versiune
+    incrementată, cheie ștearsă) ajunge și la ceilalți.
+    """
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    return backend not in PROCESS_LOCAL_BACKENDS
@@ -0,0 +1,124 @@
+import hashlib
+import logging
+from collections import Counter
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django_filters.rest_framework import DjangoFilterBackend
+from .search import SEARCH_PARAM, query_terms, search_listings
+from .caching import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+FACET_FIELDS = ['brand', 'fuel_type', 'transmission', 'drive_type', 'condition_state', 'body_type']
+
+# Parametrii care nu schimbă setul filtrat (paginare, ordonare, câmpuri serializate)
+IGNORED_PARAMS = {'page', 'page_size', 'pagination', 'cursor', 'ordering', 'fields', 'expand'}
+
+FACETS_CACHE_TIMEOUT = 10 * 60
+VERSION_KEY = 'listings:facets_version'
+
+
+def _version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def invalidate_facets():
+    """Marchează toate rezultatele din cache ca expirate (la modificarea anunțurilor)."""
+    def bump():
+        cache.add(VERSION_KEY, 0, timeout=None)
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, 1, timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def filter_signature(query_params):
+    """
+    Semnătura normalizată a filtrului: parametrii relevanți sortați, cu
+    valorile sortate, iar căutarea redusă la termenii ei normalizați.
+    """
+    parts = []
+    for name in sorted(query_params.keys()):
+        if name in IGNORED_PARAMS:
+            continue
+        if name == SEARCH_PARAM:
+            values = query_terms(query_params.get(name, ''))
+        else:
+            values = sorted(value.strip() for value in query_params.getlist(name))
+        values = [value for value in values if value]
+        if values:
+            parts.append(f"{name}={','.join(values)}")
+    return '&'.join(parts)
+
+
+def _cache_key(signature):
+    digest = hashlib.md5(signature.encode('utf-8')).hexdigest()
+    return f"listings:facets:{_version()}:{digest}"
+
+
+def _matches(value, selected):
+    return value is not None and str(value).lower() == selected.lower()
+
+
+def count_facets(queryset, selected):
+    """
+    Numărul de anunțuri pe fiecare valoare a fațetelor, dintr-o singură
+    interogare grupată pe toate câmpurile. selected conține valorile alese
+    pentru fațete; ele nu sunt aplicate în SQL, ci la agregare, ca fiecare
+    fațetă să fie numărată cu toate celelalte selecții, dar fără a ei
+    (altfel o marcă aleasă ar ascunde celelalte mărci).
+    """
+    rows = queryset.order_by().values(*FACET_FIELDS).annotate(total=Count('id'))
+
+    facets = {field: Counter() for field in FACET_FIELDS}
+    count = 0
+    for row in rows:
+        mismatched = [field for field, value in selected.items() if not _matches(row[field], value)]
+        if not mismatched:
+            count += row['total']
+        if len(mismatched) > 1:
+            continue
+        for field in FACET_FIELDS:
+            if row[field] is not None and (not mismatched or mismatched == [field]):
+                facets[field][row[field]] += row['total']
+
+    return {
+        'count': count,
+        'facets': {
+            field: [{'value': value, 'count': n} for value, n in counter.most_common()]
+            for field, counter in facets.items()
+        },
+    }
+
+
+def listing_facets(view, request, queryset):
+    """
+    Fațetele pentru filtrul curent al CarListingViewSet, din cache dacă
+    există. Cu un cache local procesului nu se păstrează nimic: invalidarea
+    la modificarea anunțurilor nu ar ajunge la ceilalți workeri. Filtrele view-ului se aplică fără selecțiile fațetelor, care
+    sunt tratate de count_facets. Returnează (rezultat, erori de validare).
+    """
+    shared = cache_is_shared()
+    key = _cache_key(filter_signature(request.query_params)) if shared else None
+    cached = cache.get(key) if shared else None
+    if cached is not None:
+        return cached, None
+
+    params = request.query_params.copy()
+    selected = {}
+    for field in FACET_FIELDS:
+        value = params.pop(field, None)
+        if value and value[-1]:
+            selected[field] = value[-1]
+
+    filterset = DjangoFilterBackend().get_filterset_class(view, queryset)(data=params, queryset=queryset, request=request)
+    if not filterset.is_valid():
+        return None, filterset.errors
+
+    result = count_facets(search_listings(filterset.qs, params.get(SEARCH_PARAM, ''), rank=False), selected)
+    if shared:
+        cache.set(key, result, timeout=FACETS_CACHE_TIMEOUT)
+    return result, None
@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from listings.search import rebuild_search_index
+from listings.models import ListingSearchTerm
+
+
+class Command(BaseCommand):
+    help = 'Reconstruiește indexul de căutare al anunțurilor (titlu, marcă, model, combustibil, dotări).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Numărul de anunțuri indexate într-o tranzacție.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        indexed = rebuild_search_index(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Index de căutare reconstruit: {indexed} anunțuri, {ListingSearchTerm.objects.count()} termeni în {elapsed:.2f}s"
+        ))
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carlisting',
+            index=models.Index(fields=['brand', 'created_at'], name='idx_listings_brand_created'),
+        ),
+        migrations.AddIndex(
+            model_name='carlisting',
+            index=models.Index(fields=['fuel_type', 'created_at'], name='idx_listings_fuel_created'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0003_carlisting_candidate_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='carlisting',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='carlisting',
+            name='contact_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='carlisting',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='carlisting',
+            name='popularity_score',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='carlisting',
+            name='main_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='listings.carimage'),
+        ),
+        migrations.AddIndex(
+            model_name='carlisting',
+            index=models.Index(fields=['popularity_score', 'created_at'], name='idx_listings_popularity'),
+        ),
+    ]
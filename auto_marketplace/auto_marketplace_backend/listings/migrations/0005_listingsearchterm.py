@@ -0,0 +1,26 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0004_carlisting_popularity_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.FloatField(default=1.0)),
+                ('car_listing', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='listings.carlisting')),
+            ],
+            options={
+                'db_table': 'listing_search_terms',
+                'unique_together': {('car_listing', 'term')},
+                'indexes': [models.Index(fields=['term', 'car_listing'], name='idx_search_term_listing')],
+            },
+        ),
+    ]
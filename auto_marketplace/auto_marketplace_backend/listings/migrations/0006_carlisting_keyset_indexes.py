@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0005_listingsearchterm'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='carlisting',
+            index=models.Index(fields=['created_at', 'id'], name='idx_listings_created_id'),
+        ),
+        migrations.AddIndex(
+            model_name='carlisting',
+            index=models.Index(fields=['price', 'id'], name='idx_listings_price_id'),
+        ),
+        migrations.AddIndex(
+            model_name='carlisting',
+            index=models.Index(fields=['mileage', 'id'], name='idx_listings_mileage_id'),
+        ),
+        migrations.AddIndex(
+            model_name='carlisting',
+            index=models.Index(fields=['year_of_manufacture', 'id'], name='idx_listings_year_id'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def fill_search_terms(apps, schema_editor):
+    # Indexul pentru anunțurile existente înainte de 0005; cele noi sunt indexate la salvare
+    from listings.search import rebuild_search_index
+
+    rebuild_search_index(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0006_carlisting_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_search_terms, migrations.RunPython.noop),
+    ]
@@ -68,12 +68,42 @@ class CarListing(models.Model):
     registered = models.BooleanField(default=False, verbose_name="Înmatriculat")
     location = models.CharField(max_length=100, null=True, blank=True, verbose_name="Localitate")
     
+    # Contoare denormalizate, actualizate la fiecare interacțiune / favorit
+    view_count = models.PositiveIntegerField(default=0)
+    contact_count = models.PositiveIntegerField(default=0)
+    favorite_count = models.PositiveIntegerField(default=0)
+    popularity_score = models.IntegerField(default=0)
+    main_image = models.ForeignKey('CarImage', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    
+    # Actualizate doar prin UPDATE atomice (recommendations.popularity), niciodată din instanță
+    COUNTER_FIELDS = ('view_count', 'contact_count', 'favorite_count', 'popularity_score', 'main_image')
+    
     def __str__(self):
         return f"{self.brand} {self.model} ({self.year_of_manufacture})"
     
+    def save(self, *args, **kwargs):
+        # Instanța poate avea contoare vechi: la actualizare nu le rescriem, altfel
+        # s-ar pierde incrementările F() făcute între citire și salvare
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     class Meta:
         db_table = 'car_listings'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['brand', 'created_at'], name='idx_listings_brand_created'),
+            models.Index(fields=['fuel_type', 'created_at'], name='idx_listings_fuel_created'),
+            models.Index(fields=['popularity_score', 'created_at'], name='idx_listings_popularity'),
+            # Paginarea după cheie (ordonarea lui CarListingViewSet, cu id pentru unicitate)
+            models.Index(fields=['created_at', 'id'], name='idx_listings_created_id'),
+            models.Index(fields=['price', 'id'], name='idx_listings_price_id'),
+            models.Index(fields=['mileage', 'id'], name='idx_listings_mileage_id'),
+            models.Index(fields=['year_of_manufacture', 'id'], name='idx_listings_year_id'),
+        ]
 
 class CarImage(models.Model):
     car_listing = models.ForeignKey(CarListing, on_delete=models.CASCADE, related_name='images')
@@ -109,4 +139,23 @@ class Favorite(models.Model):
         unique_together = ('user', 'car_listing')
         
     def __str__(self):
-        return f"{self.user.username} - {self.car_listing}"
\ No newline at end of file
+        return f"{self.user.username} - {self.car_listing}"
+
+class ListingSearchTerm(models.Model):
+    """
+    Indexul inversat al căutării: un rând pe (anunț, termen normalizat),
+    cu ponderea termenului în anunț. Menținut de listings.search.
+    """
+    car_listing = models.ForeignKey(CarListing, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=64)
+    weight = models.FloatField(default=1.0)
+
+    class Meta:
+        db_table = 'listing_search_terms'
+        unique_together = ('car_listing', 'term')
+        indexes = [
+            models.Index(fields=['term', 'car_listing'], name='idx_search_term_listing'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.car_listing_id}"
@@ -1,6 +1,110 @@
+import json
+import base64
+import datetime
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
-    max_page_size = 100
\ No newline at end of file
+    max_page_size = 100
+
+
+class KeysetResultsSetPagination(StandardResultsSetPagination):
+    """
+    Paginare cu număr de pagină implicit; cu ?pagination=cursor, paginare
+    după cheie (keyset) pe ordonarea curentă plus id, doar înainte, fără
+    COUNT(*) și fără OFFSET, deci orice pagină costă cât prima. Linkul
+    next conține cursorul (valorile ultimului anunț din pagină).
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor invalid.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.ordering = self._ordering(queryset)
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            try:
+                queryset = queryset.filter(self._after(self.ordering, self._decode(encoded)))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        page_size = self.get_page_size(request)
+        results = list(queryset.order_by(*self.ordering)[:page_size + 1])
+        self.next_cursor = None
+        if len(results) > page_size:
+            results = results[:page_size]
+            self.next_cursor = self._encode([self._value(results[-1], name) for name in self.ordering])
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def _ordering(self, queryset):
+        # Ordonarea stabilită de filtre (OrderingFilter, căutarea) sau cea a modelului, cu id la final pentru unicitate
+        ordering = [name for name in (queryset.query.order_by or queryset.model._meta.ordering) if isinstance(name, str)]
+        if not ordering:
+            ordering = ['-id']
+        if ordering[-1].lstrip('-') not in ('id', 'pk'):
+            ordering.append('-id' if ordering[-1].startswith('-') else 'id')
+        return ordering
+
+    def _value(self, obj, name):
+        value = getattr(obj, name.lstrip('-'))
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            return value.isoformat()
+        return value
+
+    def _after(self, ordering, values):
+        """
+        Condiția „după cursor” pentru (c1, ..., id): c1 <= v1 AND (c1 < v1 OR
+        (c2 ...)), pentru descrescător. Limita c1 <= v1 permite folosirea
+        indexului compus (c1, id) ca interval.
+        """
+        name, value = ordering[0], values[0]
+        field, descending = name.lstrip('-'), name.startswith('-')
+        strict = Q(**{f"{field}__{'lt' if descending else 'gt'}": value})
+        if len(ordering) == 1:
+            return strict
+        bound = Q(**{f"{field}__{'lte' if descending else 'gte'}": value})
+        return bound & (strict | self._after(ordering[1:], values[1:]))
+
+    def _encode(self, values):
+        payload = json.dumps({'o': self.ordering, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def _decode(self, encoded):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = payload['v']
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        # Cursorul este valabil doar pentru ordonarea din care a fost generat
+        if payload.get('o') != self.ordering or not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
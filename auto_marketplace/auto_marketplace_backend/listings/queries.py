@@ -0,0 +1,42 @@
+from django.db.models import Exists, OuterRef, Value, BooleanField
+from .models import CarListing, Favorite
+
+
+def listing_queryset(user=None, queryset=None, fields=None):
+    """
+    Anunțurile pregătite pentru CarListingSerializer: vânzătorul și imaginea
+    principală citite prin JOIN, imaginile și dotările preîncărcate (câte o
+    interogare pentru toată pagina) și is_favorite calculat în aceeași
+    interogare cu un Exists. Cu fields (câmpurile selectate de serializer)
+    se încarcă doar relațiile folosite.
+    """
+    if queryset is None:
+        queryset = CarListing.objects.all()
+
+    def wanted(*names):
+        return fields is None or any(name in fields for name in names)
+
+    related = [name for name, used in (('user', wanted('user', 'seller')), ('main_image', wanted('main_image'))) if used]
+    if related:
+        queryset = queryset.select_related(*related)
+    prefetch = [name for name in ('images', 'features') if wanted(name)]
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+
+    if not wanted('is_favorite'):
+        return queryset
+    if user is not None and user.is_authenticated:
+        return queryset.annotate(is_favorite=Exists(
+            Favorite.objects.filter(user=user, car_listing=OuterRef('pk'))
+        ))
+    return queryset.annotate(is_favorite=Value(False, output_field=BooleanField()))
+
+
+def listings_in_order(listing_ids, user=None, fields=None):
+    """Anunțurile cu id-urile date, în aceeași ordine, pregătite pentru serializare."""
+    listing_ids = list(listing_ids)
+    if not listing_ids:
+        return []
+    listings = listing_queryset(user, CarListing.objects.filter(id__in=listing_ids), fields)
+    by_id = {listing.id: listing for listing in listings}
+    return [by_id[listing_id] for listing_id in listing_ids if listing_id in by_id]
@@ -0,0 +1,161 @@
+import re
+import logging
+import unicodedata
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum, Q, FloatField
+from django.db.models.functions import Coalesce
+from rest_framework.filters import BaseFilterBackend
+from .models import CarListing, CarFeature, ListingSearchTerm
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PARAM = 'search'
+
+# Ponderea unui termen după câmpul în care apare
+FIELD_WEIGHTS = {
+    'brand': 3.0,
+    'model': 3.0,
+    'title': 1.0,
+    'fuel_type': 1.0,
+    'features': 0.5,
+}
+
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def fold(text):
+    """Text fără diacritice (ă, â, î, ș/ş, ț/ţ), cu litere mici."""
+    decomposed = unicodedata.normalize('NFKD', str(text or ''))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return [token[:MAX_TERM_LENGTH] for token in _TOKEN_RE.findall(fold(text))]
+
+
+def listing_terms(listing, feature_names):
+    """{termen: pondere} pentru un anunț; un termen prezent în mai multe câmpuri își adună ponderile."""
+    terms = defaultdict(float)
+    for field in ('brand', 'model', 'title', 'fuel_type'):
+        for token in set(tokenize(getattr(listing, field))):
+            terms[token] += FIELD_WEIGHTS[field]
+    for token in set(token for name in feature_names for token in tokenize(name)):
+        terms[token] += FIELD_WEIGHTS['features']
+    return dict(terms)
+
+
+def _rows(listing, feature_names, term_model=ListingSearchTerm):
+    return [
+        term_model(car_listing_id=listing.id, term=term, weight=weight)
+        for term, weight in listing_terms(listing, feature_names).items()
+    ]
+
+
+def _models(apps):
+    """Modelele folosite de index; cu apps (dintr-o migrare), versiunile istorice."""
+    if apps is None:
+        return CarListing, CarFeature, ListingSearchTerm
+    return tuple(apps.get_model('listings', name) for name in ('CarListing', 'CarFeature', 'ListingSearchTerm'))
+
+
+def index_listings(listing_ids, apps=None):
+    """Recalculează termenii anunțurilor date (cele șterse între timp sunt ignorate)."""
+    listing_model, feature_model, term_model = _models(apps)
+    listing_ids = list(listing_ids)
+    listings = list(listing_model.objects.filter(id__in=listing_ids).only('id', 'brand', 'model', 'title', 'fuel_type'))
+    features = defaultdict(list)
+    for listing_id, name in feature_model.objects.filter(car_listing_id__in=listing_ids).values_list('car_listing_id', 'feature_name'):
+        features[listing_id].append(name)
+
+    with transaction.atomic():
+        term_model.objects.filter(car_listing_id__in=listing_ids).delete()
+        term_model.objects.bulk_create(
+            [row for listing in listings for row in _rows(listing, features[listing.id], term_model)],
+            batch_size=1000
+        )
+    return len(listings)
+
+
+def schedule_index(listing_id):
+    """Reindexează anunțul după commit-ul tranzacției curente."""
+    def reindex():
+        try:
+            index_listings([listing_id])
+        except Exception as e:
+            logger.exception(f"Eroare la indexarea anunțului {listing_id} pentru căutare: {str(e)}")
+
+    transaction.on_commit(reindex)
+
+
+def rebuild_search_index(batch_size=1000, apps=None):
+    """
+    Reconstruiește tot indexul, pe loturi de anunțuri. Fiecare lot își
+    înlocuiește termenii într-o tranzacție, deci căutarea funcționează și în
+    timpul reconstruirii. Termenii anunțurilor șterse dispar odată cu ele
+    (ON DELETE CASCADE). Returnează numărul de anunțuri indexate.
+    """
+    listing_model = _models(apps)[0]
+    listing_ids = list(listing_model.objects.order_by('id').values_list('id', flat=True))
+    indexed = 0
+    for start in range(0, len(listing_ids), batch_size):
+        indexed += index_listings(listing_ids[start:start + batch_size], apps=apps)
+    return indexed
+
+
+def query_terms(query):
+    """Termenii interogării, fără duplicate, în ordinea scrierii."""
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def _term_condition(term, prefix):
+    return Q(term__startswith=term) if prefix else Q(term=term)
+
+
+def search_listings(queryset, query, rank=True):
+    """
+    Anunțurile care conțin toți termenii interogării, adnotate cu
+    search_rank (suma ponderilor termenilor potriviți) dacă rank este True.
+    Ultimul termen este căutat ca prefix, pentru căutarea în timpul
+    tastării; ceilalți exact. Fiecare termen este rezolvat pe indexul
+    (term, car_listing).
+    """
+    terms = query_terms(query)
+    if not terms:
+        return queryset
+
+    matched = Q()
+    for i, term in enumerate(terms):
+        condition = _term_condition(term, prefix=(i == len(terms) - 1))
+        queryset = queryset.filter(
+            pk__in=ListingSearchTerm.objects.filter(condition).values('car_listing_id')
+        )
+        matched |= condition
+
+    if not rank:
+        return queryset
+    weights = ListingSearchTerm.objects.filter(matched, car_listing=OuterRef('pk')).order_by().values(
+        'car_listing'
+    ).annotate(total=Sum('weight')).values('total')
+    return queryset.annotate(search_rank=Coalesce(Subquery(weights, output_field=FloatField()), 0.0))
+
+
+class ListingSearchFilter(BaseFilterBackend):
+    """
+    Căutare pe indexul inversat (?search=), combinabilă cu celelalte filtre.
+    Fără ?ordering= explicit, rezultatele sunt ordonate după relevanță.
+    Trebuie să fie după OrderingFilter în filter_backends.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(SEARCH_PARAM, '')
+        if not query_terms(query):
+            return queryset
+
+        queryset = search_listings(queryset, query)
+        if not request.query_params.get('ordering'):
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
@@ -15,30 +15,94 @@ class CarImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image_path', 'is_main']
         read_only_fields = ['id']
 
-class CarListingSerializer(serializers.ModelSerializer):
+LISTING_FIELDS = [
+    'id', 'user', 'title', 'brand', 'model', 'mileage', 'power',
+    'engine_capacity', 'color', 'condition_state', 'year_of_manufacture',
+    'fuel_type', 'price', 'emission_standard', 'transmission', 'drive_type',
+    'description', 'created_at', 'updated_at', 'images', 'features',
+    'is_favorite', 'body_type', 'right_hand_drive', 'co2_emissions', 
+    'seats', 'doors', 'registered', 'location'
+]
+
+# Reprezentarea compactă folosită de cardurile din liste (?fields=card)
+LISTING_CARD_FIELDS = [
+    'id', 'title', 'price', 'year_of_manufacture', 'mileage', 'fuel_type',
+    'location', 'main_image', 'seller', 'is_favorite'
+]
+
+FIELD_PRESETS = {'card': LISTING_CARD_FIELDS}
+
+
+def _query_param_set(request, name):
+    params = getattr(request, 'query_params', None)
+    value = params.get(name) if params is not None else None
+    if not value:
+        return set()
+    return {part.strip() for part in value.split(',') if part.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Câmpurile serializate sunt alese de client: ?fields= (nume de câmpuri
+    sau presetări, de ex. card) și ?expand= (câmpuri adăugate la selecție,
+    de ex. images). Fără ?fields= se folosesc default_fields. Câmpurile
+    neselectate sunt eliminate înainte de serializare, deci nu costă nimic.
+    """
+    default_fields = None
+
+    @classmethod
+    def selected_fields(cls, request):
+        requested = set()
+        for name in _query_param_set(request, 'fields'):
+            requested.update(FIELD_PRESETS.get(name, [name]))
+        if not requested:
+            requested = set(cls.default_fields or cls.Meta.fields)
+        return (requested | _query_param_set(request, 'expand')) & set(cls.Meta.fields)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.selected_fields(self.context.get('request'))
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+
+class CarListingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     images = CarImageSerializer(many=True, read_only=True)
     features = CarFeatureSerializer(many=True, read_only=True)
     is_favorite = serializers.SerializerMethodField()
+    main_image = serializers.SerializerMethodField()
+    seller = serializers.SerializerMethodField()
     
     user = UserSerializer(read_only=True)
     
+    default_fields = LISTING_FIELDS
+    
     class Meta:
         model = CarListing
-        fields = [
-            'id', 'user', 'title', 'brand', 'model', 'mileage', 'power',
-            'engine_capacity', 'color', 'condition_state', 'year_of_manufacture',
-            'fuel_type', 'price', 'emission_standard', 'transmission', 'drive_type',
-            'description', 'created_at', 'updated_at', 'images', 'features',
-            'is_favorite', 'body_type', 'right_hand_drive', 'co2_emissions', 
-            'seats', 'doors', 'registered', 'location'
-        ]
+        fields = LISTING_FIELDS + ['main_image', 'seller']
         read_only_fields = ['id', 'user', 'created_at', 'is_favorite']
     
     def get_is_favorite(self, obj):
+        # Adnotat de listing_queryset; altfel se verifică separat
+        annotated = getattr(obj, 'is_favorite', None)
+        if annotated is not None:
+            return bool(annotated)
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return Favorite.objects.filter(user=request.user, car_listing=obj).exists()
         return False
+    
+    def get_main_image(self, obj):
+        if not obj.main_image_id or not obj.main_image.image_path:
+            return None
+        url = obj.main_image.image_path.url
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+    
+    def get_seller(self, obj):
+        return {'id': obj.user_id, 'display_name': obj.user.display_name or obj.user.username}
+    
     def to_representation(self, instance):
         rep = super().to_representation(instance)
      
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import CarListing, CarFeature
+from .search import schedule_index
+from .facets import invalidate_facets
+
+
+@receiver(post_save, sender=CarListing)
+def listing_saved(sender, instance, **kwargs):
+    schedule_index(instance.id)
+    invalidate_facets()
+
+
+@receiver(post_delete, sender=CarListing)
+def listing_deleted(sender, instance, **kwargs):
+    invalidate_facets()
+
+
+@receiver(post_save, sender=CarFeature)
+@receiver(post_delete, sender=CarFeature)
+def feature_changed(sender, instance, **kwargs):
+    schedule_index(instance.car_listing_id)
+    # Căutarea include dotările, deci fațetele filtrate după căutare se pot schimba
+    invalidate_facets()
@@ -1,3 +1,238 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import importlib
+from unittest import mock
+from django.apps import apps as django_apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from users.models import User
+from .models import CarListing, CarImage, CarFeature, Favorite, ListingSearchTerm
+from .queries import listings_in_order
+from .serializers import CarListingSerializer
 
-# Create your tests here.
+
+class ListingQueryCountTests(APITestCase):
+    """Numărul de interogări al endpoint-urilor nu depinde de numărul de anunțuri serializate."""
+
+    def setUp(self):
+        self.seller = User.objects.create_user('vanzator', 'vanzator@example.com', 'parola123', real_name='Vânzător')
+        self.buyer = User.objects.create_user('cumparator', 'cumparator@example.com', 'parola123', real_name='Cumpărător')
+
+    def _create_listings(self, n):
+        listings = []
+        for i in range(n):
+            listing = CarListing.objects.create(
+                user=self.seller, title=f'Dacia Logan {i}', brand='Dacia', model='Logan',
+                mileage=100000 + i, power=90, engine_capacity=1461, color='alb',
+                condition_state='utilizat', year_of_manufacture=2018, fuel_type='diesel',
+                price=7000 + i, emission_standard='Euro 6', transmission='manuala',
+                drive_type='fata', location='Cluj'
+            )
+            CarImage.objects.create(car_listing=listing, image_path=f'car_images/{i}.jpg', is_main=True)
+            CarFeature.objects.create(car_listing=listing, feature_name='Climatronic', feature_value='da')
+            if i % 2 == 0:
+                Favorite.objects.create(user=self.buyer, car_listing=listing)
+            listings.append(listing)
+        return listings
+
+    def _count_queries(self, url):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(captured), response
+
+    def _assert_constant(self, url, expected_small=2, extra=8):
+        self._create_listings(expected_small)
+        small, _ = self._count_queries(url)
+        self._create_listings(extra)
+        large, response = self._count_queries(url)
+        self.assertEqual(small, large)
+        return response
+
+    def test_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.buyer)
+        response = self._assert_constant('/api/listings/cars/?page_size=50')
+        results = response.data['results']
+        self.assertEqual(len(results), 10)
+        self.assertEqual(sum(1 for item in results if item['is_favorite']), 5)
+        self.assertTrue(all(item['images'] and item['features'] for item in results))
+
+    def test_anonymous_list_query_count_is_constant(self):
+        response = self._assert_constant('/api/listings/cars/?page_size=50')
+        self.assertFalse(any(item['is_favorite'] for item in response.data['results']))
+
+    def test_my_listings_query_count_is_constant(self):
+        self.client.force_authenticate(self.seller)
+        self._assert_constant('/api/listings/cars/my_listings/?page_size=50')
+
+    def test_user_listings_query_count_is_constant(self):
+        self.client.force_authenticate(self.buyer)
+        self._assert_constant(f'/api/listings/user/{self.seller.id}/')
+
+    def test_listings_in_order_serialization(self):
+        listings = self._create_listings(6)
+        listing_ids = [listing.id for listing in reversed(listings)]
+
+        with self.assertNumQueries(3):
+            data = CarListingSerializer(listings_in_order(listing_ids, self.buyer), many=True).data
+        self.assertEqual([item['id'] for item in data], listing_ids)
+        self.assertEqual([item['is_favorite'] for item in data], [i % 2 == 0 for i in reversed(range(6))])
+
+    def test_card_fields(self):
+        self.client.force_authenticate(self.buyer)
+        response = self._assert_constant('/api/listings/cars/?fields=card')
+        item = response.data['results'][0]
+        self.assertEqual(set(item), {
+            'id', 'title', 'price', 'year_of_manufacture', 'mileage', 'fuel_type',
+            'location', 'main_image', 'seller', 'is_favorite'
+        })
+        self.assertEqual(item['seller'], {'id': self.seller.id, 'display_name': 'vanzator'})
+        self.assertTrue(item['main_image'].endswith('.jpg'))
+
+    def test_cursor_pagination(self):
+        listings = self._create_listings(7)
+        CarListing.objects.filter(id__in=[listing.id for listing in listings[:3]]).update(price=5000)
+
+        for ordering in ('', 'price', '-price'):
+            url = f'/api/listings/cars/?pagination=cursor&page_size=3&ordering={ordering}'
+            seen, queries = [], set()
+            while url:
+                count, response = self._count_queries(url)
+                self.assertNotIn('count', response.data)
+                queries.add(count)
+                seen += [item['id'] for item in response.data['results']]
+                url = response.data['next']
+            # Paginile nu se suprapun chiar și la prețuri egale, iar fiecare costă la fel
+            self.assertEqual(sorted(seen), sorted(listing.id for listing in listings))
+            self.assertEqual(len(queries), 1)
+            field = ordering.lstrip('-') or 'created_at'
+            ordered = CarListing.objects.order_by(*(f'-{name}' if ordering != 'price' else name for name in (field, 'id')))
+            self.assertEqual(seen, list(ordered.values_list('id', flat=True)))
+
+        response = self.client.get('/api/listings/cars/?cursor=abc')
+        self.assertEqual(response.status_code, 404)
+
+    def test_save_keeps_counters(self):
+        listing = self._create_listings(1)[0]
+        stale = CarListing.objects.get(id=listing.id)
+        # Contoare incrementate între citirea instanței și salvarea ei
+        CarListing.objects.filter(id=listing.id).update(view_count=5, popularity_score=7)
+        stale.price = 6500
+        stale.save()
+
+        listing.refresh_from_db()
+        self.assertEqual((listing.price, listing.view_count, listing.popularity_score), (6500, 5, 7))
+
+    def test_sparse_fields_and_expand(self):
+        self._create_listings(2)
+        response = self.client.get('/api/listings/cars/?fields=id,price&expand=images')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'price', 'images'})
+
+
+class ListingSearchTests(APITestCase):
+
+    def setUp(self):
+        self.seller = User.objects.create_user('vanzator', 'vanzator@example.com', 'parola123', real_name='Vânzător')
+        # Indexul este actualizat după commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.logan = self._create('Dacia Logan Benzină', 'Dacia', 'Logan', 'benzină', 6000)
+            self.duster = self._create('Dacia Duster 4x4', 'Dacia', 'Duster', 'diesel', 12000)
+            self.a4 = self._create('Audi A4 Avant', 'Audi', 'A4', 'diesel', 15000)
+            CarFeature.objects.create(car_listing=self.duster, feature_name='Încălzire scaune')
+
+    def _create(self, title, brand, model, fuel_type, price):
+        return CarListing.objects.create(
+            user=self.seller, title=title, brand=brand, model=model, mileage=100000, power=90,
+            engine_capacity=1461, color='alb', condition_state='utilizat', year_of_manufacture=2018,
+            fuel_type=fuel_type, price=price, emission_standard='Euro 6', transmission='manuala',
+            drive_type='fata', location='Cluj'
+        )
+
+    def _search(self, **params):
+        response = self.client.get('/api/listings/cars/', params)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_diacritics_folding(self):
+        self.assertEqual(self._search(search='benzina'), [self.logan.id])
+        self.assertEqual(self._search(search='incalzire'), [self.duster.id])
+
+    def test_prefix_and_filters(self):
+        self.assertEqual(set(self._search(search='dac')), {self.logan.id, self.duster.id})
+        self.assertEqual(self._search(search='dacia', fuel_type='diesel'), [self.duster.id])
+        self.assertEqual(self._search(search='audi ava'), [self.a4.id])
+        self.assertEqual(self._search(search='ava audi'), [])
+
+    def test_index_follows_updates(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.a4.title = 'Audi A4 Quattro'
+            self.a4.save()
+        self.assertEqual(self._search(search='quattro'), [self.a4.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.a4.delete()
+        self.assertEqual(self._search(search='audi'), [])
+
+    def test_rebuild_replaces_terms_per_batch(self):
+        from . import search
+
+        total = ListingSearchTerm.objects.count()
+        seen = []
+        index_listings = search.index_listings
+
+        def counting(listing_ids, apps=None):
+            seen.append(ListingSearchTerm.objects.count())
+            return index_listings(listing_ids, apps=apps)
+
+        with mock.patch.object(search, 'index_listings', counting):
+            self.assertEqual(search.rebuild_search_index(batch_size=1), 3)
+        # indexul nu este golit înainte de reconstruire
+        self.assertEqual(seen, [total] * 3)
+        self.assertEqual(ListingSearchTerm.objects.count(), total)
+
+    def test_migration_indexes_existing_listings(self):
+        fill = importlib.import_module('listings.migrations.0007_fill_listing_search_terms').fill_search_terms
+        ListingSearchTerm.objects.all().delete()
+        fill(django_apps, None)
+        self.assertEqual(self._search(search='audi'), [self.a4.id])
+        self.assertEqual(self._search(search='incalzire'), [self.duster.id])
+
+    def test_facets(self):
+        response = self.client.get('/api/listings/cars/facets/', {'brand': 'Dacia', 'search': 'dacia'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        facets = response.data['facets']
+        # Marca aleasă nu ascunde celelalte mărci; căutarea se aplică tuturor fațetelor
+        self.assertEqual(facets['brand'], [{'value': 'Dacia', 'count': 2}])
+        self.assertEqual(
+            sorted((item['value'], item['count']) for item in facets['fuel_type']),
+            [('benzină', 1), ('diesel', 1)]
+        )
+
+        response = self.client.get('/api/listings/cars/facets/', {'fuel_type': 'diesel'})
+        self.assertEqual(sorted(item['value'] for item in response.data['facets']['fuel_type']), ['benzină', 'diesel'])
+        self.assertEqual(sorted(item['value'] for item in response.data['facets']['brand']), ['Audi', 'Dacia'])
+        self.assertEqual(response.data['count'], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.a4.delete()
+        response = self.client.get('/api/listings/cars/facets/', {'fuel_type': 'diesel'})
+        self.assertEqual(response.data['count'], 1)
+
+    def test_facets_are_cached_only_in_shared_cache(self):
+        def facet_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get('/api/listings/cars/facets/', {'fuel_type': 'diesel'}).status_code, 200)
+            return len(queries)
+
+        facet_queries()
+        # Cache-ul local nu este comun worker-ilor, deci fațetele se recalculează
+        self.assertGreater(facet_queries(), 0)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory,
+        }}):
+            facet_queries()
+            self.assertEqual(facet_queries(), 0)
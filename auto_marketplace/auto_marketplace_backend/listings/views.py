@@ -4,10 +4,13 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import CarListing, Favorite
 from .serializers import CarListingSerializer, CarListingCreateSerializer, FavoriteSerializer
+from .queries import listing_queryset, listings_in_order
+from .search import ListingSearchFilter
+from .facets import listing_facets
 from .permissions import IsOwnerOrAdminOrReadOnly
 from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, AllowAny
 import json
-from .pagination import StandardResultsSetPagination
+from .pagination import KeysetResultsSetPagination
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,8 +18,10 @@ logger = logging.getLogger(__name__)
 class CarListingViewSet(viewsets.ModelViewSet):
     queryset = CarListing.objects.all()
     permission_classes = [permissions.AllowAny]
-    pagination_class = StandardResultsSetPagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # ?pagination=cursor pentru paginarea după cheie (fără COUNT și OFFSET)
+    pagination_class = KeysetResultsSetPagination
+    # Căutarea ordonează după relevanță, deci rulează după OrderingFilter
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ListingSearchFilter]
     filterset_fields = {
         'brand': ['exact'],
         'model': ['exact', 'icontains'],
@@ -31,8 +36,9 @@ class CarListingViewSet(viewsets.ModelViewSet):
         'condition_state': ['exact'],
         'emission_standard': ['exact'],
         'color': ['exact'],
+        'body_type': ['exact'],
     }
-    search_fields = ['title', 'brand', 'model']  #am scos descriere ca daca cautam „audi„ imi oferea anunturi care au in desc „audio„
+    # ?search= folosește indexul listing_search_terms (titlu, marcă, model, combustibil, dotări), fără descriere
     ordering_fields = ['price', 'mileage', 'year_of_manufacture', 'created_at']
     ordering = ['-created_at']
     
@@ -40,7 +46,7 @@ class CarListingViewSet(viewsets.ModelViewSet):
         """
         Configurare permisiuni in funcție de acțiune.
         """
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'facets']:
        
             return [AllowAny()]
         elif self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -53,6 +59,9 @@ class CarListingViewSet(viewsets.ModelViewSet):
 
             return [IsOwnerOrAdminOrReadOnly()]
     
+    def get_queryset(self):
+        return listing_queryset(self.request.user, self.queryset, CarListingSerializer.selected_fields(self.request))
+    
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return CarListingCreateSerializer
@@ -114,7 +123,7 @@ class CarListingViewSet(viewsets.ModelViewSet):
     def my_listings(self, request):
         print("User autentificat:", request.user.is_authenticated)
         print("Username:", request.user.username)
-        queryset = self.filter_queryset(self.queryset.filter(user=request.user))
+        queryset = self.filter_queryset(self.get_queryset().filter(user=request.user))
         
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -123,6 +132,17 @@ class CarListingViewSet(viewsets.ModelViewSet):
         
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)  
+    
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Numărul de anunțuri pe marcă, combustibil, transmisie, tracțiune,
+        stare și caroserie pentru filtrul curent (aceiași parametri ca lista).
+        """
+        result, errors = listing_facets(self, request, CarListing.objects.all())
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
 
 class FavoriteViewSet(viewsets.ModelViewSet):
     serializer_class = FavoriteSerializer
@@ -226,7 +246,9 @@ def user_listings(request, user_id):
     """Returnează toate anunțurile publice ale unui utilizator"""
     try:
        
-        listings = CarListing.objects.filter(user_id=user_id)
+        listings = listing_queryset(
+            request.user, CarListing.objects.filter(user_id=user_id), CarListingSerializer.selected_fields(request)
+        )
       
         if hasattr(CarListing, 'is_active'):
             listings = listings.filter(is_active=True)
@@ -324,6 +346,9 @@ def similar_listings(request, pk):
             top_similar.extend(additional_listings)
         
      
+        top_similar = listings_in_order(
+            [listing.id for listing in top_similar], request.user, CarListingSerializer.selected_fields(request)
+        )
         serializer = CarListingSerializer(top_similar, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -0,0 +1,229 @@
+import time
+import datetime
+import threading
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from django.utils import timezone
+from .artifacts import save_arrays, load_arrays, artifact_mtime
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_NAME = 'als'
+
+DEFAULT_FACTORS = 64
+DEFAULT_ITERATIONS = 15
+DEFAULT_REGULARIZATION = 0.1
+DEFAULT_ALPHA = 20.0
+
+
+def _solve_rows(indptr, indices, data, fixed, gram, regularization, alpha, rows, out):
+    """
+    Pasul ALS pentru rândurile date (Hu, Koren, Volinsky 2008): pentru fiecare
+    rând u se rezolvă (YᵀY + Yᵀ(Cu - I)Y + λI) x = YᵀCu p(u), unde
+    încrederea este 1 + alpha * scor, iar p(u) = 1 pe celulele nenule.
+    YᵀY este comun tuturor rândurilor, deci fiecare rând costă doar
+    O(nnz_u * f² + f³).
+    """
+    identity = regularization * np.eye(fixed.shape[1])
+    for row in rows:
+        start, end = indptr[row], indptr[row + 1]
+        if start == end:
+            out[row] = 0
+            continue
+        cols = indices[start:end]
+        confidence = 1.0 + alpha * data[start:end].astype(np.float64)
+        factors = fixed[cols]
+        a = gram + (factors.T * (confidence - 1.0)) @ factors + identity
+        b = factors.T @ confidence
+        out[row] = np.linalg.solve(a, b)
+
+
+def als_step(matrix, fixed, regularization, alpha, threads=1):
+    """Recalculează factorii rândurilor matricei CSR, cu factorii coloanelor ficși."""
+    fixed = np.asarray(fixed, dtype=np.float64)
+    gram = fixed.T @ fixed
+    out = np.zeros((matrix.shape[0], fixed.shape[1]), dtype=np.float64)
+    chunks = np.array_split(np.arange(matrix.shape[0]), max(threads, 1))
+    args = (matrix.indptr, matrix.indices, matrix.data, fixed, gram, regularization, alpha)
+
+    if threads > 1:
+        # np.linalg.solve și produsele matriceale eliberează GIL-ul
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda rows: _solve_rows(*args, rows, out), chunks))
+    else:
+        _solve_rows(*args, chunks[0], out)
+    return out
+
+
+class ALSModel:
+    """
+    Factorizare matriceală pentru feedback implicit (ALS) peste matricea de
+    interacțiuni: scorul interacțiunii este folosit ca încredere. Embeddings
+    float32 pentru utilizatori și anunțuri, cu listing_ids sortate. Servirea
+    este un produs scalar între vectorul utilizatorului și matricea
+    anunțurilor, urmat de selecția primelor N.
+    """
+
+    def __init__(self, user_ids, user_factors, listing_ids, item_factors,
+                 regularization=DEFAULT_REGULARIZATION, alpha=DEFAULT_ALPHA, built_at=None):
+        self.user_ids = user_ids
+        self.user_factors = user_factors
+        self.listing_ids = listing_ids
+        self.item_factors = item_factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.built_at = built_at or timezone.now()
+        self.loaded_mtime = None
+        self._gram = None
+
+    @property
+    def factors(self):
+        return self.item_factors.shape[1]
+
+    @classmethod
+    def train(cls, interaction_matrix, factors=DEFAULT_FACTORS, iterations=DEFAULT_ITERATIONS,
+              regularization=DEFAULT_REGULARIZATION, alpha=DEFAULT_ALPHA, threads=1, seed=42):
+        built_at = timezone.now()
+        interaction_matrix.compact()
+        # O celulă 0 stocată ar conta ca preferință observată (p = 1, încredere 1)
+        user_items = interaction_matrix.matrix.tocsr(copy=True)
+        user_items.eliminate_zeros()
+        item_users = user_items.T.tocsr()
+
+        rng = np.random.default_rng(seed)
+        user_factors = rng.normal(0, 0.01, (user_items.shape[0], factors))
+        item_factors = rng.normal(0, 0.01, (user_items.shape[1], factors))
+
+        for iteration in range(iterations):
+            start = time.perf_counter()
+            user_factors = als_step(user_items, item_factors, regularization, alpha, threads)
+            item_factors = als_step(item_users, user_factors, regularization, alpha, threads)
+            logger.info(f"ALS iterația {iteration + 1}/{iterations}: {time.perf_counter() - start:.2f}s")
+
+        # Rândurile adăugate incremental în matrice nu păstrează ordinea id-urilor
+        user_ids = np.asarray(interaction_matrix.user_ids, dtype=np.int64)
+        listing_ids = np.asarray(interaction_matrix.listing_ids, dtype=np.int64)
+        user_order, listing_order = np.argsort(user_ids), np.argsort(listing_ids)
+        return cls(
+            user_ids[user_order],
+            user_factors[user_order].astype(np.float32),
+            listing_ids[listing_order],
+            item_factors[listing_order].astype(np.float32),
+            regularization=regularization,
+            alpha=alpha,
+            built_at=built_at,
+        )
+
+    def save(self):
+        save_arrays(
+            ARTIFACT_NAME,
+            user_ids=self.user_ids,
+            user_factors=self.user_factors,
+            listing_ids=self.listing_ids,
+            item_factors=self.item_factors,
+            params=np.array([self.regularization, self.alpha], dtype=np.float64),
+            built_at=np.array([self.built_at.timestamp()], dtype=np.float64),
+        )
+        self.loaded_mtime = artifact_mtime(ARTIFACT_NAME)
+
+    @classmethod
+    def load(cls):
+        mtime = artifact_mtime(ARTIFACT_NAME)
+        arrays = load_arrays(ARTIFACT_NAME, mmap=True)
+        if arrays is None:
+            return None
+
+        regularization, alpha = (float(x) for x in arrays['params'])
+        built_at = datetime.datetime.fromtimestamp(float(arrays['built_at'][0]), tz=datetime.timezone.utc)
+        instance = cls(
+            arrays['user_ids'], arrays['user_factors'], arrays['listing_ids'], arrays['item_factors'],
+            regularization=regularization, alpha=alpha, built_at=built_at
+        )
+        instance.loaded_mtime = mtime
+        return instance
+
+    def _positions(self, listing_ids):
+        listing_ids = np.asarray(listing_ids, dtype=np.int64)
+        if len(self.listing_ids) == 0:
+            return np.full(len(listing_ids), -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.listing_ids, listing_ids), len(self.listing_ids) - 1)
+        return np.where(self.listing_ids[pos] == listing_ids, pos, -1)
+
+    def fold_in(self, user_scores):
+        """
+        Vectorul unui utilizator calculat din interacțiunile lui (listing_id ->
+        scor) cu embeddings-urile anunțurilor fixe: un singur pas ALS, fără
+        reantrenare. Anunțurile necunoscute modelului sunt ignorate.
+        """
+        if not user_scores:
+            return None
+        positions = self._positions(list(user_scores.keys()))
+        scores = np.fromiter(user_scores.values(), dtype=np.float64, count=len(user_scores))
+        known = positions >= 0
+        if not known.any():
+            return None
+
+        if self._gram is None:
+            item_factors = np.asarray(self.item_factors, dtype=np.float64)
+            self._gram = item_factors.T @ item_factors
+
+        indptr = np.array([0, int(known.sum())])
+        out = np.zeros((1, self.factors), dtype=np.float64)
+        _solve_rows(
+            indptr, np.arange(indptr[1]), scores[known],
+            np.asarray(self.item_factors[positions[known]], dtype=np.float64),
+            self._gram, self.regularization, self.alpha, [0], out
+        )
+        return out[0].astype(np.float32)
+
+    def user_vector(self, user_id, user_scores=None):
+        """
+        Embedding-ul utilizatorului. Cu user_scores (interacțiunile curente)
+        vectorul este recalculat prin fold-in, deci include și activitatea de
+        după antrenare și funcționează pentru utilizatori noi.
+        """
+        if user_scores:
+            return self.fold_in(user_scores)
+        pos = np.searchsorted(self.user_ids, user_id) if len(self.user_ids) else 0
+        if pos < len(self.user_ids) and self.user_ids[pos] == user_id:
+            return np.asarray(self.user_factors[pos])
+        return None
+
+    def recommend(self, vector, exclude_ids=(), n=100):
+        """Primele n anunțuri după produsul scalar. Returnează (listing_ids, scores)."""
+        scores = np.asarray(self.item_factors) @ vector
+        # Pseudo-anunțurile rollup-urilor (id-uri negative, la începutul listei sortate)
+        scores[:np.searchsorted(self.listing_ids, 0)] = -np.inf
+        if exclude_ids:
+            excluded = self._positions(list(exclude_ids))
+            scores[excluded[excluded >= 0]] = -np.inf
+
+        n = min(n, int(np.isfinite(scores).sum()))
+        if n <= 0:
+            return [], np.zeros(0, dtype=np.float32)
+        top = np.argpartition(-scores, n - 1)[:n]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return self.listing_ids[top].tolist(), scores[top]
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_als_model():
+    """Modelul ALS al procesului curent sau None dacă nu a fost antrenat cu comanda train_als."""
+    global _model
+    with _model_lock:
+        mtime = artifact_mtime(ARTIFACT_NAME)
+        if mtime is None:
+            _model = None
+        elif _model is None or _model.loaded_mtime != mtime:
+            _model = ALSModel.load()
+        return _model
+
+
+def reset_loaded_als_model():
+    global _model
+    with _model_lock:
+        _model = None
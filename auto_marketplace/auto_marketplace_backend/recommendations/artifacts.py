@@ -0,0 +1,69 @@
+import os
+import shutil
+import logging
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def artifacts_dir():
+    """Directorul în care se salvează modelele de recomandare precalculate."""
+    return getattr(
+        settings,
+        'RECOMMENDATION_ARTIFACTS_DIR',
+        os.path.join(settings.BASE_DIR, 'recommendation_artifacts')
+    )
+
+
+def artifact_path(name):
+    return os.path.join(artifacts_dir(), name)
+
+
+def artifact_mtime(name):
+    """Momentul ultimei salvări a artefactului sau None dacă nu există."""
+    path = artifact_path(name)
+    if not os.path.isdir(path):
+        return None
+    return os.path.getmtime(path)
+
+
+def save_arrays(name, **arrays):
+    """
+    Salvează un set de array-uri NumPy ca fișiere .npy într-un director propriu.
+    Scrierea se face într-un director temporar care înlocuiește apoi versiunea
+    veche, astfel încât alte procese nu citesc niciodată un artefact incomplet.
+    """
+    target = artifact_path(name)
+    tmp = f"{target}.tmp-{os.getpid()}"
+    old = f"{target}.old-{os.getpid()}"
+
+    os.makedirs(tmp, exist_ok=True)
+    for key, value in arrays.items():
+        np.save(os.path.join(tmp, f"{key}.npy"), np.asarray(value), allow_pickle=False)
+
+    if os.path.isdir(target):
+        os.replace(target, old)
+    os.replace(tmp, target)
+    shutil.rmtree(old, ignore_errors=True)
+
+    logger.info(f"Artefactul {name} a fost salvat în {target}")
+
+
+def load_arrays(name, mmap=True):
+    """
+    Încarcă array-urile salvate cu save_arrays. Cu mmap=True fișierele sunt
+    mapate în memorie (read-only), deci pornirea unui worker nu copiază datele.
+    Returnează None dacă artefactul nu există.
+    """
+    path = artifact_path(name)
+    if not os.path.isdir(path):
+        return None
+
+    mmap_mode = 'r' if mmap else None
+    arrays = {}
+    for filename in os.listdir(path):
+        if filename.endswith('.npy'):
+            key = filename[:-len('.npy')]
+            arrays[key] = np.load(os.path.join(path, filename), mmap_mode=mmap_mode, allow_pickle=False)
+    return arrays
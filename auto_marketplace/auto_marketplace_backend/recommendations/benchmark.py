@@ -0,0 +1,128 @@
+import time
+import logging
+import tracemalloc
+import numpy as np
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from users.models import User
+from listings.models import CarListing, Favorite
+from .models import UserInteraction
+
+logger = logging.getLogger(__name__)
+
+
+def _similar_listings(user, limit, listing_id):
+    from listings.views import similar_listings
+
+    request = APIRequestFactory().get(f'/api/listings/cars/{listing_id}/similar_listings/')
+    return similar_listings(request, pk=listing_id).data
+
+
+def _targets():
+    from . import views
+
+    return {
+        'collaborative': lambda user, limit, listing_id: list(views.collaborative_filtering_recommendations(user, limit)),
+        'content': lambda user, limit, listing_id: list(views.content_based_recommendations(user, limit)),
+        'hybrid': lambda user, limit, listing_id: list(views.hybrid_recommendations(user, limit)),
+        'similar_listings': _similar_listings,
+        'popular': lambda user, limit, listing_id: list(views.get_popular_listings(limit, user=user)),
+        'als': lambda user, limit, listing_id: list(views.als_recommendations(user, limit)),
+    }
+
+
+MEMORY_SAMPLE = 10
+
+TARGETS = ['collaborative', 'content', 'hybrid', 'similar_listings', 'popular', 'als']
+
+
+def _percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def sample_users(n_users, seed=42):
+    """Utilizatori cu activitate, aleși aleator (reproductibil)."""
+    user_ids = list(User.objects.filter(interactions__isnull=False).distinct().values_list('id', flat=True))
+    rng = np.random.default_rng(seed)
+    if len(user_ids) > n_users:
+        user_ids = rng.choice(user_ids, size=n_users, replace=False).tolist()
+    return list(User.objects.filter(id__in=user_ids))
+
+
+def sample_listings(n_listings, seed=42):
+    listing_ids = list(CarListing.objects.values_list('id', flat=True))
+    rng = np.random.default_rng(seed)
+    if len(listing_ids) > n_listings:
+        listing_ids = rng.choice(listing_ids, size=n_listings, replace=False).tolist()
+    return listing_ids
+
+
+def run_benchmark(targets=None, n_users=50, repeats=1, limit=24, cold_cache=True, seed=42):
+    """
+    Măsoară fiecare funcție pe un eșantion de utilizatori: latența (p50/p95/
+    max în ms), numărul de interogări (medie/max) și vârful de memorie
+    alocată în Python (tracemalloc, MB, pe primii MEMORY_SAMPLE utilizatori).
+    Cu cold_cache, cache-ul este golit înaintea fiecărui apel. Primul apel
+    (încărcarea artefactelor) este raportat separat, ca warmup_ms.
+    """
+    functions = _targets()
+    targets = targets or TARGETS
+    users = sample_users(n_users, seed=seed)
+    listing_ids = sample_listings(max(len(users), 1), seed=seed)
+    if not users or not listing_ids:
+        return {}
+
+    results = {}
+    for name in targets:
+        function = functions[name]
+
+        start = time.perf_counter()
+        function(users[0], limit, listing_ids[0])
+        warmup_ms = (time.perf_counter() - start) * 1000
+
+        latencies, queries, peaks = [], [], []
+        for _ in range(repeats):
+            for i, user in enumerate(users):
+                if cold_cache:
+                    cache.clear()
+                listing_id = listing_ids[i % len(listing_ids)]
+
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    function(user, limit, listing_id)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                queries.append(len(captured))
+                reset_queries()
+
+        # tracemalloc încetinește execuția, deci memoria se măsoară într-o trecere separată
+        for i, user in enumerate(users[:MEMORY_SAMPLE]):
+            if cold_cache:
+                cache.clear()
+            tracemalloc.start()
+            function(user, limit, listing_ids[i % len(listing_ids)])
+            peaks.append(tracemalloc.get_traced_memory()[1] / (1024 * 1024))
+            tracemalloc.stop()
+
+        results[name] = {
+            'calls': len(latencies),
+            'warmup_ms': round(warmup_ms, 2),
+            'p50_ms': round(_percentile(latencies, 50), 2),
+            'p95_ms': round(_percentile(latencies, 95), 2),
+            'max_ms': round(max(latencies), 2),
+            'queries_avg': round(float(np.mean(queries)), 2),
+            'queries_max': int(max(queries)),
+            'peak_mb': round(max(peaks), 2),
+        }
+        logger.info(f"Benchmark {name}: {results[name]}")
+    return results
+
+
+def dataset_size():
+    return {
+        'users': User.objects.count(),
+        'listings': CarListing.objects.count(),
+        'interactions': UserInteraction.objects.count(),
+        'favorites': Favorite.objects.count(),
+    }
@@ -0,0 +1,181 @@
+import time
+import logging
+from django.conf import settings
+from django.utils.module_loading import import_string
+from listings.models import CarListing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CANDIDATE_SOURCES = [
+    'recommendations.candidates.BrandSource',
+    'recommendations.candidates.FuelTypeSource',
+    'recommendations.candidates.PriceBandSource',
+    'recommendations.candidates.PopularSource',
+    'recommendations.candidates.CollaborativeSource',
+]
+
+DEFAULT_MAX_CANDIDATES = 500
+
+
+class CandidateSource:
+    """
+    O sursă de candidați pentru etapa de ranking. Fiecare sursă întoarce cel
+    mult self.limit id-uri de anunțuri, obținute printr-o interogare ieftină
+    (indexată, cu LIMIT), indiferent de mărimea catalogului.
+    """
+
+    name = None
+    limit = 100
+
+    def __init__(self, limit=None):
+        if limit is not None:
+            self.limit = limit
+
+    def generate(self, user, preferences, exclude_ids, user_scores):
+        raise NotImplementedError
+
+    def base_queryset(self, user, exclude_ids):
+        return CarListing.objects.exclude(user=user).exclude(id__in=list(exclude_ids))
+
+
+def _top_keys(counter, n):
+    return [key for key, _ in sorted(counter.items(), key=lambda x: x[1], reverse=True)[:n]]
+
+
+class BrandSource(CandidateSource):
+    """Cele mai noi anunțuri din mărcile preferate."""
+
+    name = 'brand'
+    limit = 150
+
+    def generate(self, user, preferences, exclude_ids, user_scores):
+        brands = _top_keys(preferences['brands'], 3)
+        if not brands:
+            return []
+        return list(self.base_queryset(user, exclude_ids).filter(
+            brand__in=brands
+        ).order_by('-created_at').values_list('id', flat=True)[:self.limit])
+
+
+class FuelTypeSource(CandidateSource):
+    """Cele mai noi anunțuri cu combustibilii preferați."""
+
+    name = 'fuel_type'
+    limit = 100
+
+    def generate(self, user, preferences, exclude_ids, user_scores):
+        fuel_types = _top_keys(preferences['fuel_types'], 2)
+        if not fuel_types:
+            return []
+        return list(self.base_queryset(user, exclude_ids).filter(
+            fuel_type__in=fuel_types
+        ).order_by('-created_at').values_list('id', flat=True)[:self.limit])
+
+
+class PriceBandSource(CandidateSource):
+    """
+    Anunțurile cu prețul cel mai apropiat de media preferată, citite în
+    ambele direcții pe indexul de preț (±30% din medie).
+    """
+
+    name = 'price_band'
+    limit = 100
+
+    def generate(self, user, preferences, exclude_ids, user_scores):
+        avg = preferences['price_range']['avg']
+        if not avg:
+            return []
+
+        half = self.limit // 2
+        queryset = self.base_queryset(user, exclude_ids)
+        above = queryset.filter(
+            price__gte=avg, price__lte=avg * 1.3
+        ).order_by('price').values_list('id', flat=True)[:half]
+        below = queryset.filter(
+            price__lt=avg, price__gte=avg * 0.7
+        ).order_by('-price').values_list('id', flat=True)[:self.limit - half]
+        return list(above) + list(below)
+
+
+class PopularSource(CandidateSource):
+    """Anunțurile populare, ca acoperire pentru profile sărace."""
+
+    name = 'popular'
+    limit = 50
+
+    def generate(self, user, preferences, exclude_ids, user_scores):
+        from .views import get_popular_listings
+
+        exclude_ids = set(exclude_ids)
+        popular = get_popular_listings(limit=self.limit + len(exclude_ids), user=user)
+        return [listing.id for listing in popular if listing.id not in exclude_ids][:self.limit]
+
+
+class CollaborativeSource(CandidateSource):
+    """Vecinii item-item ai anunțurilor cu care utilizatorul a interacționat."""
+
+    name = 'collaborative'
+    limit = 100
+
+    def generate(self, user, preferences, exclude_ids, user_scores):
+        from .item_similarity import get_item_similarity_index
+
+        if not user_scores:
+            return []
+        item_index = get_item_similarity_index()
+        if item_index is None:
+            return []
+        listing_ids, _ = item_index.recommend(user_scores, exclude_ids=exclude_ids)
+        return listing_ids[:self.limit]
+
+
+def get_candidate_sources():
+    paths = getattr(settings, 'RECOMMENDATION_CANDIDATE_SOURCES', DEFAULT_CANDIDATE_SOURCES)
+    return [import_string(path)() for path in paths]
+
+
+def generate_candidates(user, preferences, exclude_ids=(), user_scores=None, sources=None, max_candidates=None):
+    """
+    Etapa de retrieval: reunește candidații din toate sursele, fără
+    duplicate și plafonați la max_candidates.
+    Returnează (listing_ids, stats), unde stats conține pentru fiecare sursă
+    numărul de candidați și timpul în milisecunde.
+    """
+    if sources is None:
+        sources = get_candidate_sources()
+    if max_candidates is None:
+        max_candidates = getattr(settings, 'RECOMMENDATION_MAX_CANDIDATES', DEFAULT_MAX_CANDIDATES)
+
+    candidate_ids = []
+    seen = set()
+    stats = []
+
+    for source in sources:
+        start = time.perf_counter()
+        try:
+            source_ids = source.generate(user, preferences, exclude_ids, user_scores or {})
+        except Exception as e:
+            logger.exception(f"Eroare în sursa de candidați {source.name}: {str(e)}")
+            source_ids = []
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        added = 0
+        for listing_id in source_ids:
+            if listing_id not in seen and len(candidate_ids) < max_candidates:
+                seen.add(listing_id)
+                candidate_ids.append(listing_id)
+                added += 1
+
+        stats.append({
+            'source': source.name,
+            'candidates': len(source_ids),
+            'added': added,
+            'ms': round(elapsed_ms, 2),
+        })
+
+    logger.info(
+        "Candidați generați: " + ", ".join(
+            f"{s['source']}={s['candidates']} ({s['ms']}ms)" for s in stats
+        ) + f"; total={len(candidate_ids)}"
+    )
+    return candidate_ids, stats
@@ -0,0 +1,448 @@
+import threading
+import logging
+import numpy as np
+from django.utils import timezone
+from listings.models import CarListing
+from .feature_index import listings_version
+
+logger = logging.getLogger(__name__)
+
+_NOT_SYNCED = object()
+
+NUMERIC_FIELDS = ['price', 'year_of_manufacture', 'mileage', 'power']
+CATEGORICAL_FIELDS = ['brand', 'model', 'fuel_type', 'transmission', 'body_type']
+COLUMN_FIELDS = ['id', 'user_id', 'created_at'] + NUMERIC_FIELDS + CATEGORICAL_FIELDS
+
+
+_ALIVE = np.iinfo(np.int64).max
+
+
+class ListingColumns:
+    """
+    Atributele tuturor anunțurilor ținute pe coloane (array-uri NumPy),
+    încărcate o singură dată per proces. Câmpurile text sunt codificate
+    numeric (-1 pentru valori lipsă), cu vocabularul în self.vocab.
+
+    Rândurile de la încărcare sunt ordonate după id. Modificările nu
+    reconstruiesc coloanele: with_changes adaugă rândurile noi la coadă
+    (în același spațiu de stocare, cu capacitate de rezervă) și marchează
+    versiunile vechi ca șterse. Marcajul ține generația la care rândul a
+    fost șters, așa că o instanță nu se modifică după construire: fiecare
+    vede doar rândurile vii la generația ei, iar get_listing_columns o
+    publică pe cea nouă prin înlocuirea unei singure referințe. Coloanele se
+    reordonează după id doar la compactare, când coada sau rândurile șterse
+    depășesc COMPACT_MIN_ROWS și COMPACT_FRACTION din rândurile ordonate.
+
+    Array-urile instanței complete includ și rândurile șterse; pozițiile
+    valide sunt cele întoarse de positions() și live_positions().
+    """
+
+    COMPACT_MIN_ROWS = 1024
+    COMPACT_FRACTION = 0.05
+
+    def __init__(self, rows):
+        self._set_rows(rows)
+
+    @staticmethod
+    def _fetch(queryset):
+        return list(queryset.values_list(*COLUMN_FIELDS))
+
+    @classmethod
+    def load(cls):
+        rows = cls._fetch(CarListing.objects.order_by('id'))
+        logger.info(f"Coloanele anunțurilor încărcate: {len(rows)} rânduri")
+        return cls(rows)
+
+    def _set_rows(self, rows):
+        rows = sorted(rows, key=lambda r: r[0])
+        n = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * len(COLUMN_FIELDS)
+        by_name = dict(zip(COLUMN_FIELDS, columns))
+
+        store = {
+            'ids': np.fromiter(by_name['id'], dtype=np.int64, count=n),
+            'user_ids': np.fromiter(by_name['user_id'], dtype=np.int64, count=n),
+            'created_ts': np.fromiter((c.timestamp() for c in by_name['created_at']), dtype=np.float64, count=n),
+            'dead_at': np.full(n, _ALIVE, dtype=np.int64),
+        }
+        for field in NUMERIC_FIELDS:
+            store[field] = np.fromiter((v or 0 for v in by_name[field]), dtype=np.float64, count=n)
+
+        self.vocab = {}
+        for field in CATEGORICAL_FIELDS:
+            values = np.array([v if v else '' for v in by_name[field]], dtype=object)
+            vocab, codes = np.unique(values, return_inverse=True) if n else (np.zeros(0, dtype=object), np.zeros(0, dtype=np.int64))
+            codes = codes.astype(np.int32)
+            if len(vocab) and vocab[0] == '':
+                codes -= 1
+                vocab = vocab[1:]
+            self.vocab[field] = list(vocab)
+            store[field] = codes
+        self._vocab_index = {field: {value: code for code, value in enumerate(vocab)} for field, vocab in self.vocab.items()}
+
+        self._publish(store, n, sorted_count=n, generation=0, dead=0)
+
+    def _publish(self, store, n, sorted_count, generation, dead):
+        """Leagă instanța de primele n rânduri din store și indexează coada."""
+        store['length'] = n
+        self._store = store
+        self._sorted = sorted_count
+        self._generation = generation
+        self._dead = dead
+        self.ids = store['ids'][:n]
+        self.user_ids = store['user_ids'][:n]
+        self.created_ts = store['created_ts'][:n]
+        self.numeric = {field: store[field][:n] for field in NUMERIC_FIELDS}
+        self.codes = {field: store[field][:n] for field in CATEGORICAL_FIELDS}
+        self._dead_at = store['dead_at'][:n]
+
+        tail = sorted_count + np.flatnonzero(self._dead_at[sorted_count:] > generation)
+        order = np.argsort(self.ids[tail], kind='stable')
+        self._tail_ids = self.ids[tail][order]
+        self._tail_positions = tail[order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def take(self, positions):
+        """Un subset al coloanelor (aceleași vocabulare) pentru pozițiile date."""
+        store = {
+            'ids': self.ids[positions],
+            'user_ids': self.user_ids[positions],
+            'created_ts': self.created_ts[positions],
+            'dead_at': np.full(len(self.ids[positions]), _ALIVE, dtype=np.int64),
+        }
+        for field in NUMERIC_FIELDS:
+            store[field] = self.numeric[field][positions]
+        for field in CATEGORICAL_FIELDS:
+            store[field] = self.codes[field][positions]
+
+        subset = object.__new__(ListingColumns)
+        subset.vocab = self.vocab
+        subset._vocab_index = self._vocab_index
+        subset._publish(store, len(store['ids']), sorted_count=0, generation=0, dead=0)
+        return subset
+
+    def live_positions(self):
+        """Pozițiile rândurilor vii, în ordinea din coloane."""
+        return np.flatnonzero(self._dead_at > self._generation)
+
+    def with_changes(self, changed_rows, removed_ids):
+        """
+        Instanță nouă cu rândurile date înlocuite sau adăugate și anunțurile
+        șterse eliminate. Costul este proporțional cu numărul modificărilor
+        (plus coada curentă), nu cu numărul anunțurilor.
+        """
+        changed = {row[0]: row for row in changed_rows}
+        n, k = len(self.ids), len(changed)
+        store = self._store
+        capacity = len(store['ids'])
+        if store['length'] != n or n + k > capacity:
+            # instanța nu mai este ultima construită peste store sau nu mai
+            # este loc la coadă: rândurile se copiază într-un spațiu nou
+            capacity = max(2 * (n + k), self.COMPACT_MIN_ROWS)
+            store = {name: self._grown(store[name], n, capacity) for name in store if name != 'length'}
+            dead_at = store['dead_at'][:n]
+            dead_at[dead_at > self._generation] = _ALIVE
+
+        generation = self._generation + 1
+        stale = self.positions(list(changed.keys() | set(removed_ids)))
+        stale = stale[stale >= 0]
+        store['dead_at'][stale] = generation
+
+        if k:
+            rows = list(changed.values())
+            columns = dict(zip(COLUMN_FIELDS, zip(*rows)))
+            end = n + k
+            store['ids'][n:end] = columns['id']
+            store['user_ids'][n:end] = columns['user_id']
+            store['created_ts'][n:end] = [c.timestamp() for c in columns['created_at']]
+            store['dead_at'][n:end] = _ALIVE
+            for field in NUMERIC_FIELDS:
+                store[field][n:end] = [v or 0 for v in columns[field]]
+            for field in CATEGORICAL_FIELDS:
+                store[field][n:end] = [self._append_code(field, v) for v in columns[field]]
+
+        updated = object.__new__(ListingColumns)
+        updated.vocab = self.vocab
+        updated._vocab_index = self._vocab_index
+        updated._publish(store, n + k, self._sorted, generation, self._dead + len(stale))
+
+        limit = max(self.COMPACT_MIN_ROWS, self._sorted * self.COMPACT_FRACTION)
+        if len(updated._tail_ids) > limit or updated._dead > limit:
+            return updated.compacted()
+        return updated
+
+    @staticmethod
+    def _grown(array, n, capacity):
+        grown = np.empty(capacity, dtype=array.dtype)
+        grown[:n] = array[:n]
+        return grown
+
+    def _append_code(self, field, value):
+        """Codul valorii; valorile noi se adaugă la sfârșitul vocabularului."""
+        if not value:
+            return -1
+        index = self._vocab_index[field]
+        code = index.get(value)
+        if code is None:
+            code = len(self.vocab[field])
+            self.vocab[field].append(value)
+            index[value] = code
+        return code
+
+    def compacted(self):
+        """Instanță nouă doar cu rândurile vii, ordonate după id."""
+        live = self.live_positions()
+        live = live[np.argsort(self.ids[live], kind='stable')]
+        compact = self.take(live)
+        compact._publish(compact._store, len(live), sorted_count=len(live), generation=0, dead=0)
+        logger.info(f"Coloanele anunțurilor compactate: {len(live)} rânduri")
+        return compact
+
+    def membership(self, field, keys):
+        """Array boolean: valoarea câmpului se află în keys (False pentru valori lipsă)."""
+        keys = set(keys)
+        in_vocab = np.array([value in keys for value in self.vocab[field]] + [False], dtype=bool)
+        # codul -1 indexează ultimul element (False)
+        return in_vocab[self.codes[field]]
+
+    def equals(self, field, value):
+        code = self.code(field, value)
+        if code < 0:
+            return np.zeros(len(self), dtype=bool)
+        return self.codes[field] == code
+
+    def code(self, field, value):
+        """Codul valorii în vocabularul câmpului sau -1 dacă nu apare."""
+        return self._vocab_index[field].get(value, -1)
+
+    def positions(self, listing_ids):
+        """Pozițiile rândurilor vii pentru listing_ids; -1 pentru cele inexistente."""
+        listing_ids = np.asarray(listing_ids, dtype=np.int64)
+        result = np.full(len(listing_ids), -1, dtype=np.int64)
+        if self._sorted:
+            prefix = self.ids[:self._sorted]
+            pos = np.minimum(np.searchsorted(prefix, listing_ids), self._sorted - 1)
+            hit = (prefix[pos] == listing_ids) & (self._dead_at[pos] > self._generation)
+            result = np.where(hit, pos, result)
+        if len(self._tail_ids):
+            pos = np.minimum(np.searchsorted(self._tail_ids, listing_ids), len(self._tail_ids) - 1)
+            result = np.where(self._tail_ids[pos] == listing_ids, self._tail_positions[pos], result)
+        return result
+
+
+def _range_match(values, avg, below_divisor, above_divisor, below_cap, above_cap):
+    """1 - min(|diferență| / divizor, plafon), separat sub și peste medie."""
+    diff = values - avg
+    above = 1.0 - np.minimum(diff / above_divisor, above_cap)
+    below = 1.0 - np.minimum(-diff / below_divisor, below_cap)
+    return np.where(diff > 0, above, below)
+
+
+def match_scores(columns, preferences, now=None):
+    """
+    Calculează pe toate anunțurile termenii de potrivire cu preferințele
+    utilizatorului (preț, an, kilometraj, putere, caroserie) și factorul
+    de prospețime, ca expresii pe array-uri.
+    """
+    now = now or timezone.now()
+    n = len(columns)
+    price = columns.numeric['price']
+    year = columns.numeric['year_of_manufacture']
+    mileage = columns.numeric['mileage']
+    power = columns.numeric['power']
+
+    price_match = np.ones(n)
+    price_range = preferences['price_range']
+    if price_range['avg'] > 0:
+        price_min = price_range['min'] * 0.9 if price_range['min'] else 0
+        price_max = price_range['max'] * 1.1 if price_range['max'] else np.inf
+        with np.errstate(divide='ignore', invalid='ignore'):
+            below = np.maximum(0.5, 1.0 - (price_min - price) / price_min)
+            above = np.maximum(0.3, 1.0 - (price - price_max) / price_max)
+        price_match = np.where(price < price_min, below, np.where(price > price_max, above, 1.0))
+        price_match = np.where(price > 0, price_match, 1.0)
+
+    year_match = np.ones(n)
+    year_avg = preferences['year_range']['avg']
+    if year_avg > 0:
+        year_match = np.where(year > 0, 1.0 - np.minimum(np.abs(year - year_avg) / 5, 1.0), 1.0)
+
+    mileage_match = np.ones(n)
+    mileage_avg = preferences['mileage_range']['avg']
+    if mileage_avg > 0:
+        mileage_match = np.where(
+            mileage > 0,
+            _range_match(mileage, mileage_avg, mileage_avg * 2, mileage_avg + 10000, 0.3, 1.0),
+            1.0
+        )
+
+    power_match = np.ones(n)
+    power_avg = preferences['power_range']['avg']
+    if power_avg > 0:
+        power_match = np.where(
+            power > 0,
+            1.0 - np.minimum(np.abs(power - power_avg) / (power_avg + 20), 1.0),
+            1.0
+        )
+
+    has_body_type = columns.codes['body_type'] >= 0
+    body_type_match = np.where(
+        has_body_type,
+        np.where(columns.membership('body_type', preferences['body_types']), 1.0, 0.6),
+        1.0
+    )
+
+    days_since_listing = np.floor((now.timestamp() - columns.created_ts) / 86400)
+    freshness_factor = 1.0 + np.maximum(0, (30 - days_since_listing) / 30) * 0.2
+
+    return {
+        'price_match': price_match,
+        'year_match': year_match,
+        'mileage_match': mileage_match,
+        'power_match': power_match,
+        'body_type_match': body_type_match,
+        'freshness_factor': freshness_factor,
+    }
+
+
+def content_scores(columns, preferences, tfidf_similarity, dominant_brand=None,
+                   dominant_fuel=None, dominant_fuel_preference=False,
+                   dominant_price_preference=False, dominant_brand_preference=False, now=None):
+    """Scorul final content-based pentru toate anunțurile, ca un singur array."""
+    matches = match_scores(columns, preferences, now=now)
+
+    brand_match = np.where(columns.membership('brand', preferences['brands']), 1.0, 0.5)
+    transmission_match = np.where(columns.membership('transmission', preferences['transmission_types']), 1.0, 0.7)
+
+    model_match = np.full(len(columns), 0.7)
+    if dominant_brand:
+        preferred_models = [key for key, value in preferences['models'].items() if value > 0 and key.startswith(dominant_brand)]
+        if preferred_models:
+            matching_models = [m for m in columns.vocab['model'] if any(m in model for model in preferred_models)]
+            model_match = np.where(
+                columns.equals('brand', dominant_brand) & columns.membership('model', matching_models),
+                1.0, 0.7
+            )
+
+    if dominant_fuel_preference:
+        fuel_match = np.where(columns.equals('fuel_type', dominant_fuel), 1.0, 0.5)
+    else:
+        fuel_match = np.where(columns.membership('fuel_type', preferences['fuel_types']), 1.0, 0.7)
+
+    tfidf_weight = 0.25
+    brand_weight = 0.15
+    price_weight = 0.15
+    model_weight = 0.05
+    fuel_weight = 0.20
+
+    if dominant_fuel_preference:
+        fuel_weight = 0.25
+        tfidf_weight = 0.25
+        brand_weight = 0.15
+        price_weight = 0.15
+        model_weight = 0.10
+    elif dominant_price_preference:
+        price_weight = 0.25
+        brand_weight = 0.1
+        tfidf_weight = 0.25
+        fuel_weight = 0.15
+    elif dominant_brand_preference:
+        price_weight = 0.1
+        brand_weight = 0.2
+        model_weight = 0.1
+        tfidf_weight = 0.25
+        fuel_weight = 0.15
+
+    base_score = (
+        tfidf_similarity * tfidf_weight +
+        brand_match * brand_weight +
+        model_match * model_weight +
+        fuel_match * fuel_weight +
+        transmission_match * 0.05 +
+        matches['price_match'] * price_weight +
+        matches['year_match'] * 0.05 +
+        matches['mileage_match'] * 0.05 +
+        matches['power_match'] * 0.05 +
+        matches['body_type_match'] * 0.05
+    )
+
+    return base_score * matches['freshness_factor']
+
+
+def top_n(scores, n, mask=None):
+    """
+    Pozițiile celor mai mari n scoruri, descrescător. Folosește argpartition,
+    deci doar cele n elemente selectate sunt sortate.
+    """
+    positions = np.flatnonzero(mask) if mask is not None else np.arange(len(scores))
+    if positions.size == 0 or n <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    candidate_scores = scores[positions]
+    if positions.size > n:
+        top = np.argpartition(-candidate_scores, n - 1)[:n]
+    else:
+        top = np.arange(positions.size)
+    top = top[np.argsort(-candidate_scores[top], kind='stable')]
+    return positions[top]
+
+
+_columns = None
+_columns_lock = threading.Lock()
+_seen_version = _NOT_SYNCED
+_caught_up_at = None
+_pending_removed = set()
+
+
+def get_listing_columns():
+    """
+    Coloanele anunțurilor din procesul curent. Modificările (anunțuri
+    salvate după ultima sincronizare, semnalate prin listings_version, și
+    ștergerile din remove_listing_columns) se aplică împreună, într-o
+    singură reconstruire, la prima citire de după ele. Cititorii primesc o
+    instanță neschimbată pe toată durata folosirii ei.
+    """
+    global _columns, _seen_version, _caught_up_at
+    with _columns_lock:
+        if _columns is None:
+            _caught_up_at = timezone.now()
+            _columns = ListingColumns.load()
+
+        version = listings_version()
+        if version != _seen_version or _pending_removed:
+            since, _caught_up_at = _caught_up_at, timezone.now()
+            changed = ListingColumns._fetch(CarListing.objects.filter(updated_at__gt=since))
+            removed = set(_pending_removed)
+            _pending_removed.clear()
+            if changed or (_columns.positions(list(removed)) >= 0).any():
+                _columns = _columns.with_changes(changed, removed)
+            _seen_version = version
+
+        return _columns
+
+
+def get_loaded_listing_columns():
+    return _columns
+
+
+def reset_loaded_listing_columns():
+    """
+    Renunță la coloanele procesului; următoarea citire le reconstruiește
+    complet. Necesar după inserări cu updated_at în trecut, pe care
+    sincronizarea incrementală nu le vede.
+    """
+    global _columns, _seen_version, _caught_up_at
+    with _columns_lock:
+        _columns = None
+        _seen_version = _NOT_SYNCED
+        _caught_up_at = None
+        _pending_removed.clear()
+
+
+def remove_listing_columns(listing_id):
+    """Marchează anunțul ca șters; este eliminat la următoarea citire a coloanelor."""
+    with _columns_lock:
+        if _columns is not None:
+            _pending_removed.add(listing_id)
@@ -0,0 +1,111 @@
+import time
+import logging
+from contextlib import contextmanager
+from django.db import connection
+from listings.models import CarListing, Favorite
+from .models import UserInteraction
+from .preferences import user_preferences
+
+logger = logging.getLogger(__name__)
+
+
+class RecommendationContext:
+    """
+    Datele unei cereri de recomandări (favorite, interacțiuni, preferințe,
+    candidați), încărcate o singură dată și partajate de toți algoritmii.
+    Rezultatele intermediare sunt memorate după cheie, iar pentru fiecare
+    etapă se contorizează timpul și numărul de interogări. Valorile unei
+    etape includ sub-etapele apelate din ea.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.stats = {}
+        self._memo = {}
+
+    @contextmanager
+    def stage(self, name):
+        entry = self.stats.setdefault(name, {'ms': 0.0, 'queries': 0})
+
+        def count_query(execute, sql, params, many, context):
+            entry['queries'] += 1
+            return execute(sql, params, many, context)
+
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                yield
+        finally:
+            entry['ms'] += (time.perf_counter() - start) * 1000
+
+    def memoize(self, key, compute, stage=None):
+        """Calculează valoarea o singură dată per cerere."""
+        if key not in self._memo:
+            with self.stage(stage or str(key)):
+                self._memo[key] = compute()
+        return self._memo[key]
+
+    @property
+    def favorite_ids(self):
+        return self.memoize('favorite_ids', lambda: list(
+            Favorite.objects.filter(user=self.user).values_list('car_listing_id', flat=True)
+        ), stage='favorites')
+
+    @property
+    def interaction_ids(self):
+        return self.memoize('interaction_ids', lambda: list(
+            UserInteraction.objects.filter(user=self.user).values_list('car_listing_id', flat=True).distinct()
+        ), stage='interactions')
+
+    @property
+    def learning_ids(self):
+        """Anunțurile din care se învață preferințele: favorite și interacțiuni."""
+        return list(set(self.favorite_ids) | set(self.interaction_ids))
+
+    @property
+    def user_items(self):
+        return self.memoize('user_items', lambda: list(
+            CarListing.objects.filter(id__in=self.learning_ids)
+        ), stage='user_items')
+
+    @property
+    def favorite_items(self):
+        favorite_ids = set(self.favorite_ids)
+        return [item for item in self.user_items if item.id in favorite_ids]
+
+    @property
+    def preferences(self):
+        return self.memoize('preferences', lambda: user_preferences(self.user.id))
+
+    @property
+    def user_scores(self):
+        return self.memoize('user_scores', self._user_scores)
+
+    def _user_scores(self):
+        from .interaction_matrix import get_interaction_matrix, pair_scores
+
+        matrix = get_interaction_matrix()
+        if matrix is not None:
+            return matrix.user_scores(self.user.id)
+        # Fără matrice pe disc: aceleași scoruri, calculate din tabele
+        scores = pair_scores((self.user.id, listing_id) for listing_id in self.learning_ids)
+        return {listing_id: score for (_, listing_id), score in scores.items() if score > 0}
+
+    @property
+    def candidate_ids(self):
+        from .candidates import generate_candidates
+
+        return self.memoize('candidates', lambda: generate_candidates(
+            self.user,
+            self.preferences,
+            exclude_ids=self.favorite_ids,
+            user_scores=self.user_scores
+        )[0])
+
+    def report(self):
+        """Scrie în log timpul și numărul de interogări pentru fiecare etapă."""
+        stages = ", ".join(
+            f"{name}={entry['ms']:.1f}ms/{entry['queries']}q" for name, entry in self.stats.items()
+        )
+        logger.info(f"Etapele recomandărilor pentru utilizatorul {self.user.id}: {stages}")
+        return self.stats
@@ -0,0 +1,249 @@
+import time
+import datetime
+import threading
+import logging
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from listings.models import CarListing
+from listings.caching import cache_is_shared
+from .artifacts import save_arrays, load_arrays, artifact_mtime
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_NAME = 'listing_features'
+VERSION_CACHE_KEY = 'recommendations:listing_features_version'
+
+_NOT_SYNCED = object()
+
+FEATURE_FIELDS = [
+    'id', 'brand', 'model', 'fuel_type', 'transmission', 'body_type',
+    'condition_state', 'price', 'year_of_manufacture', 'mileage', 'updated_at',
+]
+
+
+def listing_feature_text(listing):
+    """Textul din care se calculează vectorul TF-IDF al unui anunț."""
+    price_category = 'premium' if listing.price and listing.price > 30000 else 'budget' if listing.price and listing.price < 10000 else 'mid-range'
+    year_category = 'new' if listing.year_of_manufacture and listing.year_of_manufacture >= 2020 else 'recent' if listing.year_of_manufacture and listing.year_of_manufacture >= 2015 else 'older'
+    mileage_category = 'low-mileage' if listing.mileage and listing.mileage < 50000 else 'high-mileage' if listing.mileage and listing.mileage > 150000 else 'average-mileage'
+
+    return f"{listing.brand} {listing.brand} {listing.model} {listing.model} {listing.model} {listing.fuel_type} {listing.transmission} {getattr(listing, 'body_type', '')} {listing.condition_state} {price_category} {year_category} {mileage_category}"
+
+
+class ListingFeatureIndex:
+    """
+    Vectorii TF-IDF ai tuturor anunțurilor, calculați o singură dată.
+    Vocabularul și idf-ul sunt fixate la construire; anunțurile noi sau
+    modificate sunt proiectate pe același vocabular și ținute separat până
+    la următoarea reconstruire.
+    """
+
+    def __init__(self, listing_ids, matrix, terms, idf, built_at=None):
+        self.listing_ids = listing_ids
+        self.matrix = matrix
+        self.terms = terms
+        self.idf = idf
+        self.built_at = built_at or timezone.now()
+        self.loaded_mtime = None
+        self.seen_version = _NOT_SYNCED
+        self.caught_up_at = self.built_at
+
+        self._vectorizer = None
+        self._overlay = {}
+        self._removed = set()
+        self._lock = threading.RLock()
+
+    @classmethod
+    def build(cls):
+        from scipy.sparse import csr_matrix
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        built_at = timezone.now()
+        listing_ids, texts = [], []
+        for listing in CarListing.objects.only(*FEATURE_FIELDS).order_by('id').iterator(chunk_size=2000):
+            listing_ids.append(listing.id)
+            texts.append(listing_feature_text(listing))
+
+        vectorizer = TfidfVectorizer(stop_words='english')
+        if texts:
+            matrix = vectorizer.fit_transform(texts).astype(np.float32).tocsr()
+            terms = vectorizer.get_feature_names_out().astype(str)
+            idf = vectorizer.idf_.astype(np.float64)
+        else:
+            matrix = csr_matrix((0, 0), dtype=np.float32)
+            terms = np.zeros(0, dtype=str)
+            idf = np.zeros(0, dtype=np.float64)
+
+        logger.info(f"Index de caracteristici construit: {matrix.shape[0]} anunțuri, {matrix.shape[1]} termeni")
+        return cls(np.asarray(listing_ids, dtype=np.int64), matrix, terms, idf, built_at=built_at)
+
+    def save(self):
+        save_arrays(
+            ARTIFACT_NAME,
+            listing_ids=self.listing_ids,
+            data=self.matrix.data,
+            indices=self.matrix.indices,
+            indptr=self.matrix.indptr,
+            shape=np.array(self.matrix.shape, dtype=np.int64),
+            terms=np.asarray(self.terms, dtype=str),
+            idf=self.idf,
+            built_at=np.array([self.built_at.timestamp()], dtype=np.float64),
+        )
+        self.loaded_mtime = artifact_mtime(ARTIFACT_NAME)
+
+    @classmethod
+    def load(cls):
+        from scipy.sparse import csr_matrix
+
+        mtime = artifact_mtime(ARTIFACT_NAME)
+        arrays = load_arrays(ARTIFACT_NAME, mmap=True)
+        if arrays is None:
+            return None
+
+        shape = tuple(int(x) for x in arrays['shape'])
+        matrix = csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=shape, copy=False)
+        built_at = datetime.datetime.fromtimestamp(float(arrays['built_at'][0]), tz=datetime.timezone.utc)
+
+        instance = cls(arrays['listing_ids'], matrix, arrays['terms'], arrays['idf'], built_at=built_at)
+        instance.loaded_mtime = mtime
+        return instance
+
+    @property
+    def vectorizer(self):
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            vectorizer = TfidfVectorizer(
+                stop_words='english',
+                vocabulary={term: i for i, term in enumerate(self.terms.tolist())}
+            )
+            vectorizer.idf_ = np.asarray(self.idf)
+            self._vectorizer = vectorizer
+        return self._vectorizer
+
+    def transform(self, listings):
+        """Proiectează anunțurile pe vocabularul fixat (vectori normalizați L2)."""
+        if len(self.terms) == 0:
+            from scipy.sparse import csr_matrix
+
+            return csr_matrix((len(listings), 0), dtype=np.float32)
+        return self.vectorizer.transform([listing_feature_text(l) for l in listings]).astype(np.float32)
+
+    def profile(self, listings):
+        """Vectorul de profil al utilizatorului: media vectorilor anunțurilor sale."""
+        from scipy.sparse import csr_matrix
+
+        vectors = self.transform(list(listings))
+        if vectors.shape[0] == 0:
+            return None
+        return csr_matrix(vectors.mean(axis=0))
+
+    def set_listing(self, listing):
+        with self._lock:
+            self._overlay[listing.id] = self.transform([listing])
+            self._removed.discard(listing.id)
+
+    def remove_listing(self, listing_id):
+        with self._lock:
+            self._overlay.pop(listing_id, None)
+            self._removed.add(listing_id)
+
+    def catch_up(self):
+        """Proiectează anunțurile create sau modificate după ultima sincronizare."""
+        with self._lock:
+            since = self.caught_up_at
+            self.caught_up_at = timezone.now()
+            changed = CarListing.objects.filter(updated_at__gt=since).only(*FEATURE_FIELDS)
+            count = 0
+            for listing in changed:
+                self.set_listing(listing)
+                count += 1
+            return count
+
+    def similarities_for(self, listing_ids, profile_vector):
+        """Similaritatea profilului doar cu anunțurile date, în ordinea lor."""
+        with self._lock:
+            listing_ids = np.asarray(listing_ids, dtype=np.int64)
+            profile = profile_vector.T.toarray()
+            scores = np.zeros(len(listing_ids), dtype=np.float64)
+            if len(listing_ids) == 0:
+                return scores
+
+            if len(self.listing_ids):
+                pos = np.minimum(np.searchsorted(self.listing_ids, listing_ids), len(self.listing_ids) - 1)
+                found = np.asarray(self.listing_ids)[pos] == listing_ids
+                if found.any():
+                    scores[found] = np.asarray(self.matrix[pos[found]] @ profile).ravel()
+
+            for i, listing_id in enumerate(listing_ids.tolist()):
+                if listing_id in self._overlay:
+                    scores[i] = float((self._overlay[listing_id] @ profile).ravel()[0])
+                elif listing_id in self._removed:
+                    scores[i] = 0.0
+
+            return scores
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_listing_feature_index():
+    """
+    Indexul de caracteristici al procesului curent. Se încarcă mapat în
+    memorie la prima utilizare (sau se construiește dacă lipsește) și se
+    sincronizează când alt proces semnalează anunțuri modificate.
+    """
+    global _index
+    with _index_lock:
+        mtime = artifact_mtime(ARTIFACT_NAME)
+        if _index is None or (mtime is not None and mtime != _index.loaded_mtime):
+            index = ListingFeatureIndex.load()
+            if index is None:
+                index = ListingFeatureIndex.build()
+                index.save()
+            _index = index
+
+        version = listings_version()
+        if version != _index.seen_version:
+            _index.catch_up()
+            _index.seen_version = version
+
+        return _index
+
+
+def get_loaded_listing_feature_index():
+    return _index
+
+
+def reset_loaded_listing_feature_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+def listings_version():
+    """
+    Versiunea anunțurilor după care procesele își sincronizează indexul și
+    coloanele. Cu un cache comun este contorul incrementat de
+    mark_listings_changed; cu unul local contorul vede doar modificările
+    procesului curent, deci versiunea include și intervalul de timp curent
+    (RECOMMENDATION_LISTING_SYNC_INTERVAL), iar modificările celorlalte
+    procese sunt preluate cel târziu la trecerea lui.
+    """
+    version = cache.get(VERSION_CACHE_KEY)
+    if cache_is_shared():
+        return version
+    interval = getattr(settings, 'RECOMMENDATION_LISTING_SYNC_INTERVAL', 60)
+    return version, int(time.monotonic() // interval)
+
+
+def mark_listings_changed():
+    """Anunță celelalte procese că trebuie să resincronizeze indexul."""
+    cache.add(VERSION_CACHE_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, timeout=None)
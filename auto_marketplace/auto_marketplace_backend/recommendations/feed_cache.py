@@ -0,0 +1,94 @@
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from listings.models import CarListing
+from listings.queries import listing_queryset
+from listings.caching import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FEED_TIMEOUT = 15 * 60
+
+STATS_KEYS = ['hits', 'misses', 'recomputes', 'invalidations']
+
+
+def _version_key(user_id):
+    return f"recommendations:feed_version:{user_id}"
+
+
+def _feed_key(user_id, algorithm, version):
+    return f"recommendations:feed:{user_id}:{algorithm}:{version}"
+
+
+def _stats_key(name):
+    return f"recommendations:feed_stats:{name}"
+
+
+def _incr(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def _user_version(user_id):
+    return cache.get(_version_key(user_id), 0)
+
+
+def feed_cache_enabled():
+    """
+    Feed-urile se păstrează doar într-un cache comun proceselor: cu un cache
+    local, invalidarea scrisă de worker-ul care a primit interacțiunea nu
+    ajunge la ceilalți, care ar servi feed-ul vechi până la expirare.
+    """
+    return cache_is_shared()
+
+
+def get_cached_feed(user_id, algorithm):
+    """Lista ordonată de id-uri din cache sau None dacă lipsește / e invalidată."""
+    if not feed_cache_enabled():
+        return None
+    ids = cache.get(_feed_key(user_id, algorithm, _user_version(user_id)))
+    _incr(_stats_key('hits' if ids is not None else 'misses'))
+    return ids
+
+
+def set_cached_feed(user_id, algorithm, listing_ids):
+    if not feed_cache_enabled():
+        return
+    timeout = getattr(settings, 'RECOMMENDATION_FEED_CACHE_TIMEOUT', DEFAULT_FEED_TIMEOUT)
+    cache.set(_feed_key(user_id, algorithm, _user_version(user_id)), list(listing_ids), timeout=timeout)
+    _incr(_stats_key('recomputes'))
+
+
+def invalidate_user_feeds(user_id):
+    """
+    Marchează toate feed-urile utilizatorului ca expirate, pentru toți
+    algoritmii, prin incrementarea versiunii lui.
+    """
+    _incr(_version_key(user_id))
+    _incr(_stats_key('invalidations'))
+
+
+def hydrate_feed(user, algorithm, listing_ids, fields=None):
+    """
+    Încarcă anunțurile în ordinea din cache, pregătite pentru serializare.
+    Dacă unele au fost între timp șterse, feed-ul este invalidat și se
+    returnează None pentru recalculare.
+    """
+    listings = listing_queryset(user, CarListing.objects.filter(id__in=listing_ids), fields)
+    by_id = {listing.id: listing for listing in listings}
+    if len(by_id) < len(listing_ids):
+        logger.info(f"Feed-ul {algorithm} al utilizatorului {user.id} conține anunțuri șterse. Se recalculează.")
+        invalidate_user_feeds(user.id)
+        return None
+    return [by_id[listing_id] for listing_id in listing_ids]
+
+
+def feed_cache_stats():
+    stats = {name: cache.get(_stats_key(name), 0) for name in STATS_KEYS}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+    stats['enabled'] = feed_cache_enabled()
+    return stats
@@ -0,0 +1,417 @@
+import time
+import atexit
+import datetime
+import threading
+import logging
+from collections import Counter, deque
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction, close_old_connections
+from django.db.models import F, Q, Value, Case, When, DateTimeField
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from users.models import User
+from listings.models import CarListing
+from .models import UserInteraction
+from .scoring import base_score, days_old, decay_bucket, time_decay
+
+logger = logging.getLogger(__name__)
+
+# Tipurile de eveniment primite de record_interaction -> tipul salvat
+EVENT_TYPES = {
+    'view': 'vizualizare',
+    'favorite': 'favorit',
+    'click': 'vizualizare',
+    'contact': 'contact',
+}
+
+INTERACTION_TYPES = set(EVENT_TYPES.values())
+
+MAX_BATCH_EVENTS = 500
+
+DEFAULT_FLUSH_INTERVAL = 2.0
+DEFAULT_FLUSH_SIZE = 500
+DEFAULT_MAX_BUFFER = 20000
+
+UPDATE_CHUNK = 500
+
+STATS_KEYS = ['accepted', 'flushes', 'flushed_events', 'flushed_rows',
+              'dropped_overflow', 'dropped_invalid', 'dropped_errors']
+
+
+def buffered_ingestion_enabled():
+    return getattr(settings, 'RECOMMENDATION_BUFFERED_INGESTION', False)
+
+
+def _stats_key(name):
+    return f"recommendations:ingestion_stats:{name}"
+
+
+def _add_stats(deltas):
+    for name, value in deltas.items():
+        if not value:
+            continue
+        key = _stats_key(name)
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, value)
+        except ValueError:
+            cache.set(key, value, timeout=None)
+
+
+def _pairs_filter(pairs):
+    condition = Q()
+    for user_id, listing_id in pairs:
+        condition |= Q(user_id=user_id, car_listing_id=listing_id)
+    return condition
+
+
+def existing_listing_ids(listing_ids):
+    return set(CarListing.objects.filter(id__in=set(listing_ids)).values_list('id', flat=True))
+
+
+def _parse_event(raw, user_id, now):
+    """Tuplul (user_id, listing_id, tip, moment) al unui eveniment sau mesajul de eroare."""
+    if not isinstance(raw, dict):
+        return None, "Eveniment nevalid."
+
+    interaction_type = raw.get('type')
+    interaction_type = EVENT_TYPES.get(interaction_type, interaction_type)
+    if interaction_type not in INTERACTION_TYPES:
+        return None, f"Tip de interacțiune nevalid: {raw.get('type')}"
+
+    try:
+        listing_id = int(raw.get('listing_id'))
+        user_id = int(user_id if user_id is not None else raw.get('user_id'))
+    except (TypeError, ValueError):
+        return None, "ID-ul anunțului sau al utilizatorului nu este valid."
+
+    timestamp = now
+    if raw.get('timestamp'):
+        timestamp = parse_datetime(str(raw['timestamp']))
+        if timestamp is None:
+            return None, f"Moment nevalid: {raw['timestamp']}"
+        if timezone.is_naive(timestamp):
+            timestamp = timezone.make_aware(timestamp, datetime.timezone.utc)
+        timestamp = min(timestamp, now)
+
+    return (user_id, listing_id, interaction_type, timestamp), None
+
+
+def validate_events(raw_events, user_id=None, now=None):
+    """
+    Validează o listă de evenimente ({listing_id, type[, user_id, timestamp]}):
+    anunțurile (și utilizatorii, dacă user_id nu este dat) sunt verificați cu
+    câte o singură interogare. Returnează (evenimente valide, rezultat per
+    eveniment), cu rezultatele în ordinea primită.
+    """
+    now = now or timezone.now()
+    results = [None] * len(raw_events)
+    parsed = []
+    for i, raw in enumerate(raw_events):
+        event, error = _parse_event(raw, user_id, now)
+        if error:
+            results[i] = {'status': 'error', 'error': error}
+        else:
+            parsed.append((i, event))
+
+    listings = existing_listing_ids(event[1] for _, event in parsed)
+    users = None
+    if user_id is None:
+        users = set(User.objects.filter(id__in={event[0] for _, event in parsed}).values_list('id', flat=True))
+
+    events = []
+    for i, event in parsed:
+        if event[1] not in listings:
+            results[i] = {'status': 'error', 'error': "Anunțul specificat nu există."}
+        elif users is not None and event[0] not in users:
+            results[i] = {'status': 'error', 'error': "Utilizatorul specificat nu există."}
+        else:
+            results[i] = {'status': 'ok'}
+            events.append(event)
+    return events, results
+
+
+def _moment_expressions(timestamp, newer):
+    """
+    last_interaction și first_interaction după un eveniment de la momentul
+    dat: un eveniment mai vechi (reluat din JSONL sau cu timestamp de la
+    client) nu mută last_interaction înapoi, dar poate muta first_interaction.
+    Rândurile create în lotul curent (interaction_count = 0) au momentele
+    puse la crearea rândului (auto_now), deci primesc direct momentul
+    evenimentului.
+    """
+    moment = Value(timestamp, output_field=DateTimeField())
+    created = Q(interaction_count=0)
+    fields = {'first_interaction': Case(When(created, then=moment), default=Least(F('first_interaction'), moment))}
+    if newer:
+        fields['last_interaction'] = Case(When(created, then=moment), default=Greatest(F('last_interaction'), moment))
+    return fields
+
+
+def apply_events(events):
+    """
+    Aplică un lot de evenimente validate (user_id, listing_id, tip, moment)
+    într-o singură tranzacție: le agregă pe (utilizator, anunț, tip), creează
+    rândurile lipsă cu un singur bulk_create și aplică numărul de evenimente
+    cu UPDATE-uri atomice (interaction_count = interaction_count + n), câte
+    unul pentru fiecare grup (tip, n, moment, treaptă de decădere).
+    Decăderea se calculează din last_interaction rezultat (maximul dintre
+    cel stocat și cel al evenimentelor), nu din momentul evenimentelor.
+    Returnează numărul de rânduri actualizate.
+    """
+    from .signals import interactions_applied
+
+    counts = Counter()
+    last_seen = {}
+    for user_id, listing_id, interaction_type, timestamp in events:
+        key = (user_id, listing_id, interaction_type)
+        counts[key] += 1
+        last_seen[key] = max(last_seen.get(key, timestamp), timestamp)
+    if not counts:
+        return 0
+
+    with transaction.atomic():
+        # Rândurile existente rămân blocate până la UPDATE, deci last_interaction citit aici este cel actualizat
+        stored = {
+            (user_id, listing_id, interaction_type): last_interaction
+            for user_id, listing_id, interaction_type, last_interaction in UserInteraction.objects.select_for_update().filter(
+                user_id__in={key[0] for key in counts}, car_listing_id__in={key[1] for key in counts}
+            ).values_list('user_id', 'car_listing_id', 'interaction_type', 'last_interaction')
+        }
+        created = [key for key in counts if key not in stored]
+
+        keys = list(counts)
+        # Un eveniment mai vechi decât rândul stocat păstrează momentul (și decăderea) rândului
+        newer = [key not in stored or last_seen[key] >= stored[key] for key in keys]
+        moments = [last_seen[key] if is_newer else stored[key] for key, is_newer in zip(keys, newer)]
+        buckets = decay_bucket(days_old(moments, timezone.now())).tolist()
+
+        groups = {}
+        for key, is_newer, bucket in zip(keys, newer, buckets):
+            user_id, listing_id, interaction_type = key
+            # Un favorit are mereu interaction_count = 1, indiferent de câte ori este trimis
+            delta = 1 if interaction_type == 'favorit' else counts[key]
+            groups.setdefault((interaction_type, delta, last_seen[key], is_newer, bucket), []).append((user_id, listing_id))
+
+        UserInteraction.objects.bulk_create([
+            UserInteraction(
+                user_id=user_id, car_listing_id=listing_id, interaction_type=interaction_type,
+                interaction_count=0, interaction_score=0
+            )
+            for user_id, listing_id, interaction_type in created
+        ], ignore_conflicts=True, batch_size=UPDATE_CHUNK)
+
+        for (interaction_type, delta, moment, newer, bucket), pairs in groups.items():
+            decay = float(time_decay(bucket))
+            # Momentele și scorul înaintea interaction_count: MySQL evaluează atribuirile în ordine
+            fields = _moment_expressions(moment, newer)
+            if interaction_type == 'favorit':
+                fields.update(interaction_score=base_score('favorit', 1) * decay, interaction_count=1)
+            else:
+                fields.update(
+                    interaction_score=(F('interaction_count') + delta) * base_score(interaction_type, 1) * decay,
+                    interaction_count=F('interaction_count') + delta,
+                )
+            fields['decay_days'] = bucket
+            for start in range(0, len(pairs), UPDATE_CHUNK):
+                UserInteraction.objects.filter(
+                    _pairs_filter(pairs[start:start + UPDATE_CHUNK]), interaction_type=interaction_type
+                ).update(**fields)
+
+        interactions_applied(keys, created)
+
+    return len(counts)
+
+
+class InteractionBuffer:
+    """
+    Buffer în memoria procesului pentru interacțiunile primite de
+    record_interaction. Evenimentele sunt confirmate imediat și scrise în
+    loturi de un fir de execuție separat, la fiecare flush_interval secunde
+    sau când bufferul ajunge la flush_size. Peste max_size evenimentele
+    noi sunt respinse și numărate ca pierdute.
+    """
+
+    def __init__(self, flush_interval=DEFAULT_FLUSH_INTERVAL, flush_size=DEFAULT_FLUSH_SIZE,
+                 max_size=DEFAULT_MAX_BUFFER):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_size = max_size
+
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._oldest_at = None
+
+        self.stats = Counter()
+        self.last_flush_ms = None
+        self.last_flush_at = None
+        self.last_flush_delay_ms = None
+
+    def __len__(self):
+        return len(self._events)
+
+    def append(self, user_id, listing_id, interaction_type):
+        with self._lock:
+            if len(self._events) >= self.max_size:
+                self.stats['dropped_overflow'] += 1
+                return False
+            if not self._events:
+                self._oldest_at = time.time()
+            self._events.append((user_id, listing_id, interaction_type))
+            self.stats['accepted'] += 1
+            depth = len(self._events)
+
+        self._ensure_flusher()
+        if depth >= self.flush_size:
+            self._wakeup.set()
+        return True
+
+    def _drain(self):
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            oldest_at, self._oldest_at = self._oldest_at, None
+            deltas = dict(self.stats)
+            self.stats.clear()
+        return events, oldest_at, deltas
+
+    def _write(self, events, deltas):
+        """Scrie evenimentele scoase din buffer și adaugă rezultatul în deltas."""
+        try:
+            # Toate evenimentele din lot primesc momentul scrierii, ca UPDATE-urile să fie grupate
+            now = timezone.now()
+            listings = existing_listing_ids(event[1] for event in events)
+            valid = [event + (now,) for event in events if event[1] in listings]
+            rows = apply_events(valid)
+            deltas.update(
+                flushes=1, flushed_events=len(valid), flushed_rows=rows,
+                dropped_invalid=len(events) - len(valid)
+            )
+        except Exception as e:
+            logger.exception(f"Eroare la scrierea interacțiunilor din buffer: {str(e)}")
+            deltas['dropped_errors'] = len(events)
+
+    def _save_stats(self, deltas):
+        try:
+            _add_stats(deltas)
+        except Exception as e:
+            logger.warning(f"Statisticile de ingestie nu au putut fi salvate: {str(e)}")
+
+    def flush(self):
+        """Scrie evenimentele din buffer. Returnează numărul de evenimente procesate."""
+        with self._flush_lock:
+            events, oldest_at, deltas = self._drain()
+            if events:
+                start = time.perf_counter()
+                self._write(events, deltas)
+
+                self.last_flush_ms = (time.perf_counter() - start) * 1000
+                self.last_flush_at = timezone.now()
+                # Cât a așteptat cel mai vechi eveniment până a fost scris
+                self.last_flush_delay_ms = (time.time() - oldest_at) * 1000
+
+            self._save_stats(deltas)
+            return len(events)
+
+    def flush_user(self, user_id):
+        """
+        Scrie imediat evenimentele în așteptare ale unui utilizator, înaintea
+        unei scrieri sincrone care trebuie să le urmeze (de exemplu ștergerea
+        unui favorit încă nescris). Returnează numărul de evenimente scrise.
+        """
+        with self._flush_lock:
+            with self._lock:
+                events = [event for event in self._events if event[0] == user_id]
+                if not events:
+                    return 0
+                self._events = deque(event for event in self._events if event[0] != user_id)
+                if not self._events:
+                    self._oldest_at = None
+
+            deltas = {}
+            self._write(events, deltas)
+            self._save_stats(deltas)
+            return len(events)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def _ensure_flusher(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='interaction-flusher', daemon=True)
+                self._thread.start()
+
+    def process_stats(self):
+        with self._lock:
+            oldest_age_ms = (time.time() - self._oldest_at) * 1000 if self._oldest_at else 0.0
+            return {
+                'depth': len(self._events),
+                'max_size': self.max_size,
+                'oldest_event_age_ms': round(oldest_age_ms, 2),
+                'last_flush_ms': round(self.last_flush_ms, 2) if self.last_flush_ms is not None else None,
+                'last_flush_delay_ms': round(self.last_flush_delay_ms, 2) if self.last_flush_delay_ms is not None else None,
+                'last_flush_at': self.last_flush_at.isoformat() if self.last_flush_at else None,
+            }
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_interaction_buffer():
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = InteractionBuffer(
+                flush_interval=getattr(settings, 'RECOMMENDATION_INGESTION_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+                flush_size=getattr(settings, 'RECOMMENDATION_INGESTION_FLUSH_SIZE', DEFAULT_FLUSH_SIZE),
+                max_size=getattr(settings, 'RECOMMENDATION_INGESTION_MAX_BUFFER', DEFAULT_MAX_BUFFER),
+            )
+            # Evenimentele rămase la oprirea procesului sunt scrise înainte de ieșire
+            atexit.register(_buffer.flush)
+        return _buffer
+
+
+def flush_user_events(user_id):
+    """
+    Scrie evenimentele în așteptare ale utilizatorului din bufferul
+    procesului curent. Bufferul este per proces: evenimentele primite de
+    alt worker sunt scrise de flush-ul acestuia.
+    """
+    if _buffer is not None:
+        _buffer.flush_user(user_id)
+
+
+def reset_interaction_buffer():
+    """Renunță la bufferul procesului (evenimentele rămase sunt scrise înainte)."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is not None:
+            _buffer.flush()
+        _buffer = None
+
+
+def ingestion_stats():
+    """
+    Contoarele ingestiei, păstrate în cache-ul configurat: cumulate între
+    procese doar cu un backend partajat (Redis, Memcached); cu LocMemCache
+    fiecare proces își raportează propriile contoare. Starea bufferului
+    este întotdeauna cea a procesului curent.
+    """
+    stats = {name: cache.get(_stats_key(name), 0) for name in STATS_KEYS}
+    stats['process'] = _buffer.process_stats() if _buffer is not None else None
+    return stats
@@ -0,0 +1,612 @@
+import time
+import zlib
+import datetime
+import threading
+import logging
+import numpy as np
+from django.conf import settings
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from listings.models import Favorite
+from .models import UserInteraction, InteractionRollup, InteractionTombstone
+from .artifacts import save_arrays, load_arrays, artifact_mtime
+from .scoring import interaction_scores, days_old
+from .rescoring import stored_scores_current
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_NAME = 'interaction_matrix'
+
+# Sub acest prag un produs scalar este zgomot numeric (celule anulate prin delta)
+MIN_DOT = 1e-9
+
+
+class InteractionMatrix:
+    """
+    Matrice rară utilizator x anunț cu scorurile agregate ale interacțiunilor.
+    Rândurile și coloanele au hărți stabile id <-> index. Interacțiunile
+    mutate de retenție intră ca pseudo-anunțuri (marcă, model) cu id-uri
+    negative (vezi rollup_listing_id), deci contează la similaritatea dintre
+    utilizatori, dar nu sunt recomandate. Structura CSR nu se
+    modifică între compactări: actualizările incrementale sunt ținute într-un
+    delta (celulă -> scor nou, indexat și pe rânduri și pe coloane), pe care
+    interogările îl combină cu CSR-ul. Compactarea are loc doar la scriere,
+    când delta depășește COMPACT_THRESHOLD celule, și la salvare.
+    """
+
+    COMPACT_THRESHOLD = 10000
+
+    def __init__(self, matrix, user_ids, listing_ids, built_at=None):
+        from scipy.sparse import csr_matrix
+
+        self.matrix = csr_matrix(matrix, dtype=np.float32)
+        self.matrix.eliminate_zeros()
+        self.matrix.sort_indices()
+        self.user_ids = [int(uid) for uid in user_ids]
+        self.listing_ids = [int(lid) for lid in listing_ids]
+        self.user_index = {uid: i for i, uid in enumerate(self.user_ids)}
+        self.listing_index = {lid: i for i, lid in enumerate(self.listing_ids)}
+        self.built_at = built_at or timezone.now()
+        self.caught_up_at = self.built_at
+        self.synced_at = time.monotonic()
+        self.loaded_mtime = None
+
+        self._overrides = {}
+        self._override_rows = {}
+        self._override_cols = {}
+        self._csc = None
+        self._sq_norms = self._base_sq_norms()
+        self._lock = threading.RLock()
+
+    @property
+    def nnz(self):
+        return self.matrix.nnz + len(self._overrides)
+
+    @classmethod
+    def build(cls, now=None):
+        """Construiește matricea completă din tabelele user_interactions și favorites."""
+        from scipy.sparse import coo_matrix
+
+        now = now or timezone.now()
+
+        user_col, listing_col, types, counts, timestamps = [], [], [], [], []
+        stored_scores = []
+        if stored_scores_current(now):
+            # Scorurile stocate sunt recalculate de rescore_interactions, deci pot fi citite direct
+            interactions = UserInteraction.objects.values_list(
+                'user_id', 'car_listing_id', 'interaction_score'
+            ).iterator(chunk_size=10000)
+            for user_id, listing_id, score in interactions:
+                user_col.append(user_id)
+                listing_col.append(listing_id)
+                stored_scores.append(score)
+        else:
+            interactions = UserInteraction.objects.values_list(
+                'user_id', 'car_listing_id', 'interaction_type', 'interaction_count', 'last_interaction'
+            ).iterator(chunk_size=10000)
+            for user_id, listing_id, interaction_type, count, last_interaction in interactions:
+                user_col.append(user_id)
+                listing_col.append(listing_id)
+                types.append(interaction_type)
+                counts.append(count)
+                timestamps.append(last_interaction)
+
+        # Favoritele salvate fără interacțiunea 'favorit' corespunzătoare contează ca una
+        favorites = Favorite.objects.exclude(
+            Exists(UserInteraction.objects.filter(
+                user_id=OuterRef('user_id'),
+                car_listing_id=OuterRef('car_listing_id'),
+                interaction_type='favorit'
+            ))
+        ).values_list('user_id', 'car_listing_id', 'created_at').iterator(chunk_size=10000)
+        for user_id, listing_id, created_at in favorites:
+            user_col.append(user_id)
+            listing_col.append(listing_id)
+            types.append('favorit')
+            counts.append(1.0)
+            timestamps.append(created_at)
+
+        # Istoricul agregat de retenție, pe coloanele pseudo-anunțurilor
+        rollups = InteractionRollup.objects.values_list(
+            'user_id', 'brand', 'car_model', 'interaction_type', 'interaction_count', 'last_interaction'
+        ).iterator(chunk_size=10000)
+        for user_id, brand, model, interaction_type, count, last_interaction in rollups:
+            user_col.append(user_id)
+            listing_col.append(rollup_listing_id(brand, model))
+            types.append(interaction_type)
+            counts.append(count)
+            timestamps.append(last_interaction)
+
+        scores = np.concatenate([
+            np.asarray(stored_scores, dtype=np.float64),
+            interaction_scores(types, counts, days_old(timestamps, now)),
+        ])
+
+        user_ids, rows = np.unique(np.asarray(user_col, dtype=np.int64), return_inverse=True)
+        listing_ids, cols = np.unique(np.asarray(listing_col, dtype=np.int64), return_inverse=True)
+
+        # coo -> csr însumează automat duplicatele (mai multe tipuri pe aceeași pereche)
+        matrix = coo_matrix(
+            (scores.astype(np.float32), (rows, cols)),
+            shape=(len(user_ids), len(listing_ids))
+        ).tocsr()
+
+        logger.info(
+            f"Matricea de interacțiuni construită: {matrix.shape[0]} utilizatori, "
+            f"{matrix.shape[1]} anunțuri, {matrix.nnz} celule"
+        )
+        return cls(matrix, user_ids, listing_ids, built_at=now)
+
+    def save(self):
+        with self._lock:
+            self.compact()
+            save_arrays(
+                ARTIFACT_NAME,
+                data=self.matrix.data,
+                indices=self.matrix.indices,
+                indptr=self.matrix.indptr,
+                shape=np.array(self.matrix.shape, dtype=np.int64),
+                user_ids=np.array(self.user_ids, dtype=np.int64),
+                listing_ids=np.array(self.listing_ids, dtype=np.int64),
+                built_at=np.array([self.built_at.timestamp()], dtype=np.float64),
+            )
+            self.loaded_mtime = artifact_mtime(ARTIFACT_NAME)
+        # Ștergerile anterioare construirii sunt deja în matrice; procesele cu o
+        # versiune mai veche o reîncarcă pe aceasta la următoarea citire
+        InteractionTombstone.objects.filter(deleted_at__lt=self.built_at).delete()
+
+    @classmethod
+    def load(cls):
+        """Încarcă ultima versiune salvată pe disc sau None dacă nu există."""
+        from scipy.sparse import csr_matrix
+
+        mtime = artifact_mtime(ARTIFACT_NAME)
+        arrays = load_arrays(ARTIFACT_NAME, mmap=False)
+        if arrays is None:
+            return None
+
+        shape = tuple(int(x) for x in arrays['shape'])
+        matrix = csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=shape)
+        built_at = datetime_from_timestamp(float(arrays['built_at'][0]))
+
+        instance = cls(matrix, arrays['user_ids'], arrays['listing_ids'], built_at=built_at)
+        instance.loaded_mtime = mtime
+        return instance
+
+    def catch_up(self):
+        """
+        Aplică interacțiunile și favoritele înregistrate după ultima
+        sincronizare (inițial momentul construirii), ca un snapshot mai vechi
+        de pe disc sau matricea altui worker să nu piardă activitatea recentă.
+        Ștergerile sunt citite din interaction_tombstones, scrise de semnale:
+        scorul perechii este recalculat, deci ajunge la 0 dacă nu mai rămâne
+        nicio interacțiune.
+        """
+        since = self.caught_up_at
+        self.caught_up_at = timezone.now()
+        self.synced_at = time.monotonic()
+        changed_pairs = set(UserInteraction.objects.filter(
+            last_interaction__gt=since
+        ).values_list('user_id', 'car_listing_id'))
+        changed_pairs.update(Favorite.objects.filter(
+            created_at__gt=since
+        ).values_list('user_id', 'car_listing_id'))
+        changed_pairs.update(InteractionTombstone.objects.filter(
+            deleted_at__gt=since
+        ).values_list('user_id', 'car_listing_id'))
+        changed_rollups = set(InteractionRollup.objects.filter(
+            updated_at__gt=since
+        ).values_list('user_id', 'brand', 'car_model'))
+
+        scores = pair_scores(changed_pairs)
+        for (user_id, brand, model), score in rollup_scores(changed_rollups).items():
+            pair = (user_id, rollup_listing_id(brand, model))
+            changed_pairs.add(pair)
+            scores[pair] = score
+
+        if not changed_pairs:
+            return 0
+        with self._lock:
+            for (user_id, listing_id) in changed_pairs:
+                self.set_score(user_id, listing_id, scores.get((user_id, listing_id), 0.0))
+
+        logger.info(f"Matricea de interacțiuni actualizată cu {len(changed_pairs)} perechi modificate")
+        return len(changed_pairs)
+
+    def _base_sq_norms(self):
+        """Pătratele normelor rândurilor din CSR, completate cu 0 pentru utilizatorii noi."""
+        sq_norms = np.asarray(self.matrix.multiply(self.matrix).sum(axis=1), dtype=np.float64).ravel()
+        missing = len(self.user_ids) - sq_norms.size
+        if missing > 0:
+            sq_norms = np.concatenate([sq_norms, np.zeros(missing)])
+        return sq_norms
+
+    def _ensure_user(self, user_id):
+        row = self.user_index.get(user_id)
+        if row is None:
+            row = len(self.user_ids)
+            self.user_ids.append(user_id)
+            self.user_index[user_id] = row
+            if row >= self._sq_norms.size:
+                self._sq_norms = np.concatenate([self._sq_norms, np.zeros(max(row + 1 - self._sq_norms.size, 1024))])
+        return row
+
+    def _ensure_listing(self, listing_id):
+        col = self.listing_index.get(listing_id)
+        if col is None:
+            col = len(self.listing_ids)
+            self.listing_ids.append(listing_id)
+            self.listing_index[listing_id] = col
+        return col
+
+    def _find_position(self, row, col):
+        if row >= self.matrix.shape[0] or col >= self.matrix.shape[1]:
+            return None
+        start, end = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+        pos = start + np.searchsorted(self.matrix.indices[start:end], col)
+        if pos < end and self.matrix.indices[pos] == col:
+            return pos
+        return None
+
+    def _base_value(self, row, col):
+        pos = self._find_position(row, col)
+        return float(self.matrix.data[pos]) if pos is not None else 0.0
+
+    def _value(self, row, col):
+        score = self._overrides.get((row, col))
+        return score if score is not None else self._base_value(row, col)
+
+    def _drop_override(self, row, col):
+        if self._overrides.pop((row, col), None) is None:
+            return
+        for index, outer, inner in ((self._override_rows, row, col), (self._override_cols, col, row)):
+            cells = index[outer]
+            del cells[inner]
+            if not cells:
+                del index[outer]
+
+    def set_score(self, user_id, listing_id, score):
+        """
+        Setează scorul unei perechi (utilizator, anunț); scorul 0 elimină
+        perechea. Costul nu depinde de mărimea matricei, cu excepția
+        compactării de la COMPACT_THRESHOLD celule în delta.
+        """
+        with self._lock:
+            row = self._ensure_user(user_id)
+            col = self._ensure_listing(listing_id)
+            score = max(float(score), 0.0)
+            old = self._value(row, col)
+
+            if score == self._base_value(row, col):
+                # Celula revine la valoarea din CSR (sau rămâne goală): nu mai are nevoie de delta
+                self._drop_override(row, col)
+            else:
+                self._overrides[(row, col)] = score
+                self._override_rows.setdefault(row, {})[col] = score
+                self._override_cols.setdefault(col, {})[row] = score
+            self._sq_norms[row] += score * score - old * old
+
+            if len(self._overrides) > self.COMPACT_THRESHOLD:
+                self.compact()
+
+    def refresh_cell(self, user_id, listing_id):
+        """Recalculează din baza de date scorul unei singure perechi."""
+        score = pair_scores({(user_id, listing_id)}).get((user_id, listing_id), 0.0)
+        self.set_score(user_id, listing_id, score)
+
+    def compact(self):
+        """
+        Integrează delta în structura CSR și elimină celulele rămase la 0
+        (perechi șterse). Nu este apelată din interogări.
+        """
+        from scipy.sparse import coo_matrix
+
+        with self._lock:
+            shape = (len(self.user_ids), len(self.listing_ids))
+            if not self._overrides and shape == self.matrix.shape:
+                return
+
+            base = self.matrix.tocoo()
+            count = len(self._overrides)
+            extra_rows = np.fromiter((r for r, _ in self._overrides), dtype=np.int64, count=count)
+            extra_cols = np.fromiter((c for _, c in self._overrides), dtype=np.int64, count=count)
+            extra_data = np.fromiter(self._overrides.values(), dtype=np.float32, count=count)
+
+            # Celulele din delta înlocuiesc valorile din CSR
+            n_cols = max(shape[1], 1)
+            keep = ~np.isin(base.row.astype(np.int64) * n_cols + base.col, extra_rows * n_cols + extra_cols)
+
+            matrix = coo_matrix(
+                (
+                    np.concatenate([base.data[keep], extra_data]),
+                    (np.concatenate([base.row[keep], extra_rows]), np.concatenate([base.col[keep], extra_cols]))
+                ),
+                shape=shape
+            ).tocsr()
+            matrix.eliminate_zeros()
+            matrix.sort_indices()
+
+            self.matrix = matrix
+            self._overrides = {}
+            self._override_rows = {}
+            self._override_cols = {}
+            self._csc = matrix.tocsc()
+            self._sq_norms = self._base_sq_norms()
+
+    def _user_vector(self, row):
+        vector = {}
+        if row < self.matrix.shape[0]:
+            start, end = self.matrix.indptr[row], self.matrix.indptr[row + 1]
+            vector = dict(zip(self.matrix.indices[start:end].tolist(), self.matrix.data[start:end].tolist()))
+        vector.update(self._override_rows.get(row, {}))
+
+        cols = np.fromiter(vector.keys(), dtype=np.int64, count=len(vector))
+        values = np.fromiter(vector.values(), dtype=np.float32, count=len(vector))
+        mask = values > 0
+        return cols[mask], values[mask]
+
+    def user_scores(self, user_id):
+        """Returnează {listing_id: scor} pentru un utilizator."""
+        with self._lock:
+            row = self.user_index.get(user_id)
+            if row is None:
+                return {}
+            cols, values = self._user_vector(row)
+            return {self.listing_ids[c]: float(v) for c, v in zip(cols, values)}
+
+    def _get_csc(self):
+        if self._csc is None:
+            self._csc = self.matrix.tocsc()
+        return self._csc
+
+    def _dots(self, cols, values):
+        """Produsele scalare ale tuturor utilizatorilor cu vectorul (cols, values), inclusiv delta."""
+        dots = np.zeros(len(self.user_ids), dtype=np.float64)
+        in_base = cols < self.matrix.shape[1]
+        if in_base.any():
+            block = self._get_csc()[:, cols[in_base]].astype(np.float64)
+            dots[:self.matrix.shape[0]] = block @ values[in_base].astype(np.float64)
+        # Doar celulele din delta aflate pe coloanele utilizatorului
+        for col, value in zip(cols.tolist(), values.tolist()):
+            for row, score in self._override_cols.get(col, {}).items():
+                dots[row] += (score - self._base_value(row, col)) * value
+        return dots
+
+    def neighbours(self, user_id, n_neighbors=20):
+        """
+        Utilizatorii cei mai similari (cosinus) cu user_id. Sunt evaluați doar
+        utilizatorii care au cel puțin un anunț în comun, citiți pe coloanele
+        anunțurilor utilizatorului, nu întreaga matrice.
+        Returnează o listă de (user_id, similaritate) descrescătoare.
+        """
+        with self._lock:
+            row = self.user_index.get(user_id)
+            if row is None:
+                return []
+
+            cols, values = self._user_vector(row)
+            if cols.size == 0:
+                return []
+
+            dots = self._dots(cols, values)
+            dots[row] = 0
+
+            candidates = np.flatnonzero(dots > MIN_DOT)
+            return self._top_neighbours(candidates, dots[candidates], np.linalg.norm(values), n_neighbors)
+
+    def cosine_neighbours(self, user_id, candidate_user_ids, n_neighbors=20):
+        """
+        Ca neighbours, dar evaluează doar utilizatorii candidați (de exemplu
+        cei propuși de indexul LSH), cu cosinusul exact.
+        """
+        with self._lock:
+            row = self.user_index.get(user_id)
+            if row is None:
+                return []
+
+            cols, values = self._user_vector(row)
+            if cols.size == 0:
+                return []
+
+            candidates = np.array([
+                self.user_index[uid] for uid in np.asarray(candidate_user_ids).tolist()
+                if uid in self.user_index and uid != user_id
+            ], dtype=np.int64)
+            if candidates.size == 0:
+                return []
+
+            vector = np.zeros(len(self.listing_ids), dtype=np.float64)
+            vector[cols] = values
+            dots = np.zeros(candidates.size, dtype=np.float64)
+            in_base = candidates < self.matrix.shape[0]
+            if in_base.any():
+                block = self.matrix[candidates[in_base]].astype(np.float64)
+                dots[in_base] = block @ vector[:self.matrix.shape[1]]
+            for i, candidate in enumerate(candidates.tolist()):
+                for col, score in self._override_rows.get(candidate, {}).items():
+                    dots[i] += (score - self._base_value(candidate, col)) * vector[col]
+
+            positive = dots > MIN_DOT
+            return self._top_neighbours(candidates[positive], dots[positive], np.linalg.norm(values), n_neighbors)
+
+    def _top_neighbours(self, rows, dots, norm, n_neighbors):
+        if rows.size == 0:
+            return []
+
+        norms = np.sqrt(np.maximum(self._sq_norms[rows], 0.0))
+        similarities = dots / (norms * norm + 1e-12)
+
+        k = min(n_neighbors, rows.size)
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+
+        return [(self.user_ids[rows[i]], float(similarities[i])) for i in top]
+
+    def neighbourhood_scores(self, user_id, neighbours):
+        """
+        Scorurile anunțurilor văzute de vecini, ponderate cu similaritatea lor,
+        fără anunțurile cu care utilizatorul a interacționat deja.
+        Returnează (listing_ids, scores) sortate descrescător.
+        """
+        with self._lock:
+            rows = [self.user_index[uid] for uid, _ in neighbours if uid in self.user_index]
+            if not rows:
+                return [], np.zeros(0)
+
+            similarity_by_row = {self.user_index[uid]: sim for uid, sim in neighbours}
+            weights = np.array([1 / (1 + (1 - similarity_by_row[r])) for r in rows], dtype=np.float32)
+
+            vectors = [self._user_vector(r) for r in rows]
+            all_cols = np.concatenate([c for c, _ in vectors])
+            if all_cols.size == 0:
+                return [], np.zeros(0)
+            weighted = np.concatenate([v * weights[i] for i, (_, v) in enumerate(vectors)])
+
+            cols, inverse = np.unique(all_cols, return_inverse=True)
+            scores = np.bincount(inverse, weights=weighted, minlength=cols.size)
+
+            ids = np.fromiter((self.listing_ids[c] for c in cols.tolist()), dtype=np.int64, count=cols.size)
+            own_cols, _ = self._user_vector(self.user_index[user_id])
+            keep = ~np.isin(cols, own_cols) & (scores > 0) & (ids >= 0)
+            ids, scores = ids[keep], scores[keep]
+
+            order = np.argsort(-scores, kind='stable')
+            return ids[order].tolist(), scores[order]
+
+
+def rollup_listing_id(brand, model):
+    """Id-ul negativ, stabil între procese, al pseudo-anunțului unei (mărci, model)."""
+    return -1 - zlib.crc32(f"{brand}\x1f{model}".encode('utf-8'))
+
+
+def rollup_scores(keys):
+    """
+    Scorul agregat al rollup-urilor pentru un set de chei (user_id, marcă,
+    model), cu aceeași formulă ca interacțiunile: rollup-urile au trecut de
+    orizontul de retenție, deci decăderea este cea maximă.
+    """
+    keys = set(keys)
+    if not keys:
+        return {}
+
+    rows = InteractionRollup.objects.filter(
+        user_id__in={key[0] for key in keys}, brand__in={key[1] for key in keys}
+    ).values_list('user_id', 'brand', 'car_model', 'interaction_type', 'interaction_count', 'last_interaction')
+    rows = [row for row in rows if row[:3] in keys]
+
+    scores = interaction_scores(
+        [row[3] for row in rows], [row[4] for row in rows], days_old([row[5] for row in rows], timezone.now())
+    )
+    result = dict.fromkeys(keys, 0.0)
+    for row, score in zip(rows, scores):
+        result[row[:3]] += float(score)
+    return result
+
+
+def datetime_from_timestamp(value):
+    return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc)
+
+
+def pair_scores(pairs):
+    """
+    Scorul agregat pentru un set de perechi (user_id, listing_id), calculat
+    cu aceeași formulă ca la construirea completă a matricei.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return {}
+
+    user_ids = {u for u, _ in pairs}
+    listing_ids = {l for _, l in pairs}
+    now = timezone.now()
+
+    keys, types, counts, timestamps = [], [], [], []
+    has_favorit = set()
+    rows = UserInteraction.objects.filter(
+        user_id__in=user_ids, car_listing_id__in=listing_ids
+    ).values_list('user_id', 'car_listing_id', 'interaction_type', 'interaction_count', 'last_interaction')
+    for user_id, listing_id, interaction_type, count, last_interaction in rows:
+        if (user_id, listing_id) not in pairs:
+            continue
+        keys.append((user_id, listing_id))
+        types.append(interaction_type)
+        counts.append(count)
+        timestamps.append(last_interaction)
+        if interaction_type == 'favorit':
+            has_favorit.add((user_id, listing_id))
+
+    favorites = Favorite.objects.filter(
+        user_id__in=user_ids, car_listing_id__in=listing_ids
+    ).values_list('user_id', 'car_listing_id', 'created_at')
+    for user_id, listing_id, created_at in favorites:
+        if (user_id, listing_id) in pairs and (user_id, listing_id) not in has_favorit:
+            keys.append((user_id, listing_id))
+            types.append('favorit')
+            counts.append(1.0)
+            timestamps.append(created_at)
+
+    scores = interaction_scores(types, counts, days_old(timestamps, now))
+    result = {}
+    for key, score in zip(keys, scores):
+        result[key] = result.get(key, 0.0) + float(score)
+    return result
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def sync_interval():
+    return getattr(settings, 'RECOMMENDATION_MATRIX_SYNC_INTERVAL', 60)
+
+
+def get_interaction_matrix():
+    """
+    Matricea de interacțiuni a procesului curent. Este încărcată de pe disc la
+    prima utilizare și reîncărcată când comanda build_interaction_matrix
+    salvează o versiune nouă. Semnalele actualizează doar matricea
+    worker-ului care a scris interacțiunea; celelalte o preiau prin catch_up
+    la cel mult RECOMMENDATION_MATRIX_SYNC_INTERVAL secunde.
+    Dacă artefactul lipsește returnează None: construirea completă rămâne
+    în sarcina comenzii, nu a cererii, iar apelanții folosesc calea de bază.
+    """
+    global _matrix
+    with _matrix_lock:
+        mtime = artifact_mtime(ARTIFACT_NAME)
+        stale = _matrix is not None and mtime is not None and mtime != _matrix.loaded_mtime
+
+        if _matrix is None or stale:
+            matrix = InteractionMatrix.load()
+            if matrix is None:
+                logger.warning("Matricea de interacțiuni lipsește; rulați build_interaction_matrix")
+                return _matrix
+            matrix.catch_up()
+            _matrix = matrix
+        elif time.monotonic() - _matrix.synced_at >= sync_interval():
+            _matrix.catch_up()
+
+        return _matrix
+
+
+def load_or_build_interaction_matrix():
+    """
+    Pentru comenzi: matricea de pe disc adusă la zi, sau construită și
+    salvată dacă artefactul lipsește.
+    """
+    matrix = get_interaction_matrix()
+    if matrix is None:
+        matrix = InteractionMatrix.build()
+        matrix.save()
+    return matrix
+
+
+def get_loaded_interaction_matrix():
+    """Matricea deja încărcată în proces, fără a o încărca dacă lipsește."""
+    return _matrix
+
+
+def reset_loaded_interaction_matrix():
+    """Renunță la matricea procesului; următoarea citire o încarcă de pe disc."""
+    global _matrix
+    with _matrix_lock:
+        _matrix = None
@@ -0,0 +1,320 @@
+import datetime
+import threading
+import logging
+import numpy as np
+from django.utils import timezone
+from listings.models import CarListing, Favorite
+from .models import UserInteraction
+from .artifacts import save_arrays, load_arrays, artifact_mtime
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_NAME = 'item_neighbours'
+
+DEFAULT_TOP_K = 30
+
+
+def _top_k_rows(similarities, row_item_cols, top_k):
+    """Primii top_k vecini (coloană, scor) pentru fiecare rând al unei matrice CSR."""
+    n_rows = similarities.shape[0]
+    neighbour_cols = np.full((n_rows, top_k), -1, dtype=np.int64)
+    neighbour_scores = np.zeros((n_rows, top_k), dtype=np.float32)
+
+    for i in range(n_rows):
+        start, end = similarities.indptr[i], similarities.indptr[i + 1]
+        cols = similarities.indices[start:end]
+        scores = similarities.data[start:end]
+
+        not_self = cols != row_item_cols[i]
+        cols, scores = cols[not_self], scores[not_self]
+        if cols.size == 0:
+            continue
+
+        k = min(top_k, cols.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        neighbour_cols[i, :k] = cols[top]
+        neighbour_scores[i, :k] = scores[top]
+
+    return neighbour_cols, neighbour_scores
+
+
+class ItemSimilarityIndex:
+    """
+    Pentru fiecare anunț, primii K cei mai similari anunțuri (similaritate
+    cosinus pe vectorii de interacțiuni ai utilizatorilor). Rândurile sunt
+    ordonate după listing_id, deci căutarea se face cu searchsorted direct
+    pe array-urile mapate în memorie.
+    """
+
+    def __init__(self, listing_ids, neighbours, scores, built_at=None):
+        self.listing_ids = listing_ids
+        self.neighbours = neighbours
+        self.scores = scores
+        self.built_at = built_at or timezone.now()
+        self.loaded_mtime = None
+
+    @property
+    def top_k(self):
+        return self.neighbours.shape[1]
+
+    @classmethod
+    def compute(cls, interaction_matrix, listing_ids=None, top_k=DEFAULT_TOP_K, batch_size=1000, with_pairs=False):
+        """
+        Calculează listele de vecini pentru listing_ids (implicit toate
+        anunțurile din matrice), pe loturi, fără matricea item x item completă.
+        Cu with_pairs întoarce în plus toate similaritățile nenule ale acestor
+        anunțuri, ca (listing_ids, neighbour_ids, scores).
+        """
+        from sklearn.preprocessing import normalize
+
+        interaction_matrix.compact()
+        user_items = interaction_matrix.matrix
+        all_ids = np.asarray(interaction_matrix.listing_ids, dtype=np.int64)
+        # Pseudo-anunțurile rollup-urilor de retenție (id-uri negative) nu au vecini și nu sunt vecini
+        real = np.flatnonzero(all_ids >= 0)
+        if real.size < all_ids.size:
+            user_items = user_items[:, real]
+        item_vectors = normalize(user_items.T.tocsr(), norm='l2', axis=1)
+        item_vectors_t = item_vectors.T.tocsc()
+
+        if listing_ids is None:
+            cols = np.arange(real.size, dtype=np.int64)
+        else:
+            index = interaction_matrix.listing_index
+            cols = np.searchsorted(real, np.array(
+                [index[lid] for lid in listing_ids if lid in index and lid >= 0], dtype=np.int64
+            ))
+        all_ids = all_ids[real]
+
+        neighbour_blocks, score_blocks, pair_blocks = [], [], []
+        for start in range(0, cols.size, batch_size):
+            block = cols[start:start + batch_size]
+            similarities = (item_vectors[block] @ item_vectors_t).tocsr()
+            block_cols, block_scores = _top_k_rows(similarities, block, top_k)
+            neighbour_blocks.append(np.where(block_cols >= 0, all_ids[np.maximum(block_cols, 0)], -1))
+            score_blocks.append(block_scores)
+            if with_pairs:
+                pairs = similarities.tocoo()
+                sources = block[pairs.row]
+                not_self = (sources != pairs.col) & (pairs.data > 0)
+                pair_blocks.append((all_ids[sources[not_self]], all_ids[pairs.col[not_self]], pairs.data[not_self].astype(np.float32)))
+
+        if neighbour_blocks:
+            neighbours = np.vstack(neighbour_blocks)
+            scores = np.vstack(score_blocks)
+        else:
+            neighbours = np.zeros((0, top_k), dtype=np.int64)
+            scores = np.zeros((0, top_k), dtype=np.float32)
+
+        if not with_pairs:
+            return all_ids[cols], neighbours, scores
+        if pair_blocks:
+            pairs = tuple(np.concatenate(parts) for parts in zip(*pair_blocks))
+        else:
+            pairs = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+        return all_ids[cols], neighbours, scores, pairs
+
+    @classmethod
+    def build(cls, interaction_matrix, top_k=DEFAULT_TOP_K, batch_size=1000):
+        built_at = timezone.now()
+        listing_ids, neighbours, scores = cls.compute(interaction_matrix, top_k=top_k, batch_size=batch_size)
+        order = np.argsort(listing_ids)
+        return cls(listing_ids[order], neighbours[order], scores[order], built_at=built_at)
+
+    def update(self, interaction_matrix, listing_ids, batch_size=1000):
+        """
+        Recalculează rândurile anunțurilor date, elimină anunțurile care nu
+        mai există și corectează intrările lor din listele celorlalte anunțuri:
+        scorurile noi se inserează acolo unde intră în primii K, iar un rând
+        plin din care iese un anunț atins se recalculează, pentru că vecinul
+        care urmează în locul lui nu este cunoscut. Returnează un index nou.
+        """
+        built_at = timezone.now()
+        listing_ids = np.unique(np.asarray(list(listing_ids), dtype=np.int64))
+        new_ids, new_neighbours, new_scores, pairs = self.compute(
+            interaction_matrix, listing_ids=listing_ids, top_k=self.top_k, batch_size=batch_size, with_pairs=True
+        )
+
+        old_ids = np.asarray(self.listing_ids)
+        existing_ids = set(CarListing.objects.filter(
+            id__in=old_ids.tolist()
+        ).values_list('id', flat=True))
+        changed = np.union1d(listing_ids, old_ids[~np.isin(old_ids, list(existing_ids))])
+        keep = ~np.isin(old_ids, changed)
+
+        ids = old_ids[keep]
+        neighbours = np.array(self.neighbours[keep])
+        scores = np.array(self.scores[keep])
+        stale_rows = self._patch_reverse_entries(ids, neighbours, scores, changed, pairs)
+
+        if stale_rows.size:
+            # un anunț fără interacțiuni nu mai apare în matrice și rămâne fără vecini
+            neighbours[stale_rows] = -1
+            scores[stale_rows] = 0
+            fresh_ids, fresh_neighbours, fresh_scores = self.compute(
+                interaction_matrix, listing_ids=ids[stale_rows], top_k=self.top_k, batch_size=batch_size
+            )
+            positions = np.searchsorted(ids, fresh_ids)
+            neighbours[positions] = fresh_neighbours
+            scores[positions] = fresh_scores
+
+        ids = np.concatenate([ids, new_ids])
+        neighbours = np.vstack([neighbours, new_neighbours])
+        scores = np.vstack([scores, new_scores])
+
+        # Vecinii șterși între timp nu mai trebuie recomandați
+        removed = ~np.isin(neighbours, ids) & (neighbours >= 0)
+        neighbours[removed] = -1
+        scores[removed] = 0
+
+        order = np.argsort(ids)
+        return ItemSimilarityIndex(ids[order], neighbours[order], scores[order], built_at=built_at)
+
+    def _patch_reverse_entries(self, ids, neighbours, scores, changed, pairs):
+        """
+        Înlocuiește pe loc, în rândurile ids (ordonate), scorurile vechi ale
+        anunțurilor changed cu cele din pairs. Returnează pozițiile rândurilor
+        care trebuie recalculate complet.
+        """
+        sources, targets, similarities = pairs
+        positions = np.searchsorted(ids, targets)
+        found = positions < len(ids)
+        found[found] = ids[positions[found]] == targets[found]
+        positions, sources, similarities = positions[found], sources[found], similarities[found]
+
+        order = np.argsort(positions, kind='stable')
+        positions, sources, similarities = positions[order], sources[order], similarities[order]
+        rows = np.union1d(np.flatnonzero(np.isin(neighbours, changed).any(axis=1)), positions)
+
+        stale_rows = []
+        for row in rows.tolist():
+            start, end = np.searchsorted(positions, [row, row + 1])
+            row_neighbours, row_scores = neighbours[row], scores[row]
+            valid = row_neighbours >= 0
+            outdated = valid & np.isin(row_neighbours, changed)
+            kept = valid & ~outdated
+
+            merged_ids = np.concatenate([row_neighbours[kept], sources[start:end]])
+            merged_scores = np.concatenate([row_scores[kept], similarities[start:end]])
+            top = np.argsort(-merged_scores, kind='stable')[:self.top_k]
+
+            # Anunțurile din afara unui rând plin au scoruri cel mult egale cu
+            # ultimul scor din rând; dacă lista nouă coboară sub el, locul
+            # eliberat poate reveni unui anunț necunoscut aici
+            if valid.all() and outdated.any() and (
+                top.size < self.top_k or merged_scores[top[-1]] < row_scores[valid].min()
+            ):
+                stale_rows.append(row)
+                continue
+
+            neighbours[row] = -1
+            scores[row] = 0
+            neighbours[row, :top.size] = merged_ids[top]
+            scores[row, :top.size] = merged_scores[top]
+
+        return np.asarray(stale_rows, dtype=np.int64)
+
+    def save(self):
+        save_arrays(
+            ARTIFACT_NAME,
+            listing_ids=self.listing_ids,
+            neighbours=self.neighbours,
+            scores=self.scores,
+            built_at=np.array([self.built_at.timestamp()], dtype=np.float64),
+        )
+        self.loaded_mtime = artifact_mtime(ARTIFACT_NAME)
+
+    @classmethod
+    def load(cls):
+        mtime = artifact_mtime(ARTIFACT_NAME)
+        arrays = load_arrays(ARTIFACT_NAME, mmap=True)
+        if arrays is None:
+            return None
+
+        built_at = datetime.datetime.fromtimestamp(float(arrays['built_at'][0]), tz=datetime.timezone.utc)
+        instance = cls(arrays['listing_ids'], arrays['neighbours'], arrays['scores'], built_at=built_at)
+        instance.loaded_mtime = mtime
+        return instance
+
+    def neighbours_of(self, listing_id):
+        """Returnează (neighbour_ids, scores) pentru un anunț sau array-uri goale."""
+        pos = np.searchsorted(self.listing_ids, listing_id)
+        if pos >= len(self.listing_ids) or self.listing_ids[pos] != listing_id:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        neighbours = self.neighbours[pos]
+        valid = neighbours >= 0
+        return neighbours[valid], self.scores[pos][valid]
+
+    def recommend(self, user_scores, exclude_ids=(), max_items=50):
+        """
+        Combină listele de vecini ale anunțurilor cu care a interacționat
+        utilizatorul, ponderate cu scorul interacțiunii. Cost O(interacțiuni x K).
+        Returnează (listing_ids, scores) sortate descrescător.
+        """
+        if not user_scores:
+            return [], np.zeros(0)
+
+        items = sorted(user_scores.items(), key=lambda x: x[1], reverse=True)[:max_items]
+
+        candidate_ids, candidate_scores = [], []
+        for listing_id, weight in items:
+            neighbour_ids, similarities = self.neighbours_of(listing_id)
+            candidate_ids.append(neighbour_ids)
+            candidate_scores.append(similarities * weight)
+
+        if not candidate_ids:
+            return [], np.zeros(0)
+
+        candidate_ids = np.concatenate(candidate_ids)
+        candidate_scores = np.concatenate(candidate_scores)
+
+        ids, inverse = np.unique(candidate_ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=candidate_scores, minlength=ids.size)
+
+        excluded = set(exclude_ids) | set(user_scores.keys())
+        keep = ~np.isin(ids, list(excluded)) & (scores > 0)
+        ids, scores = ids[keep], scores[keep]
+
+        order = np.argsort(-scores, kind='stable')
+        return ids[order].tolist(), scores[order]
+
+
+def touched_listing_ids(since):
+    """Anunțurile cu interacțiuni, favorite sau modificări după momentul dat."""
+    touched = set(UserInteraction.objects.filter(
+        last_interaction__gt=since
+    ).values_list('car_listing_id', flat=True).distinct())
+    touched.update(Favorite.objects.filter(
+        created_at__gt=since
+    ).values_list('car_listing_id', flat=True).distinct())
+    touched.update(CarListing.objects.filter(
+        updated_at__gt=since
+    ).values_list('id', flat=True))
+    return touched
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_item_similarity_index():
+    """
+    Indexul item-item al procesului curent sau None dacă nu a fost încă
+    construit cu comanda build_item_neighbours.
+    """
+    global _index
+    with _index_lock:
+        mtime = artifact_mtime(ARTIFACT_NAME)
+        if mtime is None:
+            _index = None
+        elif _index is None or _index.loaded_mtime != mtime:
+            _index = ItemSimilarityIndex.load()
+        return _index
+
+
+def reset_loaded_item_similarity_index():
+    global _index
+    with _index_lock:
+        _index = None
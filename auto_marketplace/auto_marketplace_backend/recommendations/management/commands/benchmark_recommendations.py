@@ -0,0 +1,82 @@
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from recommendations.benchmark import run_benchmark, dataset_size, TARGETS
+from recommendations.synthetic import seed_synthetic_data, clear_synthetic_data
+
+
+class Command(BaseCommand):
+    help = 'Măsoară latența (p50/p95), numărul de interogări și memoria algoritmilor de recomandare.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', action='append', default=[],
+                            help='Scară de forma UTILIZATORI:ANUNȚURI (ex. 1000:5000); poate fi repetată. '
+                                 'Pentru fiecare scară datele sintetice și toate artefactele sunt '
+                                 'regenerate. Fără --scale se folosesc datele existente.')
+        parser.add_argument('--target', action='append', choices=TARGETS, default=None,
+                            help='Funcțiile măsurate (implicit toate).')
+        parser.add_argument('--users', type=int, default=50,
+                            help='Numărul de utilizatori din eșantion.')
+        parser.add_argument('--repeats', type=int, default=1,
+                            help='De câte ori se parcurge eșantionul.')
+        parser.add_argument('--limit', type=int, default=24,
+                            help='Numărul de recomandări cerute.')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Nu golește cache-ul între apeluri.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', type=str, default=None,
+                            help='Fișierul JSON în care se scriu rezultatele.')
+
+    def _parse_scale(self, value):
+        try:
+            n_users, n_listings = (int(x) for x in value.split(':'))
+        except ValueError:
+            raise CommandError(f"Scară nevalidă: {value} (format: UTILIZATORI:ANUNȚURI)")
+        return n_users, n_listings
+
+    def _run(self, options):
+        results = run_benchmark(
+            targets=options['target'],
+            n_users=options['users'],
+            repeats=options['repeats'],
+            limit=options['limit'],
+            cold_cache=not options['warm_cache'],
+            seed=options['seed'],
+        )
+        for name, stats in results.items():
+            self.stdout.write(
+                f"  {name:<18} p50={stats['p50_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms "
+                f"interogări={stats['queries_avg']:.1f} memorie={stats['peak_mb']:.1f}MB"
+            )
+        return {'dataset': dataset_size(), 'results': results}
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        report = {
+            'started_at': timezone.now().isoformat(),
+            'options': {key: options[key] for key in ('users', 'repeats', 'limit', 'warm_cache', 'seed')},
+            'runs': [],
+        }
+
+        scales = [self._parse_scale(value) for value in options['scale']]
+        if not scales:
+            self.stdout.write("Date existente:")
+            report['runs'].append(self._run(options))
+
+        for n_users, n_listings in scales:
+            clear_synthetic_data()
+            # Modelul ALS se reantrenează doar dacă este măsurat (sau exista deja)
+            als = True if 'als' in (options['target'] or TARGETS) else None
+            seed_synthetic_data(n_users, n_listings, seed=options['seed'], als=als)
+            self.stdout.write(f"Scara {n_users} utilizatori / {n_listings} anunțuri:")
+            run = self._run(options)
+            run['scale'] = {'users': n_users, 'listings': n_listings}
+            report['runs'].append(run)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(f"Benchmark finalizat în {elapsed:.2f}s"))
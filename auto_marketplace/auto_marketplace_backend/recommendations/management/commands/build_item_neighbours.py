@@ -0,0 +1,48 @@
+import time
+from django.core.management.base import BaseCommand
+from recommendations.interaction_matrix import load_or_build_interaction_matrix
+from recommendations.item_similarity import (
+    ItemSimilarityIndex, DEFAULT_TOP_K, touched_listing_ids
+)
+
+
+class Command(BaseCommand):
+    help = 'Calculează listele cu primii K anunțuri similare (item-item) pentru fiecare anunț.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K,
+                            help='Numărul de vecini păstrați pentru fiecare anunț.')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Numărul de anunțuri calculate într-un lot.')
+        parser.add_argument('--delta', action='store_true',
+                            help='Recalculează doar anunțurile atinse de la ultima rulare.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        matrix = load_or_build_interaction_matrix()
+        matrix.catch_up()
+
+        existing = ItemSimilarityIndex.load() if options['delta'] else None
+
+        if existing is None:
+            if options['delta']:
+                self.stdout.write(self.style.WARNING('Nu există un index anterior. Se face reconstruirea completă.'))
+            index = ItemSimilarityIndex.build(
+                matrix, top_k=options['top_k'], batch_size=options['batch_size']
+            )
+            mode = 'completă'
+            processed = len(index.listing_ids)
+        else:
+            touched = touched_listing_ids(existing.built_at)
+            index = existing.update(matrix, touched, batch_size=options['batch_size'])
+            mode = 'incrementală'
+            processed = len(touched)
+
+        index.save()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconstruire {mode}: {processed} anunțuri recalculate, "
+            f"{len(index.listing_ids)} în index (K={index.top_k}) în {elapsed:.2f}s"
+        ))
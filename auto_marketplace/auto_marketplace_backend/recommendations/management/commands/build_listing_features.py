@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from recommendations.feature_index import ListingFeatureIndex, mark_listings_changed
+
+
+class Command(BaseCommand):
+    help = 'Recalculează vocabularul TF-IDF și vectorii de caracteristici ai tuturor anunțurilor.'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        index = ListingFeatureIndex.build()
+        index.save()
+        mark_listings_changed()
+
+        elapsed = time.perf_counter() - start
+        rows, terms = index.matrix.shape
+        self.stdout.write(self.style.SUCCESS(
+            f"Index salvat: {rows} anunțuri, {terms} termeni în {elapsed:.2f}s"
+        ))
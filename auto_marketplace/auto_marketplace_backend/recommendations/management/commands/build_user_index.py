@@ -0,0 +1,43 @@
+import time
+import random
+from django.core.management.base import BaseCommand
+from recommendations.interaction_matrix import load_or_build_interaction_matrix
+from recommendations.user_index import UserLSHIndex, DEFAULT_TABLES, recall_at_k
+
+
+class Command(BaseCommand):
+    help = 'Construiește indexul LSH de vecini aproximativi pentru utilizatori și raportează recall@k.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', type=int, default=DEFAULT_TABLES,
+                            help='Numărul de tabele LSH.')
+        parser.add_argument('--bits', type=int, default=None,
+                            help='Numărul de biți per tabelă (implicit ales după numărul de utilizatori).')
+        parser.add_argument('--k', type=int, default=10,
+                            help='Numărul de vecini pentru care se calculează recall@k.')
+        parser.add_argument('--sample', type=int, default=200,
+                            help='Numărul de utilizatori pe care se măsoară recall@k (0 = fără evaluare).')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        matrix = load_or_build_interaction_matrix()
+        matrix.catch_up()
+        index = UserLSHIndex.build(matrix, n_tables=options['tables'], n_bits=options['bits'])
+        index.save()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Index LSH salvat: {len(index.user_ids)} utilizatori, "
+            f"{index.n_tables} tabele x {index.n_bits} biți în {elapsed:.2f}s"
+        ))
+
+        if options['sample'] <= 0 or len(index.user_ids) == 0:
+            return
+
+        user_ids = random.sample(index.user_ids.tolist(), min(options['sample'], len(index.user_ids)))
+        recall, approx_ms, exact_ms = recall_at_k(matrix, index, user_ids, k=options['k'])
+        self.stdout.write(
+            f"recall@{options['k']} = {recall:.3f} pe {len(user_ids)} utilizatori; "
+            f"căutare aproximativă {approx_ms:.2f}ms vs exactă {exact_ms:.2f}ms"
+        )
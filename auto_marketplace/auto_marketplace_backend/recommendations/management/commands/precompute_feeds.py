@@ -0,0 +1,35 @@
+import time
+from django.core.management.base import BaseCommand
+from recommendations.precomputed_feeds import active_user_ids, precompute_feeds
+
+
+class Command(BaseCommand):
+    help = 'Precalculează feed-urile "pentru tine" (hibride) ale utilizatorilor activi.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7,
+                            help='Utilizatorii activi în ultimele N zile (după last_activity).')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Numărul de procese care calculează feed-urile.')
+        parser.add_argument('--chunk-size', type=int, default=200,
+                            help='Numărul de utilizatori dintr-un lot trimis unui proces.')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Doar utilizatorii fără feed sau cu interacțiuni noi de la ultimul calcul.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        user_ids = active_user_ids(options['days'], incremental=options['incremental'])
+        if not user_ids:
+            self.stdout.write(self.style.WARNING('Nu există utilizatori de actualizat.'))
+            return
+
+        self.stdout.write(f"Se calculează feed-urile pentru {len(user_ids)} utilizatori...")
+        written = precompute_feeds(
+            user_ids, workers=options['workers'], chunk_size=options['chunk_size']
+        )
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{written} feed-uri precalculate cu {options['workers']} procese în {elapsed:.2f}s"
+        ))
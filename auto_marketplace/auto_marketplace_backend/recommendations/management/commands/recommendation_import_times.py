@@ -0,0 +1,58 @@
+import os
+import sys
+import subprocess
+from django.core.management.base import BaseCommand, CommandError
+from recommendations.warmup import HEAVY_MODULES, warm_up
+
+DEFAULT_MODULES = ['recommendations.urls', 'listings.urls']
+
+
+class Command(BaseCommand):
+    help = 'Raportează timpul de import per modul la pornirea aplicației (python -X importtime) și, opțional, durata încălzirii.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', action='append', dest='modules',
+                            help='Modul importat după django.setup() (repetabil; implicit URL-urile aplicațiilor).')
+        parser.add_argument('--top', type=int, default=20,
+                            help='Numărul de module afișate, după timpul cumulat.')
+        parser.add_argument('--warm-up', action='store_true',
+                            help='Rulează și încălzirea motorului de recomandări, cu durata fiecărei etape.')
+
+    def _import_times(self, modules):
+        # Procesul curent are deja modulele importate, deci măsurarea se face într-un proces nou
+        code = 'import django; django.setup(); ' + '; '.join(f'import {name}' for name in modules)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, env=os.environ.copy()
+        )
+        if result.returncode != 0:
+            raise CommandError(f"Importul a eșuat:\n{result.stderr[-2000:]}")
+
+        times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            times[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+        return times
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or DEFAULT_MODULES
+        times = self._import_times(modules)
+
+        self.stdout.write(f"{'modul':<50} {'propriu ms':>12} {'cumulat ms':>12}")
+        ranked = sorted(times.items(), key=lambda x: -x[1][1])
+        for name, (self_ms, cumulative_ms) in ranked[:options['top']]:
+            self.stdout.write(f"{name:<50} {self_ms:>12.1f} {cumulative_ms:>12.1f}")
+
+        total_ms = sum(self_ms for self_ms, _ in times.values())
+        self.stdout.write(self.style.SUCCESS(f"Total: {len(times)} module importate în {total_ms:.1f}ms"))
+
+        loaded = [name for name in HEAVY_MODULES if name in times]
+        if loaded:
+            self.stdout.write(self.style.WARNING(f"Dependențe grele importate la pornire: {', '.join(loaded)}"))
+
+        if options['warm_up']:
+            for step, elapsed_ms in warm_up().items():
+                status = f"{elapsed_ms:.1f}ms" if elapsed_ms is not None else 'eroare'
+                self.stdout.write(f"încălzire {step:<30} {status}")
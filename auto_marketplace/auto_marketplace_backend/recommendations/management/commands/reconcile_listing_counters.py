@@ -0,0 +1,30 @@
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from listings.models import CarListing
+from recommendations.popularity import reconcile_counters, POPULAR_CACHE_KEY
+
+
+class Command(BaseCommand):
+    help = 'Recalculează contoarele de popularitate și imaginea principală ale anunțurilor.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Numărul de anunțuri actualizate într-o singură interogare.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        batch_size = options['batch_size']
+
+        listing_ids = list(CarListing.objects.order_by('id').values_list('id', flat=True))
+        updated = 0
+        for i in range(0, len(listing_ids), batch_size):
+            batch = listing_ids[i:i + batch_size]
+            updated += reconcile_counters(listing_ids=batch)
+
+        cache.delete(POPULAR_CACHE_KEY)
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Contoare reconciliate pentru {updated} anunțuri în {elapsed:.2f}s"
+        ))
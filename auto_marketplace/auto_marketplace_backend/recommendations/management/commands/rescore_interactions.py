@@ -0,0 +1,21 @@
+import time
+from django.core.management.base import BaseCommand
+from recommendations.rescoring import rescore_interactions, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Recalculează scorurile stocate ale interacțiunilor (decăderea în timp), doar pentru rândurile schimbate.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Parcurge tot tabelul, ignorând watermark-ul rulării precedente.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Dimensiunea intervalului de id-uri actualizat într-un UPDATE.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        updated = rescore_interactions(full=options['full'], chunk_size=options['chunk_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Scoruri recalculate: {updated} rânduri actualizate în {elapsed:.2f}s"
+        ))
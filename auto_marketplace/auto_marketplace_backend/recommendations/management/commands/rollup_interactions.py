@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from recommendations.retention import rollup_interactions, retention_days, DEFAULT_BATCH_SIZE
+from recommendations.interaction_matrix import InteractionMatrix
+
+
+class Command(BaseCommand):
+    help = 'Mută interacțiunile mai vechi decât orizontul de retenție în tabelul agregat interaction_rollups.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Orizontul de retenție în zile (implicit RECOMMENDATION_INTERACTION_RETENTION_DAYS).')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Numărul de rânduri mutate și șterse într-o tranzacție.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        days = options['days'] if options['days'] is not None else retention_days()
+
+        moved, user_ids = rollup_interactions(days=days, batch_size=options['batch_size'])
+        if moved:
+            # Matricea nouă conține coloanele rollup-urilor, iar procesele o reîncarcă
+            InteractionMatrix.build().save()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{moved} interacțiuni mai vechi de {days} zile mutate în rollup-uri "
+            f"({len(user_ids)} utilizatori) în {elapsed:.2f}s"
+        ))
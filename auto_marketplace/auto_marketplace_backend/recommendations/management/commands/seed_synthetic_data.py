@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand
+from recommendations.synthetic import seed_synthetic_data, clear_synthetic_data
+
+
+class Command(BaseCommand):
+    help = 'Generează date sintetice (utilizatori, anunțuri, imagini, dotări, favorite, interacțiuni) pentru testarea recomandărilor.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Numărul de utilizatori generați.')
+        parser.add_argument('--listings', type=int, default=5000,
+                            help='Numărul de anunțuri generate.')
+        parser.add_argument('--interactions-per-user', type=int, default=20,
+                            help='Media anunțurilor cu care interacționează un utilizator (distribuție Pareto).')
+        parser.add_argument('--seller-share', type=float, default=0.1,
+                            help='Proporția utilizatorilor care publică anunțuri.')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Seed-ul generatorului aleator.')
+        parser.add_argument('--clear', action='store_true',
+                            help='Șterge mai întâi datele sintetice generate anterior.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        if options['clear']:
+            removed = clear_synthetic_data()
+            self.stdout.write(f"{removed} utilizatori sintetici șterși")
+
+        counts = seed_synthetic_data(
+            options['users'],
+            options['listings'],
+            interactions_per_user=options['interactions_per_user'],
+            seller_share=options['seller_share'],
+            seed=options['seed'],
+        )
+
+        elapsed = time.perf_counter() - start
+        summary = ", ".join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Date sintetice generate în {elapsed:.2f}s: {summary}"))
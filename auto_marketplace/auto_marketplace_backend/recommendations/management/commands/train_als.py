@@ -0,0 +1,44 @@
+import os
+import time
+from django.core.management.base import BaseCommand
+from recommendations.interaction_matrix import load_or_build_interaction_matrix
+from recommendations.als import (
+    ALSModel, DEFAULT_FACTORS, DEFAULT_ITERATIONS, DEFAULT_REGULARIZATION, DEFAULT_ALPHA
+)
+
+
+class Command(BaseCommand):
+    help = 'Antrenează modelul de factorizare matriceală (ALS, feedback implicit) și salvează embeddings-urile.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--factors', type=int, default=DEFAULT_FACTORS,
+                            help='Dimensiunea embeddings-urilor.')
+        parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS,
+                            help='Numărul de iterații ALS.')
+        parser.add_argument('--regularization', type=float, default=DEFAULT_REGULARIZATION,
+                            help='Coeficientul de regularizare L2.')
+        parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA,
+                            help='Încrederea = 1 + alpha * scorul interacțiunii.')
+        parser.add_argument('--threads', type=int, default=os.cpu_count() or 1,
+                            help='Numărul de fire de execuție folosite la antrenare.')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        matrix = load_or_build_interaction_matrix()
+        matrix.catch_up()
+        model = ALSModel.train(
+            matrix,
+            factors=options['factors'],
+            iterations=options['iterations'],
+            regularization=options['regularization'],
+            alpha=options['alpha'],
+            threads=options['threads'],
+        )
+        model.save()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Model ALS antrenat: {len(model.user_ids)} utilizatori, {len(model.listing_ids)} anunțuri, "
+            f"{model.factors} factori, {options['threads']} fire, în {elapsed:.2f}s"
+        ))
@@ -0,0 +1,28 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrecomputedFeed',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('algorithm', models.CharField(default='hybrid', max_length=20)),
+                ('listing_ids', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='precomputed_feeds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'precomputed_feeds',
+                'unique_together': {('user', 'algorithm')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0003_precomputedfeed'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPreferenceProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('brands', models.JSONField(default=dict)),
+                ('car_models', models.JSONField(default=dict)),
+                ('fuel_types', models.JSONField(default=dict)),
+                ('transmission_types', models.JSONField(default=dict)),
+                ('body_types', models.JSONField(default=dict)),
+                ('colors', models.JSONField(default=dict)),
+                ('ranges', models.JSONField(default=dict)),
+                ('item_weights', models.JSONField(default=dict)),
+                ('item_attributes', models.JSONField(default=dict)),
+                ('total_weight', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='preference_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'user_preference_profiles',
+            },
+        ),
+    ]
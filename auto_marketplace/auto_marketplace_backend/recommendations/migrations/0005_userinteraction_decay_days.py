@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0004_userpreferenceprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userinteraction',
+            name='decay_days',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,33 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0005_userinteraction_decay_days'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InteractionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('brand', models.CharField(max_length=50)),
+                ('car_model', models.CharField(max_length=50)),
+                ('interaction_type', models.CharField(choices=[('vizualizare', 'Vizualizare'), ('favorit', 'Favorit'), ('contact', 'Contact')], max_length=15)),
+                ('interaction_count', models.FloatField(default=0.0)),
+                ('listing_count', models.PositiveIntegerField(default=0)),
+                ('weight', models.FloatField(default=0.0)),
+                ('last_interaction', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='interaction_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'interaction_rollups',
+                'unique_together': {('user', 'brand', 'car_model', 'interaction_type')},
+            },
+        ),
+    ]
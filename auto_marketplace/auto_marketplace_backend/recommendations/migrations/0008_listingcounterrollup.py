@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0001_initial'),
+        ('recommendations', '0007_interactiontombstone'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingCounterRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_count', models.PositiveIntegerField(default=0)),
+                ('contact_count', models.PositiveIntegerField(default=0)),
+                ('interaction_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('car_listing', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='counter_rollup', to='listings.carlisting')),
+            ],
+            options={
+                'db_table': 'listing_counter_rollups',
+            },
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 from users.models import User
 from listings.models import CarListing
+from .scoring import base_score
 
 class UserInteraction(models.Model):
     INTERACTION_CHOICES = (
@@ -18,6 +19,8 @@ class UserInteraction(models.Model):
     first_interaction = models.DateTimeField(auto_now_add=True)
  
     interaction_score = models.FloatField(default=0.0)
+    # Treapta de decădere (zile, max. 30) aplicată în interaction_score; actualizată de rescore_interactions
+    decay_days = models.PositiveSmallIntegerField(default=0)
     
     class Meta:
         db_table = 'user_interactions'
@@ -32,20 +35,10 @@ class UserInteraction(models.Model):
         return f"{self.user.username} - {self.car_listing} - {self.interaction_type}"
     
     def save(self, *args, **kwargs):
-        
-        if self.interaction_type == 'favorit':
-            self.interaction_score = 50.0
-        elif self.interaction_type == 'contact':
-            self.interaction_score = self.interaction_count * 5.0
-        else:  
-            self.interaction_score = self.interaction_count * 0.1
-            
-     
-        days_since_first = (timezone.now() - self.first_interaction).days if self.first_interaction else 0
-        if days_since_first > 0:
-            decay_factor = 1.0 / (1.0 + 0.1 * days_since_first)  
-            self.interaction_score *= decay_factor
-            
+        # last_interaction devine momentul salvării (auto_now), deci decăderea este încă 1;
+        # comanda rescore_interactions o aplică pe măsură ce interacțiunea îmbătrânește
+        self.interaction_score = base_score(self.interaction_type, self.interaction_count)
+        self.decay_days = 0
         super().save(*args, **kwargs)
     
     @classmethod
@@ -100,3 +93,111 @@ class UserInteraction(models.Model):
         
         
         return preferences
+
+
+class PrecomputedFeed(models.Model):
+    """
+    Feed-ul "pentru tine" calculat în avans (comanda precompute_feeds),
+    servit direct de API cât timp utilizatorul nu are interacțiuni mai noi.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='precomputed_feeds')
+    algorithm = models.CharField(max_length=20, default='hybrid')
+    listing_ids = models.JSONField(default=list)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'precomputed_feeds'
+        unique_together = ('user', 'algorithm')
+
+    def __str__(self):
+        return f"{self.user_id} - {self.algorithm} ({len(self.listing_ids)} anunțuri)"
+
+
+class UserPreferenceProfile(models.Model):
+    """
+    Preferințele agregate ale utilizatorului (contoare ponderate și
+    statistici de preț, an, kilometraj, putere), actualizate incremental la
+    fiecare interacțiune sau favorit. item_weights păstrează ponderea curentă
+    a fiecărui anunț, iar item_attributes cheile și valorile cu care a
+    contribuit, ca o modificare să-și poată înlocui exact contribuția chiar
+    dacă anunțul a fost editat sau șters între timp.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='preference_profile')
+    brands = models.JSONField(default=dict)
+    car_models = models.JSONField(default=dict)
+    fuel_types = models.JSONField(default=dict)
+    transmission_types = models.JSONField(default=dict)
+    body_types = models.JSONField(default=dict)
+    colors = models.JSONField(default=dict)
+    ranges = models.JSONField(default=dict)
+    item_weights = models.JSONField(default=dict)
+    item_attributes = models.JSONField(default=dict)
+    total_weight = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'user_preference_profiles'
+
+    def __str__(self):
+        return f"Profil preferințe {self.user_id}"
+
+
+class InteractionRollup(models.Model):
+    """
+    Interacțiunile mai vechi decât orizontul de retenție, agregate pe
+    (utilizator, marcă, model, tip) de comanda rollup_interactions.
+    weight este suma ponderilor cu decădere ale rândurilor mutate, pe scala
+    profilului de preferințe (vezi preferences._apply_rollups).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='interaction_rollups')
+    brand = models.CharField(max_length=50)
+    car_model = models.CharField(max_length=50)
+    interaction_type = models.CharField(max_length=15, choices=UserInteraction.INTERACTION_CHOICES)
+    interaction_count = models.FloatField(default=0.0)
+    listing_count = models.PositiveIntegerField(default=0)
+    weight = models.FloatField(default=0.0)
+    last_interaction = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'interaction_rollups'
+        unique_together = ('user', 'brand', 'car_model', 'interaction_type')
+
+    def __str__(self):
+        return f"{self.user_id} - {self.brand} {self.car_model} - {self.interaction_type}"
+
+
+class ListingCounterRollup(models.Model):
+    """
+    Partea contoarelor unui anunț provenită din interacțiunile mutate de
+    retenție (rânduri pe tip), adunată de reconcile_counters peste
+    rândurile rămase în user_interactions.
+    """
+    car_listing = models.OneToOneField(CarListing, on_delete=models.CASCADE, related_name='counter_rollup')
+    view_count = models.PositiveIntegerField(default=0)
+    contact_count = models.PositiveIntegerField(default=0)
+    interaction_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'listing_counter_rollups'
+
+    def __str__(self):
+        return f"{self.car_listing_id}: {self.interaction_count} interacțiuni agregate"
+
+class InteractionTombstone(models.Model):
+    """
+    Perechile (utilizator, anunț) ale interacțiunilor și favoritelor șterse,
+    ca matricele de interacțiuni încărcate de pe disc să le poată scoate la
+    catch_up. Fără chei externe: rândul trebuie să supraviețuiască ștergerii
+    utilizatorului sau anunțului. Sunt șterse la salvarea unei matrice noi.
+    """
+    user_id = models.BigIntegerField()
+    car_listing_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        db_table = 'interaction_tombstones'
+
+    def __str__(self):
+        return f"{self.user_id} - {self.car_listing_id} (șters {self.deleted_at})"
@@ -0,0 +1,123 @@
+import logging
+from django.core.cache import cache
+from django.db.models import F, Count, OuterRef, Subquery, Value, Case, When
+from django.db.models.functions import Coalesce
+from listings.models import CarListing, CarImage, Favorite
+from .models import UserInteraction, ListingCounterRollup
+
+logger = logging.getLogger(__name__)
+
+# Popularitate = numărul de interacțiuni + 2 * numărul de favorite
+FAVORITE_POPULARITY = 2
+
+POPULAR_CACHE_KEY = 'recommendations:popular_listings'
+POPULAR_CACHE_SIZE = 200
+POPULAR_CACHE_TIMEOUT = 5 * 60
+
+TYPE_COUNTERS = {
+    'vizualizare': 'view_count',
+    'contact': 'contact_count',
+}
+
+
+def _add(field, delta):
+    if delta >= 0:
+        return F(field) + delta
+    # Coloanele sunt UNSIGNED în MySQL: scăderea se face doar când nu trece sub zero
+    return Case(When(**{f'{field}__gte': -delta}, then=F(field) + delta), default=Value(0))
+
+
+def interaction_counted(listing_id, interaction_type, delta):
+    """Actualizează atomic contoarele anunțului la crearea (+1) sau ștergerea (-1) unei interacțiuni."""
+    fields = {'popularity_score': _add('popularity_score', delta)}
+    counter = TYPE_COUNTERS.get(interaction_type)
+    if counter:
+        fields[counter] = _add(counter, delta)
+    CarListing.objects.filter(id=listing_id).update(**fields)
+
+
+def favorite_counted(listing_id, delta):
+    CarListing.objects.filter(id=listing_id).update(
+        favorite_count=_add('favorite_count', delta),
+        popularity_score=_add('popularity_score', delta * FAVORITE_POPULARITY),
+    )
+
+
+def _main_image_subquery():
+    return Subquery(
+        CarImage.objects.filter(car_listing=OuterRef('pk')).order_by('-is_main', 'id').values('id')[:1]
+    )
+
+
+def refresh_main_image(listing_id):
+    """Imaginea principală: cea marcată is_main, altfel prima încărcată."""
+    CarListing.objects.filter(id=listing_id).update(main_image=_main_image_subquery())
+
+
+def _count_subquery(queryset):
+    counts = queryset.filter(car_listing=OuterRef('pk')).order_by().values('car_listing').annotate(
+        total=Count('id')
+    ).values('total')
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def _carried_over(field):
+    """Contorul păstrat de retenție pentru rândurile mutate în rollup-uri (0 dacă nu există)."""
+    carried = ListingCounterRollup.objects.filter(car_listing=OuterRef('pk')).values(field)[:1]
+    return Coalesce(Subquery(carried), Value(0))
+
+
+def reconcile_counters(listing_ids=None):
+    """
+    Recalculează contoarele din tabelele sursă, cu câte o subinterogare
+    corelată per contor (fără join-ul interacțiuni x favorite), plus partea
+    interacțiunilor mutate de retenție (listing_counter_rollups).
+    Returnează numărul de anunțuri actualizate.
+    """
+    listings = CarListing.objects.all()
+    if listing_ids is not None:
+        listings = listings.filter(id__in=listing_ids)
+
+    interactions = _count_subquery(UserInteraction.objects.all()) + _carried_over('interaction_count')
+    favorites = _count_subquery(Favorite.objects.all())
+    return listings.update(
+        view_count=_count_subquery(
+            UserInteraction.objects.filter(interaction_type='vizualizare')
+        ) + _carried_over('view_count'),
+        contact_count=_count_subquery(
+            UserInteraction.objects.filter(interaction_type='contact')
+        ) + _carried_over('contact_count'),
+        favorite_count=favorites,
+        popularity_score=interactions + favorites * FAVORITE_POPULARITY,
+        main_image=_main_image_subquery(),
+    )
+
+
+def popular_listing_pairs():
+    """
+    Primele POPULAR_CACHE_SIZE anunțuri după popularitate, ca perechi
+    (listing_id, user_id), păstrate în cache câteva minute. Cache-ul nu este
+    invalidat la interacțiuni (ar expira la fiecare vizualizare), deci
+    ordinea poate rămâne în urmă cel mult POPULAR_CACHE_TIMEOUT.
+    """
+    pairs = cache.get(POPULAR_CACHE_KEY)
+    if pairs is None:
+        pairs = list(CarListing.objects.order_by('-popularity_score', '-created_at').values_list(
+            'id', 'user_id'
+        )[:POPULAR_CACHE_SIZE])
+        cache.set(POPULAR_CACHE_KEY, pairs, timeout=POPULAR_CACHE_TIMEOUT)
+    return pairs
+
+
+def popular_listing_ids(limit, exclude_user_id=None):
+    """Id-urile celor mai populare anunțuri, fără cele ale utilizatorului dat."""
+    pairs = popular_listing_pairs()
+    ids = [listing_id for listing_id, owner_id in pairs if owner_id != exclude_user_id][:limit]
+
+    if len(ids) < limit and len(pairs) >= POPULAR_CACHE_SIZE:
+        # Cererea depășește lista din cache: citire directă pe index
+        listings = CarListing.objects.order_by('-popularity_score', '-created_at')
+        if exclude_user_id is not None:
+            listings = listings.exclude(user_id=exclude_user_id)
+        ids = list(listings.values_list('id', flat=True)[:limit])
+    return ids
@@ -0,0 +1,157 @@
+import datetime
+import logging
+import multiprocessing
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from listings.models import Favorite
+from users.models import User
+from .models import UserInteraction, PrecomputedFeed
+
+logger = logging.getLogger(__name__)
+
+FEED_SIZE = 12
+
+
+def active_user_ids(days, incremental=False, algorithm='hybrid'):
+    """
+    Utilizatorii activi în ultimele `days` zile care au cel puțin o
+    interacțiune sau un favorit. În modul incremental se păstrează doar cei
+    fără feed sau cu interacțiuni mai noi decât feed-ul existent.
+    """
+    since = timezone.now() - datetime.timedelta(days=days)
+    users = User.objects.filter(last_activity__gte=since, is_active=True).filter(
+        Exists(UserInteraction.objects.filter(user=OuterRef('pk'))) |
+        Exists(Favorite.objects.filter(user=OuterRef('pk')))
+    )
+
+    if incremental:
+        feeds = PrecomputedFeed.objects.filter(user=OuterRef('pk'), algorithm=algorithm)
+        stale = feeds.filter(
+            Exists(UserInteraction.objects.filter(
+                user=OuterRef('user'), last_interaction__gt=OuterRef('computed_at')
+            )) |
+            Exists(Favorite.objects.filter(
+                user=OuterRef('user'), created_at__gt=OuterRef('computed_at')
+            ))
+        )
+        users = users.filter(~Exists(feeds) | Exists(stale))
+
+    return list(users.order_by('id').values_list('id', flat=True))
+
+
+def load_snapshot():
+    """
+    Încarcă în procesul curent matricea de interacțiuni, indexurile și
+    coloanele anunțurilor. Procesele create ulterior prin fork le moștenesc
+    (copy-on-write), deci nu le mai încarcă fiecare.
+    """
+    from .interaction_matrix import get_interaction_matrix
+    from .item_similarity import get_item_similarity_index
+    from .feature_index import get_listing_feature_index
+    from .content_engine import get_listing_columns
+
+    get_interaction_matrix()
+    get_item_similarity_index()
+    get_listing_feature_index()
+    get_listing_columns()
+
+
+def compute_feeds(user_ids):
+    """Calculează feed-ul hibrid pentru fiecare utilizator. Returnează [(user_id, listing_ids)]."""
+    from .views import hybrid_recommendations
+
+    results = []
+    for user in User.objects.filter(id__in=user_ids):
+        try:
+            recommendations = hybrid_recommendations(user)
+            results.append((user.id, [listing.id for listing in recommendations[:FEED_SIZE]]))
+        except Exception as e:
+            logger.exception(f"Eroare la precalcularea feed-ului pentru utilizatorul {user.id}: {str(e)}")
+    return results
+
+
+def write_feeds(results, computed_at, algorithm='hybrid'):
+    """Înlocuiește feed-urile utilizatorilor dați printr-o singură inserare în bloc."""
+    if not results:
+        return 0
+    with transaction.atomic():
+        PrecomputedFeed.objects.filter(
+            user_id__in=[user_id for user_id, _ in results], algorithm=algorithm
+        ).delete()
+        PrecomputedFeed.objects.bulk_create([
+            PrecomputedFeed(user_id=user_id, algorithm=algorithm, listing_ids=listing_ids, computed_at=computed_at)
+            for user_id, listing_ids in results
+        ], batch_size=1000)
+    return len(results)
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+    # Fiecare proces își deschide propria conexiune la baza de date
+    connections.close_all()
+
+
+def precompute_feeds(user_ids, workers=1, chunk_size=200, algorithm='hybrid'):
+    """
+    Împarte utilizatorii în loturi de chunk_size și le calculează feed-urile
+    pe `workers` procese. Procesul principal scrie rezultatele pe măsură ce
+    loturile se termină. Returnează numărul de feed-uri scrise.
+    """
+    load_snapshot()
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+    written = 0
+
+    if workers <= 1:
+        for chunk in chunks:
+            computed_at = timezone.now()
+            written += write_feeds(compute_feeds(chunk), computed_at, algorithm)
+        return written
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+
+    connections.close_all()
+    with context.Pool(processes=workers, initializer=_init_worker) as pool:
+        # Momentul calculului este luat înainte de lansarea loturilor, astfel
+        # încât interacțiunile apărute în timpul rulării să marcheze feed-ul ca vechi.
+        computed_at = timezone.now()
+        for results in pool.imap_unordered(compute_feeds, chunks):
+            written += write_feeds(results, computed_at, algorithm)
+            logger.info(f"Feed-uri precalculate: {written}/{len(user_ids)}")
+
+    return written
+
+
+def discard_precomputed_feeds(user_ids):
+    """
+    Șterge feed-urile precalculate ale utilizatorilor dați. Necesar când
+    istoricul lor pierde rânduri (favorit sau interacțiune ștearsă, rollup),
+    pe care get_precomputed_feed nu le poate observa prin comparația datelor.
+    """
+    user_ids = list(user_ids)
+    deleted = 0
+    for start in range(0, len(user_ids), 1000):
+        deleted += PrecomputedFeed.objects.filter(user_id__in=user_ids[start:start + 1000]).delete()[0]
+    return deleted
+
+
+def get_precomputed_feed(user, algorithm='hybrid'):
+    """
+    Id-urile din feed-ul precalculat al utilizatorului sau None dacă nu
+    există ori dacă utilizatorul a interacționat între timp cu alte anunțuri.
+    Ștergerile din istoric elimină feed-ul (discard_precomputed_feeds).
+    """
+    feed = PrecomputedFeed.objects.filter(user=user, algorithm=algorithm).only('listing_ids', 'computed_at').first()
+    if feed is None:
+        return None
+
+    newer_interactions = UserInteraction.objects.filter(user=user, last_interaction__gt=feed.computed_at).exists()
+    if newer_interactions or Favorite.objects.filter(user=user, created_at__gt=feed.computed_at).exists():
+        return None
+
+    return feed.listing_ids
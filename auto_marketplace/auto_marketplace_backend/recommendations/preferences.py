@@ -0,0 +1,291 @@
+import logging
+from collections import Counter
+from django.db import transaction
+from django.db.models import Max, Case, When, IntegerField
+from listings.models import CarListing, Favorite
+from .models import UserInteraction, UserPreferenceProfile, InteractionRollup
+
+logger = logging.getLogger(__name__)
+
+FAVORITE_WEIGHT = 50.0
+CONTACT_WEIGHT = 5.0
+VIEW_WEIGHT = 0.01
+
+ROLLUP_WEIGHTS = {
+    'favorit': FAVORITE_WEIGHT,
+    'contact': CONTACT_WEIGHT,
+    'vizualizare': VIEW_WEIGHT,
+}
+
+COUNTER_FIELDS = ['brands', 'models', 'fuel_types', 'transmission_types', 'body_types', 'colors']
+
+# Câmpul 'models' ar ascunde modulul django.db.models în definiția modelului
+PROFILE_ATTRS = {field: field for field in COUNTER_FIELDS}
+PROFILE_ATTRS['models'] = 'car_models'
+
+RANGE_FIELDS = {
+    'price': 'price',
+    'mileage': 'mileage',
+    'year': 'year_of_manufacture',
+    'power': 'power',
+}
+
+PROFILE_LISTING_FIELDS = ['id', 'brand', 'model', 'fuel_type', 'transmission', 'body_type', 'color'] + list(RANGE_FIELDS.values())
+
+EPSILON = 1e-9
+
+
+def listing_weights(user_id, listing_ids=None):
+    """
+    Ponderea fiecărui anunț în profilul utilizatorului: favorit 50, contact 5,
+    vizualizare 0.01. Tipurile de interacțiune sunt grupate pe anunț într-o
+    singură interogare.
+    """
+    interactions = UserInteraction.objects.filter(user_id=user_id)
+    favorites = Favorite.objects.filter(user_id=user_id)
+    if listing_ids is not None:
+        interactions = interactions.filter(car_listing_id__in=listing_ids)
+        favorites = favorites.filter(car_listing_id__in=listing_ids)
+
+    grouped = interactions.values('car_listing_id').annotate(
+        is_favorite=Max(Case(When(interaction_type='favorit', then=1), default=0, output_field=IntegerField())),
+        has_contact=Max(Case(When(interaction_type='contact', then=1), default=0, output_field=IntegerField())),
+    )
+
+    weights = {}
+    for row in grouped:
+        if row['is_favorite']:
+            weights[row['car_listing_id']] = FAVORITE_WEIGHT
+        elif row['has_contact']:
+            weights[row['car_listing_id']] = CONTACT_WEIGHT
+        else:
+            weights[row['car_listing_id']] = VIEW_WEIGHT
+
+    for listing_id in favorites.values_list('car_listing_id', flat=True):
+        weights[listing_id] = FAVORITE_WEIGHT
+
+    return weights
+
+
+def _counter_keys(listing):
+    keys = {
+        'brands': listing.brand,
+        'models': f"{listing.brand} {listing.model}",
+        'fuel_types': listing.fuel_type,
+        'transmission_types': listing.transmission,
+    }
+    if getattr(listing, 'body_type', None):
+        keys['body_types'] = listing.body_type
+    if getattr(listing, 'color', None):
+        keys['colors'] = listing.color
+    return keys
+
+
+def empty_profile_data():
+    return {
+        'counters': {field: {} for field in COUNTER_FIELDS},
+        'ranges': {name: {'sum': 0.0, 'min': None, 'max': None} for name in RANGE_FIELDS},
+        'total_weight': 0.0,
+        'item_weights': {},
+        'item_attributes': {},
+    }
+
+
+def _listing_attributes(listing):
+    """Cheile contoarelor și valorile intervalelor cu care anunțul intră în profil."""
+    return {
+        'keys': _counter_keys(listing),
+        'values': {name: getattr(listing, attr) or 0 for name, attr in RANGE_FIELDS.items()},
+    }
+
+
+def _add_attributes(data, attributes, weight):
+    for field, key in attributes['keys'].items():
+        counter = data['counters'][field]
+        value = counter.get(key, 0.0) + weight
+        if abs(value) < EPSILON:
+            counter.pop(key, None)
+        else:
+            counter[key] = value
+
+    for name, value in attributes['values'].items():
+        data['ranges'][name]['sum'] += value * weight
+    data['total_weight'] += weight
+
+
+def _update_bounds(data, values):
+    for name, value in values.items():
+        stats = data['ranges'][name]
+        if value > 0 and (stats['min'] is None or value < stats['min']):
+            stats['min'] = value
+        if stats['max'] is None or value > stats['max']:
+            stats['max'] = value
+
+
+def _apply_listing(data, listing_id, listing, old_weight, new_weight):
+    """
+    Înlocuiește contribuția unui anunț (old_weight) cu new_weight. Contribuția
+    veche este scăzută cu atributele salvate în item_attributes, nu cu cele
+    curente ale anunțului, care s-ar fi putut modifica între timp. listing
+    este None pentru un anunț șters.
+    """
+    item = str(listing_id)
+    if old_weight:
+        _add_attributes(data, data['item_attributes'][item], -old_weight)
+
+    if new_weight > 0:
+        attributes = _listing_attributes(listing)
+        _add_attributes(data, attributes, new_weight)
+        _update_bounds(data, attributes['values'])
+        data['item_weights'][item] = new_weight
+        data['item_attributes'][item] = attributes
+    else:
+        data['item_weights'].pop(item, None)
+        data['item_attributes'].pop(item, None)
+
+
+def _recompute_bounds(data):
+    """Recalculează min/max după eliminarea unui anunț (nu pot fi scăzute incremental)."""
+    for stats in data['ranges'].values():
+        stats['min'] = None
+        stats['max'] = None
+
+    for attributes in data['item_attributes'].values():
+        _update_bounds(data, attributes['values'])
+
+
+def profile_data_for_listings(listings, weights):
+    data = empty_profile_data()
+    for listing in listings:
+        weight = weights.get(listing.id, 1.0)
+        _apply_listing(data, listing.id, listing, 0.0, weight)
+    return data
+
+
+def preferences_from_data(data):
+    """
+    Transformă datele agregate în structura de preferințe folosită de
+    algoritmi: contoare filtrate (>= 2 sau >= 10% din total) și intervale
+    cu media ponderată.
+    """
+    preferences = {}
+    for field in COUNTER_FIELDS:
+        counter = Counter(data['counters'][field])
+        total = sum(counter.values())
+        if total > 0:
+            counter = Counter({k: v for k, v in counter.items() if v >= 2 or (v / total) >= 0.1})
+        preferences[field] = counter
+
+    total_weight = data['total_weight']
+    for name in RANGE_FIELDS:
+        stats = data['ranges'][name]
+        preferences[f'{name}_range'] = {
+            'min': stats['min'],
+            'max': stats['max'],
+            'avg': stats['sum'] / total_weight if total_weight > EPSILON else 0,
+        }
+    return preferences
+
+
+def _profile_data(profile):
+    data = {'counters': {field: dict(getattr(profile, PROFILE_ATTRS[field])) for field in COUNTER_FIELDS}}
+    data['ranges'] = {name: dict(stats) for name, stats in profile.ranges.items()} if profile.ranges else empty_profile_data()['ranges']
+    data['total_weight'] = profile.total_weight
+    data['item_weights'] = dict(profile.item_weights)
+    data['item_attributes'] = dict(profile.item_attributes)
+    return data
+
+
+def _store_profile_data(profile, data):
+    for field in COUNTER_FIELDS:
+        setattr(profile, PROFILE_ATTRS[field], data['counters'][field])
+    profile.ranges = data['ranges']
+    profile.total_weight = data['total_weight']
+    profile.item_weights = data['item_weights']
+    profile.item_attributes = data['item_attributes']
+
+
+def _apply_rollups(data, user_id):
+    """
+    Adaugă interacțiunile agregate de retenție la contoarele de mărci și
+    modele, cu ponderea cu decădere calculată la agregare (weight).
+    Intervalele (preț, an etc.) rămân doar din interacțiunile recente.
+    """
+    rollups = InteractionRollup.objects.filter(user_id=user_id).values_list('brand', 'car_model', 'weight')
+    for brand, model, weight in rollups:
+        for field, key in (('brands', brand), ('models', f"{brand} {model}")):
+            counter = data['counters'][field]
+            counter[key] = counter.get(key, 0.0) + weight
+
+
+def build_profile_data(user_id):
+    """
+    Profilul calculat din tot istoricul: o interogare pentru ponderi, una
+    pentru anunțuri și una pentru rollup-urile de retenție.
+    """
+    weights = listing_weights(user_id)
+    listings = CarListing.objects.filter(id__in=list(weights)).only(*PROFILE_LISTING_FIELDS)
+    data = profile_data_for_listings(listings, weights)
+    _apply_rollups(data, user_id)
+    return data
+
+
+def rebuild_preference_profile(user_id):
+    profile, _ = UserPreferenceProfile.objects.get_or_create(user_id=user_id)
+    _store_profile_data(profile, build_profile_data(user_id))
+    profile.save()
+    return profile
+
+
+def get_preference_profile(user_id):
+    """Profilul persistat al utilizatorului; este construit la prima cerere."""
+    profile = UserPreferenceProfile.objects.filter(user_id=user_id).first()
+    if profile is None:
+        profile = rebuild_preference_profile(user_id)
+    return profile
+
+
+def update_preference_profile(user_id, listing_ids):
+    """
+    Actualizează incremental profilul după o interacțiune sau un favorit pe
+    anunțurile date: se înlocuiește doar contribuția acestora.
+    """
+    with transaction.atomic():
+        profile = UserPreferenceProfile.objects.select_for_update().filter(user_id=user_id).first()
+        if profile is None:
+            # Construirea completă include deja modificarea curentă
+            rebuild_preference_profile(user_id)
+            return
+
+        data = _profile_data(profile)
+        weights = listing_weights(user_id, listing_ids)
+        listings = {
+            listing.id: listing
+            for listing in CarListing.objects.filter(id__in=listing_ids).only(*PROFILE_LISTING_FIELDS)
+        }
+        if set(data['item_weights']) - set(data['item_attributes']):
+            # Contribuții fără atributele salvate nu pot fi scăzute exact
+            _store_profile_data(profile, build_profile_data(user_id))
+            profile.save()
+            return
+
+        removed = False
+        for listing_id in set(listing_ids):
+            old_weight = data['item_weights'].get(str(listing_id), 0.0)
+            # Un anunț șters nu mai are pondere; contribuția lui se scade cu atributele salvate
+            new_weight = weights.get(listing_id, 0.0) if listing_id in listings else 0.0
+            if old_weight == new_weight:
+                continue
+            _apply_listing(data, listing_id, listings.get(listing_id), old_weight, new_weight)
+            removed = removed or new_weight == 0
+
+        if removed:
+            _recompute_bounds(data)
+
+        _store_profile_data(profile, data)
+        profile.save()
+
+
+def user_preferences(user_id):
+    """Preferințele utilizatorului citite din profilul persistat."""
+    return preferences_from_data(_profile_data(get_preference_profile(user_id)))
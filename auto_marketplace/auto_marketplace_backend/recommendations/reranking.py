@@ -0,0 +1,175 @@
+import time
+import numpy as np
+
+DAY_SECONDS = 86400
+
+
+class Candidates:
+    """
+    Lista ordonată de candidați cu atributele necesare re-rankingului, ținute
+    ca array-uri paralele (id, scor, marcă, model, combustibil, dată).
+    Codurile categoriale sunt cele din ListingColumns (-1 = lipsă).
+    """
+
+    def __init__(self, ids, scores, brand, model, fuel, created_ts):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.brand = np.asarray(brand)
+        self.model = np.asarray(model)
+        self.fuel = np.asarray(fuel)
+        self.created_ts = np.asarray(created_ts, dtype=np.float64)
+
+    @classmethod
+    def from_columns(cls, columns, positions, scores=None):
+        """
+        Candidații de pe pozițiile date din coloane, în ordinea dată. Fără
+        scoruri explicite, scorul descrește liniar cu poziția.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if scores is None:
+            scores = 1.0 - np.arange(len(positions)) / max(len(positions), 1)
+        return cls(
+            columns.ids[positions],
+            scores,
+            columns.codes['brand'][positions],
+            columns.codes['model'][positions],
+            columns.codes['fuel_type'][positions],
+            columns.created_ts[positions],
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def take(self, order):
+        order = np.asarray(order, dtype=np.int64)
+        return Candidates(
+            self.ids[order], self.scores[order], self.brand[order],
+            self.model[order], self.fuel[order], self.created_ts[order]
+        )
+
+
+def _stable_partition(front):
+    """Ordinea care aduce în față elementele marcate, păstrând ordinea relativă."""
+    return np.concatenate([np.flatnonzero(front), np.flatnonzero(~front)])
+
+
+class BrandCap:
+    """
+    Cel mult max_per_brand anunțuri din aceeași marcă în fața listei; cele
+    peste plafon sunt mutate, în ordine, după cele acceptate. O singură
+    trecere cu un contor per marcă.
+    """
+
+    def __init__(self, max_per_brand=4):
+        self.max_per_brand = max_per_brand
+
+    def __call__(self, candidates):
+        counts = {}
+        accepted = np.zeros(len(candidates), dtype=bool)
+        for i, brand in enumerate(candidates.brand.tolist()):
+            count = counts.get(brand, 0)
+            if count < self.max_per_brand:
+                counts[brand] = count + 1
+                accepted[i] = True
+        return candidates.take(_stable_partition(accepted))
+
+
+class FuelBoost:
+    """
+    Aduce în față primele `reserved` anunțuri cu combustibilul preferat
+    (toate, dacă reserved este None), păstrând ordinea în rest. Celelalte
+    anunțuri cu același combustibil sunt mutate la final, ca pozițiile
+    rămase să revină altor combustibili.
+    """
+
+    def __init__(self, fuel_code, reserved=None):
+        self.fuel_code = fuel_code
+        self.reserved = reserved
+
+    def __call__(self, candidates):
+        if self.fuel_code is None or self.fuel_code < 0:
+            return candidates
+        preferred = candidates.fuel == self.fuel_code
+        if self.reserved is None:
+            return candidates.take(_stable_partition(preferred))
+
+        front = preferred & (np.cumsum(preferred) <= self.reserved)
+        back = preferred & ~front
+        return candidates.take(np.concatenate([
+            np.flatnonzero(front), np.flatnonzero(~preferred), np.flatnonzero(back)
+        ]))
+
+
+class FreshnessBoost:
+    """Scor * (1 + weight * prospețime), unde prospețimea scade liniar pe horizon_days."""
+
+    def __init__(self, weight=0.2, horizon_days=30, now=None):
+        self.weight = weight
+        self.horizon_days = horizon_days
+        self.now = now
+
+    def __call__(self, candidates):
+        now = self.now or time.time()
+        days = np.floor((now - candidates.created_ts) / DAY_SECONDS)
+        freshness = np.maximum(0, (self.horizon_days - days) / self.horizon_days)
+        candidates.scores = candidates.scores * (1.0 + self.weight * freshness)
+        return candidates.take(np.argsort(-candidates.scores, kind='stable'))
+
+
+class MMRDiversity:
+    """
+    Diversitate de tip MMR într-o singură trecere: scorul devine
+    lambda_ * relevanță - (1 - lambda_) * similaritatea maximă față de
+    anunțurile aflate mai sus în listă (același model > aceeași marcă >
+    același combustibil), apoi lista este reordonată după acest scor.
+    Spre deosebire de MMR-ul greedy (O(n * k)), „mai sus în listă” înseamnă
+    ordinea inițială, deci similaritatea se reduce la „nu este prima
+    apariție a modelului / mărcii / combustibilului”, calculată cu np.unique.
+    """
+
+    def __init__(self, lambda_=0.7, model_similarity=1.0, brand_similarity=0.7, fuel_similarity=0.3):
+        self.lambda_ = lambda_
+        self.model_similarity = model_similarity
+        self.brand_similarity = brand_similarity
+        self.fuel_similarity = fuel_similarity
+
+    @staticmethod
+    def _repeated(*codes):
+        """Masca elementelor care nu sunt prima apariție a combinației de coduri (codurile lipsă nu se repetă)."""
+        keys = np.stack([np.asarray(c, dtype=np.int64) for c in codes], axis=1)
+        _, first = np.unique(keys, axis=0, return_index=True)
+        repeated = np.ones(len(keys), dtype=bool)
+        repeated[first] = False
+        return repeated & (keys >= 0).all(axis=1)
+
+    def __call__(self, candidates):
+        n = len(candidates)
+        if n == 0:
+            return candidates
+
+        scores = candidates.scores
+        span = scores.max() - scores.min()
+        relevance = (scores - scores.min()) / span if span > 0 else np.ones(n)
+
+        similarity = np.where(self._repeated(candidates.fuel), self.fuel_similarity, 0.0)
+        similarity = np.where(self._repeated(candidates.brand), self.brand_similarity, similarity)
+        similarity = np.where(self._repeated(candidates.brand, candidates.model), self.model_similarity, similarity)
+
+        mmr = self.lambda_ * relevance - (1 - self.lambda_) * similarity
+        return candidates.take(np.argsort(-mmr, kind='stable'))
+
+
+class Truncate:
+    def __init__(self, limit):
+        self.limit = limit
+
+    def __call__(self, candidates):
+        return candidates.take(np.arange(min(self.limit, len(candidates))))
+
+
+def rerank(candidates, stages, limit=None):
+    """Aplică etapele în ordine și returnează primele `limit` id-uri."""
+    for stage in stages:
+        candidates = stage(candidates)
+    ids = candidates.ids.tolist()
+    return ids[:limit] if limit is not None else ids
@@ -0,0 +1,86 @@
+import datetime
+import logging
+import numpy as np
+from django.db.models import Case, When, Value, F, FloatField, Min, Max
+from django.utils import timezone
+from .models import UserInteraction
+from .artifacts import save_arrays, load_arrays
+from .scoring import INTERACTION_WEIGHTS, DECAY_HORIZON_DAYS, time_decay
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_ARTIFACT = 'interaction_rescore'
+
+DEFAULT_CHUNK_SIZE = 50000
+
+
+def load_watermark():
+    """Momentul ultimei recalculări complete a scorurilor sau None."""
+    arrays = load_arrays(WATERMARK_ARTIFACT, mmap=False)
+    if arrays is None:
+        return None
+    return datetime.datetime.fromtimestamp(float(arrays['watermark'][0]), tz=datetime.timezone.utc)
+
+
+def save_watermark(moment):
+    save_arrays(WATERMARK_ARTIFACT, watermark=np.array([moment.timestamp()], dtype=np.float64))
+
+
+def stored_scores_current(now=None, max_age=datetime.timedelta(days=1)):
+    """
+    True dacă interaction_score a fost recalculat recent, deci poate fi citit
+    direct (diferă de scorul calculat acum cu cel mult o treaptă de decădere).
+    """
+    watermark = load_watermark()
+    now = now or timezone.now()
+    return watermark is not None and now - watermark <= max_age
+
+
+def _weight_expression():
+    return Case(
+        *[When(interaction_type=t, then=Value(w)) for t, w in INTERACTION_WEIGHTS.items()],
+        default=Value(1.0),
+        output_field=FloatField()
+    )
+
+
+def _bucket_filter(queryset, bucket, now):
+    """Rândurile aflate acum în treapta de decădere dată (aceeași regulă ca scoring.days_old)."""
+    queryset = queryset.filter(last_interaction__lte=now - datetime.timedelta(days=int(bucket)))
+    if bucket < DECAY_HORIZON_DAYS:
+        queryset = queryset.filter(last_interaction__gt=now - datetime.timedelta(days=int(bucket) + 1))
+    return queryset
+
+
+def rescore_interactions(now=None, full=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Recalculează interaction_score = pondere * număr * decădere cu câte un
+    UPDATE pe treaptă de decădere (0..30 zile) și pe interval de id-uri, doar
+    pentru rândurile a căror treaptă s-a schimbat (decay_days diferit).
+    Rândurile mai vechi decât watermark - 31 de zile erau deja la treapta
+    maximă la rularea precedentă, deci nu mai sunt citite; cu full=True se
+    parcurge tot tabelul. Returnează numărul de rânduri actualizate.
+    """
+    now = now or timezone.now()
+    watermark = None if full else load_watermark()
+
+    rows = UserInteraction.objects.all()
+    if watermark is not None:
+        rows = rows.filter(last_interaction__gt=watermark - datetime.timedelta(days=DECAY_HORIZON_DAYS + 1))
+
+    bounds = rows.aggregate(min_id=Min('id'), max_id=Max('id'))
+    updated = 0
+    if bounds['min_id'] is not None:
+        weight = _weight_expression()
+        for start in range(bounds['min_id'], bounds['max_id'] + 1, chunk_size):
+            chunk = rows.filter(id__gte=start, id__lt=start + chunk_size)
+            for bucket in range(DECAY_HORIZON_DAYS + 1):
+                decay = float(time_decay(bucket))
+                updated += _bucket_filter(chunk, bucket, now).exclude(decay_days=bucket).update(
+                    interaction_score=weight * F('interaction_count') * decay,
+                    decay_days=bucket,
+                )
+
+    save_watermark(now)
+    logger.info(f"Scoruri de interacțiune recalculate: {updated} rânduri (full={full})")
+    return updated
@@ -0,0 +1,158 @@
+import datetime
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import UserInteraction, InteractionRollup, ListingCounterRollup
+from .scoring import days_old, time_decay
+from .preferences import ROLLUP_WEIGHTS, VIEW_WEIGHT
+from .popularity import TYPE_COUNTERS
+from .signals import interaction_signals_suppressed, interactions_rolled_up, rollups_applied
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_DAYS = 180
+DEFAULT_BATCH_SIZE = 1000
+
+
+def retention_days():
+    return getattr(settings, 'RECOMMENDATION_INTERACTION_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)
+
+
+def retention_cutoff(now=None, days=None):
+    """Interacțiunile cu last_interaction înainte de acest moment sunt agregate."""
+    now = now or timezone.now()
+    return now - datetime.timedelta(days=days if days is not None else retention_days())
+
+
+def _aggregate(rows, now):
+    """
+    Agregă rândurile brute pe (utilizator, marcă, model, tip). Ponderea unui
+    rând este ponderea tipului din profilul de preferințe (favorit 50,
+    contact 5, vizualizare 0.01) redusă de decăderea lui, adică exact
+    contribuția pe care ar fi avut-o anunțul în profil.
+    """
+    decay = time_decay(days_old([row[6] for row in rows], now))
+    scores = [ROLLUP_WEIGHTS.get(row[4], VIEW_WEIGHT) * float(d) for row, d in zip(rows, decay)]
+    groups = {}
+    for row, score in zip(rows, scores):
+        _, user_id, brand, model, interaction_type, count, last_interaction, _ = row
+        key = (user_id, brand, model, interaction_type)
+        group = groups.setdefault(key, {'count': 0.0, 'listings': 0, 'weight': 0.0, 'last': last_interaction})
+        group['count'] += count
+        group['listings'] += 1
+        group['weight'] += score
+        group['last'] = max(group['last'], last_interaction)
+    return groups
+
+
+def _merge_rollups(groups):
+    user_ids = {key[0] for key in groups}
+    existing = {
+        (rollup.user_id, rollup.brand, rollup.car_model, rollup.interaction_type): rollup
+        for rollup in InteractionRollup.objects.select_for_update().filter(
+            user_id__in=user_ids, brand__in={key[1] for key in groups}
+        )
+    }
+
+    created, updated = [], []
+    for key, group in groups.items():
+        rollup = existing.get(key)
+        if rollup is None:
+            user_id, brand, model, interaction_type = key
+            created.append(InteractionRollup(
+                user_id=user_id, brand=brand, car_model=model, interaction_type=interaction_type,
+                interaction_count=group['count'], listing_count=group['listings'],
+                weight=group['weight'], last_interaction=group['last']
+            ))
+        else:
+            rollup.interaction_count += group['count']
+            rollup.listing_count += group['listings']
+            rollup.weight += group['weight']
+            rollup.last_interaction = max(rollup.last_interaction, group['last'])
+            rollup.updated_at = timezone.now()
+            updated.append(rollup)
+
+    InteractionRollup.objects.bulk_create(created)
+    InteractionRollup.objects.bulk_update(
+        updated, ['interaction_count', 'listing_count', 'weight', 'last_interaction', 'updated_at']
+    )
+
+
+def _merge_listing_counters(rows):
+    """
+    Păstrează contribuția rândurilor mutate la contoarele anunțurilor, ca
+    reconcile_counters să nu piardă istoricul când le renumără.
+    """
+    counts = {}
+    for row in rows:
+        listing_counts = counts.setdefault(row[7], {'view_count': 0, 'contact_count': 0, 'interaction_count': 0})
+        listing_counts['interaction_count'] += 1
+        counter = TYPE_COUNTERS.get(row[4])
+        if counter:
+            listing_counts[counter] += 1
+
+    existing = {
+        rollup.car_listing_id: rollup
+        for rollup in ListingCounterRollup.objects.select_for_update().filter(car_listing_id__in=list(counts))
+    }
+    created, updated = [], []
+    for listing_id, listing_counts in counts.items():
+        rollup = existing.get(listing_id)
+        if rollup is None:
+            created.append(ListingCounterRollup(car_listing_id=listing_id, **listing_counts))
+        else:
+            for field, value in listing_counts.items():
+                setattr(rollup, field, getattr(rollup, field) + value)
+            rollup.updated_at = timezone.now()
+            updated.append(rollup)
+
+    ListingCounterRollup.objects.bulk_create(created)
+    ListingCounterRollup.objects.bulk_update(
+        updated, ['view_count', 'contact_count', 'interaction_count', 'updated_at']
+    )
+
+
+def rollup_interactions(now=None, days=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Mută interacțiunile mai vechi decât orizontul de retenție în
+    interaction_rollups, în loturi de batch_size rânduri: fiecare lot este
+    agregat, adăugat la rollup-uri și șters din user_interactions într-o
+    tranzacție scurtă, ca blocările să rămână mici. Cu un orizont de cel
+    puțin 30 de zile toate rândurile mutate au decăderea maximă, deci
+    ponderile pot fi adunate între rulări. Rândurile sunt șterse cu
+    delete(), dar efectele semnalelor sunt aplicate în lot: marcajele de
+    ștergere și feed-urile precalculate în tranzacția lotului, profilurile
+    și feed-urile din cache la final.
+    Returnează (rânduri mutate, id-urile utilizatorilor afectați).
+    """
+    now = now or timezone.now()
+    cutoff = retention_cutoff(now, days)
+
+    moved = 0
+    user_ids = set()
+    last_id = 0
+    while True:
+        rows = list(UserInteraction.objects.filter(
+            last_interaction__lt=cutoff, id__gt=last_id
+        ).order_by('id').values_list(
+            'id', 'user_id', 'car_listing__brand', 'car_listing__model',
+            'interaction_type', 'interaction_count', 'last_interaction', 'car_listing_id'
+        )[:batch_size])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        with transaction.atomic(), interaction_signals_suppressed():
+            _merge_rollups(_aggregate(rows, now))
+            _merge_listing_counters(rows)
+            UserInteraction.objects.filter(id__in=[row[0] for row in rows]).delete()
+            interactions_rolled_up((row[1], row[7]) for row in rows)
+
+        moved += len(rows)
+        user_ids.update(row[1] for row in rows)
+
+    rollups_applied(sorted(user_ids))
+
+    logger.info(f"Retenție: {moved} interacțiuni mutate în rollup-uri pentru {len(user_ids)} utilizatori")
+    return moved, user_ids
@@ -0,0 +1,74 @@
+import datetime
+import warnings
+import numpy as np
+
+# Ponderea fiecărui tip de interacțiune în scorul utilizator-anunț
+INTERACTION_WEIGHTS = {
+    'favorit': 3.0,
+    'contact': 2.0,
+    'vizualizare': 1.0,
+}
+
+DECAY_RATE = 0.1
+DECAY_HORIZON_DAYS = 30
+
+US_PER_DAY = 86400 * 10**6
+
+
+def days_old(timestamps, now):
+    """
+    Vechimea în zile întregi; valorile lipsă (None/NaT) sunt considerate la
+    orizontul de decădere. timestamps poate fi un array datetime64 sau o
+    listă de datetime (inclusiv None), convertită de NumPy într-un singur pas.
+    """
+    with warnings.catch_warnings():
+        # NumPy convertește datetime-urile cu fus orar în UTC, dar avertizează la fiecare conversie
+        warnings.filterwarnings(
+            'ignore', message='no explicit representation of timezones available for np.datetime64',
+            category=UserWarning
+        )
+        values = np.asarray(timestamps, dtype='datetime64[us]')
+    missing = np.isnat(values)
+    now_us = np.datetime64(now.astimezone(datetime.timezone.utc).replace(tzinfo=None), 'us')
+    days = np.floor((now_us - values).astype(np.float64) / US_PER_DAY)
+    return np.where(missing, DECAY_HORIZON_DAYS, days)
+
+
+def decay_bucket(days):
+    """Treapta de decădere: vechimea în zile, plafonată la orizont."""
+    return np.minimum(np.asarray(days, dtype=np.int64), DECAY_HORIZON_DAYS)
+
+
+def time_decay(days):
+    """1 / (1 + 0.1 * zile), plafonat la 30 de zile."""
+    return 1.0 / (1.0 + DECAY_RATE * np.minimum(np.asarray(days, dtype=np.float64), DECAY_HORIZON_DAYS))
+
+
+def base_scores(interaction_types, counts):
+    """Pondere pe tip * număr, fără decădere."""
+    interaction_types = np.asarray(interaction_types, dtype=object)
+    counts = np.asarray(counts, dtype=np.float64)
+    if interaction_types.size == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    unique_types, inverse = np.unique(interaction_types, return_inverse=True)
+    weights = np.array([INTERACTION_WEIGHTS.get(t, 1.0) for t in unique_types])[inverse]
+    return weights * counts
+
+
+def interaction_scores(interaction_types, counts, days):
+    """
+    Scorul canonic al interacțiunilor: pondere pe tip * număr * decădere în
+    timp. Lucrează pe array-uri, fără bucle Python pe fiecare rând.
+    """
+    return base_scores(interaction_types, counts) * time_decay(days)
+
+
+def base_score(interaction_type, count):
+    """Scorul fără decădere (treapta 0), adică scorul unei interacțiuni scrise acum."""
+    return float(base_scores([interaction_type], [count])[0])
+
+
+def score_interaction(interaction_type, count, last_interaction, now):
+    """Scorul unei singure interacțiuni, la momentul now."""
+    return float(interaction_scores([interaction_type], [count], days_old([last_interaction], now))[0])
@@ -0,0 +1,181 @@
+import logging
+import threading
+from contextlib import contextmanager
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from listings.models import CarListing, CarImage, Favorite
+from .models import UserInteraction, InteractionTombstone
+from .interaction_matrix import get_loaded_interaction_matrix
+from .user_index import get_loaded_user_index
+from .feature_index import get_loaded_listing_feature_index, mark_listings_changed
+from .content_engine import remove_listing_columns
+from .feed_cache import invalidate_user_feeds
+from .precomputed_feeds import discard_precomputed_feeds
+from .preferences import update_preference_profile, rebuild_preference_profile
+from .popularity import interaction_counted, favorite_counted, refresh_main_image
+
+logger = logging.getLogger(__name__)
+
+_suppressed = threading.local()
+
+
+@contextmanager
+def interaction_signals_suppressed():
+    """
+    Dezactivează în firul curent efectele per rând ale semnalelor pentru
+    UserInteraction; apelantul le aplică în lot (vezi interactions_rolled_up).
+    """
+    _suppressed.active = True
+    try:
+        yield
+    finally:
+        _suppressed.active = False
+
+
+def _signals_suppressed():
+    return getattr(_suppressed, 'active', False)
+
+
+def _update_preference_profile(user_id, listing_ids):
+    def update():
+        try:
+            update_preference_profile(user_id, listing_ids)
+        except Exception as e:
+            logger.exception(f"Eroare la actualizarea profilului de preferințe: {str(e)}")
+
+    transaction.on_commit(update)
+
+
+def _refresh_interaction_cell(user_id, listing_id):
+    matrix = get_loaded_interaction_matrix()
+    if matrix is None:
+        # Matricea nu e încărcată în acest proces; la încărcare se sincronizează singură
+        return
+
+    def refresh():
+        try:
+            matrix.refresh_cell(user_id, listing_id)
+            user_index = get_loaded_user_index()
+            if user_index is not None:
+                user_index.update_users(matrix, [user_id])
+        except Exception as e:
+            logger.exception(f"Eroare la actualizarea matricei de interacțiuni: {str(e)}")
+
+    transaction.on_commit(refresh)
+
+
+def _record_deletion(user_id, listing_id):
+    # În aceeași tranzacție cu ștergerea: celelalte procese o preiau la catch_up
+    InteractionTombstone.objects.create(user_id=user_id, car_listing_id=listing_id)
+
+
+@receiver(post_save, sender=UserInteraction)
+def interaction_saved(sender, instance, created, **kwargs):
+    if created:
+        interaction_counted(instance.car_listing_id, instance.interaction_type, 1)
+
+
+@receiver(post_delete, sender=UserInteraction)
+def interaction_deleted(sender, instance, **kwargs):
+    if _signals_suppressed():
+        return
+    interaction_counted(instance.car_listing_id, instance.interaction_type, -1)
+    _record_deletion(instance.user_id, instance.car_listing_id)
+    discard_precomputed_feeds([instance.user_id])
+
+
+@receiver(post_save, sender=UserInteraction)
+@receiver(post_delete, sender=UserInteraction)
+def interaction_changed(sender, instance, **kwargs):
+    if _signals_suppressed():
+        return
+    _refresh_interaction_cell(instance.user_id, instance.car_listing_id)
+    _update_preference_profile(instance.user_id, [instance.car_listing_id])
+    invalidate_user_feeds(instance.user_id)
+
+
+def interactions_applied(keys, created_keys):
+    """
+    Efectele semnalelor de mai sus pentru interacțiunile scrise în lot
+    (bulk_create / update nu trimit post_save). keys sunt tripletele
+    (user_id, listing_id, tip) modificate, created_keys cele create.
+    """
+    for user_id, listing_id, interaction_type in created_keys:
+        interaction_counted(listing_id, interaction_type, 1)
+
+    listings_by_user = {}
+    for user_id, listing_id, _ in keys:
+        listings_by_user.setdefault(user_id, set()).add(listing_id)
+
+    for user_id, listing_ids in listings_by_user.items():
+        for listing_id in listing_ids:
+            _refresh_interaction_cell(user_id, listing_id)
+        _update_preference_profile(user_id, sorted(listing_ids))
+        invalidate_user_feeds(user_id)
+
+
+def interactions_rolled_up(pairs):
+    """
+    Efectele ștergerii pentru interacțiunile mutate de retenție în
+    rollup-uri, într-o singură scriere per lot. Rulează în tranzacția
+    lotului. Contoarele de popularitate nu scad: interacțiunile rămân în
+    istoricul anunțului.
+    """
+    pairs = sorted(set(pairs))
+    InteractionTombstone.objects.bulk_create([
+        InteractionTombstone(user_id=user_id, car_listing_id=listing_id) for user_id, listing_id in pairs
+    ])
+    discard_precomputed_feeds({user_id for user_id, _ in pairs})
+
+
+def rollups_applied(user_ids):
+    """Reconstruiește profilurile și invalidează feed-urile utilizatorilor afectați de retenție."""
+    for user_id in user_ids:
+        rebuild_preference_profile(user_id)
+        invalidate_user_feeds(user_id)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_saved(sender, instance, created, **kwargs):
+    if created:
+        favorite_counted(instance.car_listing_id, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    favorite_counted(instance.car_listing_id, -1)
+    _record_deletion(instance.user_id, instance.car_listing_id)
+    discard_precomputed_feeds([instance.user_id])
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    _refresh_interaction_cell(instance.user_id, instance.car_listing_id)
+    _update_preference_profile(instance.user_id, [instance.car_listing_id])
+    invalidate_user_feeds(instance.user_id)
+
+
+@receiver(post_save, sender=CarListing)
+def listing_saved(sender, instance, **kwargs):
+    index = get_loaded_listing_feature_index()
+    if index is not None:
+        transaction.on_commit(lambda: index.set_listing(instance))
+    transaction.on_commit(mark_listings_changed)
+
+
+@receiver(post_delete, sender=CarListing)
+def listing_deleted(sender, instance, **kwargs):
+    index = get_loaded_listing_feature_index()
+    listing_id = instance.id
+    if index is not None:
+        transaction.on_commit(lambda: index.remove_listing(listing_id))
+    transaction.on_commit(lambda: remove_listing_columns(listing_id))
+    transaction.on_commit(mark_listings_changed)
+
+
+@receiver(post_save, sender=CarImage)
+@receiver(post_delete, sender=CarImage)
+def image_changed(sender, instance, **kwargs):
+    refresh_main_image(instance.car_listing_id)
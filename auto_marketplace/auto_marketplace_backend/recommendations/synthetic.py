@@ -0,0 +1,358 @@
+import os
+import logging
+import datetime
+import numpy as np
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from users.models import User
+from listings.models import CarListing, CarImage, CarFeature, Favorite
+from .models import UserInteraction
+from .scoring import base_score
+from .popularity import reconcile_counters
+from .interaction_matrix import InteractionMatrix, reset_loaded_interaction_matrix
+from .feature_index import ListingFeatureIndex, mark_listings_changed, reset_loaded_listing_feature_index
+from .item_similarity import ItemSimilarityIndex, reset_loaded_item_similarity_index
+from .user_index import UserLSHIndex, reset_loaded_user_index
+from .als import ALSModel, ARTIFACT_NAME as ALS_ARTIFACT, reset_loaded_als_model
+from .content_engine import reset_loaded_listing_columns
+from .artifacts import artifact_mtime
+from .rescoring import rescore_interactions
+
+logger = logging.getLogger(__name__)
+
+# Utilizatorii generați au acest prefix; ștergerea lor elimină în cascadă toate datele generate
+USERNAME_PREFIX = 'synthetic_'
+
+BATCH_SIZE = 2000
+MAX_AGE_DAYS = 180
+
+# Marcă -> (pondere, modele, prețul de bază în euro)
+BRANDS = {
+    'Volkswagen': (14, ['Golf', 'Passat', 'Polo', 'Tiguan', 'Touran', 'Arteon'], 14000),
+    'Dacia': (11, ['Logan', 'Sandero', 'Duster', 'Spring', 'Jogger'], 9000),
+    'Skoda': (10, ['Octavia', 'Superb', 'Fabia', 'Kodiaq', 'Karoq'], 13000),
+    'BMW': (9, ['Seria 3', 'Seria 5', 'X1', 'X3', 'X5', 'Seria 1'], 22000),
+    'Audi': (8, ['A4', 'A6', 'A3', 'Q5', 'Q3', 'Q7'], 21000),
+    'Mercedes-Benz': (8, ['C-Class', 'E-Class', 'A-Class', 'GLC', 'GLE'], 24000),
+    'Ford': (7, ['Focus', 'Fiesta', 'Kuga', 'Mondeo', 'Puma'], 11000),
+    'Renault': (6, ['Clio', 'Megane', 'Captur', 'Kadjar', 'Talisman'], 10000),
+    'Opel': (6, ['Astra', 'Corsa', 'Insignia', 'Mokka', 'Zafira'], 9500),
+    'Toyota': (6, ['Corolla', 'RAV4', 'Yaris', 'C-HR', 'Auris'], 15000),
+    'Hyundai': (4, ['Tucson', 'i30', 'Kona', 'Santa Fe', 'i20'], 14000),
+    'Peugeot': (4, ['308', '208', '3008', '508', '2008'], 11000),
+    'Kia': (3, ['Sportage', 'Ceed', 'Niro', 'Sorento'], 14000),
+    'Volvo': (2, ['XC60', 'XC90', 'V60', 'S60'], 25000),
+    'Tesla': (2, ['Model 3', 'Model Y', 'Model S'], 35000),
+}
+
+FUEL_TYPES = {
+    'diesel': 42,
+    'benzina': 35,
+    'hibrid_benzina': 9,
+    'electric': 5,
+    'GPL': 6,
+    'hibrid_diesel': 2,
+    'altele': 1,
+}
+
+ELECTRIC_BRANDS = {'Tesla'}
+
+TRANSMISSIONS = {'manuala': 55, 'automata': 40, 'semi-automata': 5}
+DRIVE_TYPES = {'fata': 65, 'spate': 15, '4x4': 20}
+CONDITIONS = {'utilizat': 85, 'nou': 10, 'avariat': 5}
+BODY_TYPES = {'Sedan': 30, 'Hatchback': 25, 'SUV': 25, 'Break': 15, 'Coupe': 3, 'Cabrio': 2}
+COLORS = {'Negru': 25, 'Alb': 20, 'Gri': 20, 'Argintiu': 15, 'Albastru': 10, 'Roșu': 6, 'Verde': 2, 'Maro': 2}
+EMISSION_STANDARDS = {'Euro 6': 55, 'Euro 5': 30, 'Euro 4': 12, 'Euro 3': 3}
+LOCATIONS = ['București', 'Cluj-Napoca', 'Timișoara', 'Iași', 'Constanța', 'Brașov', 'Craiova', 'Oradea', 'Sibiu', 'Ploiești']
+FEATURES = [
+    'Climatronic', 'Navigație', 'Senzori parcare', 'Cameră marșarier', 'Scaune încălzite',
+    'Pilot automat', 'Faruri LED', 'Jante aliaj', 'Trapă', 'Keyless', 'Apple CarPlay', 'Cârlig remorcare',
+]
+
+
+def _weighted(rng, choices, size):
+    values = list(choices)
+    weights = np.array([choices[value] for value in values], dtype=np.float64)
+    return np.asarray(values, dtype=object)[rng.choice(len(values), size=size, p=weights / weights.sum())]
+
+
+def _power_law(rng, size, mean, maximum, alpha=1.5):
+    """Valori întregi >= 1 cu distribuție Pareto, scalate la media dorită și plafonate."""
+    raw = rng.pareto(alpha, size) + 1
+    values = np.floor(raw * mean / (alpha / (alpha - 1)))
+    return np.clip(values, 1, maximum).astype(np.int64)
+
+
+def _ages(rng, size, scale_days):
+    """Vechimi în zile, mai dese spre prezent (exponențial), plafonate la MAX_AGE_DAYS."""
+    return np.minimum(rng.exponential(scale_days, size), MAX_AGE_DAYS).astype(np.int64)
+
+
+def _backdate(queryset, ids, ages, fields, now):
+    """
+    Timpii auto_now/auto_now_add sunt suprascriși la bulk_create, deci se
+    setează după inserare, cu o actualizare per zi de vechime.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    for age in np.unique(ages).tolist():
+        when = now - datetime.timedelta(days=age)
+        group = ids[ages == age].tolist()
+        for start in range(0, len(group), BATCH_SIZE):
+            queryset.filter(id__in=group[start:start + BATCH_SIZE]).update(**{field: when for field in fields})
+
+
+def synthetic_users():
+    return User.objects.filter(username__startswith=USERNAME_PREFIX)
+
+
+def clear_synthetic_data():
+    """
+    Șterge utilizatorii generați împreună cu anunțurile și activitatea lor.
+    Interacțiunile, favoritele și imaginile sunt șterse direct, fără
+    semnalele per rând: ele actualizează doar contoarele anunțurilor
+    sintetice, care sunt șterse oricum.
+    """
+    user_ids = list(synthetic_users().values_list('id', flat=True))
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start:start + BATCH_SIZE]
+        listings = CarListing.objects.filter(user_id__in=batch)
+        for queryset in (
+            UserInteraction.objects.filter(user_id__in=batch),
+            Favorite.objects.filter(user_id__in=batch),
+        ):
+            queryset._raw_delete(queryset.db)
+        listings.update(main_image=None)
+        images = CarImage.objects.filter(car_listing__in=listings)
+        images._raw_delete(images.db)
+        User.objects.filter(id__in=batch).delete()
+
+    if user_ids:
+        rebuild_artifacts()
+    return len(user_ids)
+
+
+def rebuild_artifacts(als=None):
+    """
+    Reconstruiește toate artefactele după generarea sau ștergerea datelor
+    sintetice: matricea de interacțiuni, indexul de caracteristici, vecinii
+    item-item, indexul LSH al utilizatorilor și, cu als=True (sau implicit,
+    dacă modelul există deja), modelul ALS. Rândurile generate au timpi în
+    trecut, deci sincronizarea incrementală nu le-ar vedea; din același motiv
+    artefactele deja încărcate în proces (inclusiv coloanele anunțurilor)
+    sunt abandonate și se reîncarcă la prima cerere.
+    """
+    if als is None:
+        als = artifact_mtime(ALS_ARTIFACT) is not None
+
+    matrix = InteractionMatrix.build()
+    matrix.save()
+    ListingFeatureIndex.build().save()
+    mark_listings_changed()
+    ItemSimilarityIndex.build(matrix).save()
+    UserLSHIndex.build(matrix).save()
+    if als:
+        ALSModel.train(matrix, threads=os.cpu_count() or 1).save()
+
+    for reset in (
+        reset_loaded_interaction_matrix,
+        reset_loaded_listing_feature_index,
+        reset_loaded_item_similarity_index,
+        reset_loaded_user_index,
+        reset_loaded_als_model,
+        reset_loaded_listing_columns,
+    ):
+        reset()
+
+
+def seed_users(rng, n_users):
+    password = make_password(None)
+    start = synthetic_users().count()
+    cities = rng.choice(LOCATIONS, size=n_users)
+    users = [
+        User(
+            username=f'{USERNAME_PREFIX}{start + i}',
+            email=f'{USERNAME_PREFIX}{start + i}@example.com',
+            real_name=f'Utilizator Sintetic {start + i}',
+            password=password,
+            city=cities[i],
+        )
+        for i in range(n_users)
+    ]
+    User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+    # Pe MySQL bulk_create nu întoarce id-urile
+    return list(synthetic_users().order_by('id').values_list('id', flat=True))[start:]
+
+
+def seed_listings(rng, seller_ids, n_listings, now):
+    brand_names = list(BRANDS)
+    brand_weights = np.array([BRANDS[b][0] for b in brand_names], dtype=np.float64)
+    brands = np.asarray(brand_names, dtype=object)[
+        rng.choice(len(brand_names), size=n_listings, p=brand_weights / brand_weights.sum())
+    ]
+
+    # Câțiva vânzători (dealeri) au majoritatea anunțurilor
+    seller_weights = 1.0 / np.arange(1, len(seller_ids) + 1) ** 0.8
+    sellers = np.asarray(seller_ids)[rng.choice(len(seller_ids), size=n_listings, p=seller_weights / seller_weights.sum())]
+
+    fuels = _weighted(rng, FUEL_TYPES, n_listings)
+    years = np.clip(np.round(rng.normal(2015, 5, n_listings)), 1995, now.year).astype(int)
+    listings = []
+    for i in range(n_listings):
+        brand = brands[i]
+        _, models, base_price = BRANDS[brand]
+        model = models[int(rng.integers(len(models)))]
+        fuel = 'electric' if brand in ELECTRIC_BRANDS else fuels[i]
+        age = now.year - int(years[i])
+        mileage = 0 if age == 0 else int(max(0, rng.normal(15000, 6000)) * age)
+        price = int(base_price * (0.88 ** age) * rng.uniform(0.75, 1.3))
+        power = int(rng.integers(70, 350))
+
+        listings.append(CarListing(
+            user_id=int(sellers[i]),
+            title=f'{brand} {model} {years[i]}',
+            brand=brand,
+            model=model,
+            mileage=mileage,
+            power=power,
+            engine_capacity=0 if fuel == 'electric' else int(rng.choice([999, 1198, 1395, 1598, 1968, 1995, 2993])),
+            color=_weighted(rng, COLORS, 1)[0],
+            condition_state=_weighted(rng, CONDITIONS, 1)[0],
+            year_of_manufacture=int(years[i]),
+            fuel_type=fuel,
+            price=max(price, 500),
+            emission_standard=_weighted(rng, EMISSION_STANDARDS, 1)[0],
+            transmission=_weighted(rng, TRANSMISSIONS, 1)[0],
+            drive_type=_weighted(rng, DRIVE_TYPES, 1)[0],
+            body_type=_weighted(rng, BODY_TYPES, 1)[0],
+            seats=5,
+            doors=int(rng.choice([3, 5])),
+            registered=bool(rng.random() < 0.7),
+            location=LOCATIONS[int(rng.integers(len(LOCATIONS)))],
+        ))
+
+    CarListing.objects.bulk_create(listings, batch_size=BATCH_SIZE)
+    listing_ids = list(CarListing.objects.filter(user_id__in=seller_ids).order_by('id').values_list('id', flat=True))
+    _backdate(CarListing.objects.all(), listing_ids, _ages(rng, len(listing_ids), 45), ['created_at', 'updated_at'], now)
+    return listing_ids
+
+
+def seed_images_and_features(rng, listing_ids):
+    images, features = [], []
+    for listing_id in listing_ids:
+        for k in range(int(rng.integers(1, 6))):
+            images.append(CarImage(
+                car_listing_id=listing_id,
+                image_path=f'car_images/synthetic_{listing_id}_{k}.jpg',
+                is_main=k == 0,
+            ))
+        for name in rng.choice(FEATURES, size=int(rng.integers(2, 7)), replace=False):
+            features.append(CarFeature(car_listing_id=listing_id, feature_name=name, feature_value='Da'))
+
+    CarImage.objects.bulk_create(images, batch_size=BATCH_SIZE)
+    CarFeature.objects.bulk_create(features, batch_size=BATCH_SIZE)
+    return len(images), len(features)
+
+
+def seed_activity(rng, user_ids, listing_ids, brand_of, interactions_per_user, now,
+                  contact_rate=0.1, favorite_rate=0.08):
+    """
+    Istoricul utilizatorilor: numărul de anunțuri văzute are distribuție
+    Pareto (câțiva utilizatori foarte activi), popularitatea anunțurilor
+    urmează o lege Zipf, iar fiecare utilizator are 1-2 mărci preferate din
+    care provin ~60% din vizualizări.
+    """
+    listing_ids = np.asarray(listing_ids, dtype=np.int64)
+    popularity = 1.0 / np.arange(1, len(listing_ids) + 1) ** 0.9
+    popularity = popularity[rng.permutation(len(listing_ids))]
+
+    brands = np.asarray([brand_of[listing_id] for listing_id in listing_ids.tolist()], dtype=object)
+    by_brand = {}
+    for brand in BRANDS:
+        positions = np.flatnonzero(brands == brand)
+        if positions.size:
+            by_brand[brand] = (positions, popularity[positions] / popularity[positions].sum())
+    global_p = popularity / popularity.sum()
+    brand_names = list(by_brand)
+
+    counts = _power_law(rng, len(user_ids), interactions_per_user, maximum=min(len(listing_ids), 500))
+    interactions, favorites = [], []
+    for user_id, count in zip(user_ids, counts.tolist()):
+        preferred = rng.choice(brand_names, size=min(int(rng.integers(1, 3)), len(brand_names)), replace=False)
+        n_brand = int(round(count * 0.6))
+
+        picked = [rng.choice(len(listing_ids), size=count - n_brand, p=global_p)]
+        for brand in preferred:
+            positions, p = by_brand[brand]
+            picked.append(rng.choice(positions, size=n_brand // len(preferred), p=p))
+        picked = np.unique(np.concatenate(picked))
+
+        for position in picked.tolist():
+            listing_id = int(listing_ids[position])
+            views = int(rng.geometric(0.5))
+            interactions.append(UserInteraction(
+                user_id=user_id, car_listing_id=listing_id, interaction_type='vizualizare',
+                interaction_count=views, interaction_score=base_score('vizualizare', views),
+            ))
+            if rng.random() < contact_rate:
+                interactions.append(UserInteraction(
+                    user_id=user_id, car_listing_id=listing_id, interaction_type='contact',
+                    interaction_count=1, interaction_score=base_score('contact', 1),
+                ))
+            if rng.random() < favorite_rate:
+                favorites.append(Favorite(user_id=user_id, car_listing_id=listing_id))
+                interactions.append(UserInteraction(
+                    user_id=user_id, car_listing_id=listing_id, interaction_type='favorit',
+                    interaction_count=1, interaction_score=base_score('favorit', 1),
+                ))
+
+    UserInteraction.objects.bulk_create(interactions, batch_size=BATCH_SIZE)
+    Favorite.objects.bulk_create(favorites, batch_size=BATCH_SIZE)
+
+    interaction_ids = list(UserInteraction.objects.filter(user_id__in=user_ids).order_by('id').values_list('id', flat=True))
+    _backdate(UserInteraction.objects.all(), interaction_ids, _ages(rng, len(interaction_ids), 20),
+              ['first_interaction', 'last_interaction'], now)
+    favorite_ids = list(Favorite.objects.filter(user_id__in=user_ids).order_by('id').values_list('id', flat=True))
+    _backdate(Favorite.objects.all(), favorite_ids, _ages(rng, len(favorite_ids), 20), ['created_at'], now)
+    return len(interactions), len(favorites)
+
+
+def seed_synthetic_data(n_users, n_listings, interactions_per_user=20, seller_share=0.1, seed=42, als=None):
+    """
+    Generează utilizatori, anunțuri (cu imagini și dotări), favorite și
+    interacțiuni. Inserările se fac cu bulk_create, deci semnalele nu
+    rulează: contoarele anunțurilor și toate artefactele de recomandare sunt
+    recalculate la final (vezi rebuild_artifacts), iar profilurile de
+    preferințe se construiesc la prima cerere.
+    Returnează numărul de rânduri create pe tabel.
+    """
+    rng = np.random.default_rng(seed)
+    now = timezone.now()
+
+    with transaction.atomic():
+        user_ids = seed_users(rng, n_users)
+        n_sellers = max(1, int(len(user_ids) * seller_share))
+        listing_ids = seed_listings(rng, user_ids[:n_sellers], n_listings, now)
+        n_images, n_features = seed_images_and_features(rng, listing_ids)
+
+        brand_of = dict(CarListing.objects.filter(id__in=listing_ids).values_list('id', 'brand'))
+        n_interactions, n_favorites = seed_activity(
+            rng, user_ids, listing_ids, brand_of, interactions_per_user, now
+        )
+        for start in range(0, len(listing_ids), BATCH_SIZE):
+            reconcile_counters(listing_ids[start:start + BATCH_SIZE])
+
+    # Activitatea generată are timpi în trecut: scorurile stocate primesc decăderea, iar
+    # artefactele se reconstruiesc (catch_up nu vede rândurile din trecut)
+    rescore_interactions(full=True)
+    rebuild_artifacts(als=als)
+
+    logger.info(f"Date sintetice generate: {len(user_ids)} utilizatori, {len(listing_ids)} anunțuri")
+    return {
+        'users': len(user_ids),
+        'listings': len(listing_ids),
+        'images': n_images,
+        'features': n_features,
+        'interactions': n_interactions,
+        'favorites': n_favorites,
+    }
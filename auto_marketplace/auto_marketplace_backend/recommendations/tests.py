@@ -1,3 +1,1083 @@
-from django.test import TestCase
+import math
+import warnings
+import shutil
+import datetime
+import tempfile
+from unittest import mock
+import numpy as np
+from io import StringIO
+from rest_framework.test import APIClient
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from users.models import User
+from listings.models import CarListing, Favorite
+from .models import UserInteraction, InteractionRollup, InteractionTombstone, PrecomputedFeed
+from .scoring import INTERACTION_WEIGHTS, days_old, decay_bucket, score_interaction, time_decay
+from .preferences import ROLLUP_WEIGHTS, build_profile_data, get_preference_profile, _profile_data
+from .interaction_matrix import (
+    InteractionMatrix, get_interaction_matrix, get_loaded_interaction_matrix, reset_loaded_interaction_matrix,
+    rollup_listing_id
+)
+from .feature_index import (
+    ListingFeatureIndex, get_listing_feature_index, get_loaded_listing_feature_index,
+    listing_feature_text, reset_loaded_listing_feature_index
+)
+from .content_engine import ListingColumns, get_loaded_listing_columns, reset_loaded_listing_columns
+from .item_similarity import ItemSimilarityIndex, touched_listing_ids, reset_loaded_item_similarity_index
+from .user_index import UserLSHIndex, recall_at_k, reset_loaded_user_index
+from .als import ALSModel, als_step, reset_loaded_als_model
+from .warmup import HEAVY_MODULES, WARM_UP_STEPS, warm_up
+from .ingestion import (
+    InteractionBuffer, apply_events, get_interaction_buffer, reset_interaction_buffer, ingestion_stats
+)
+from .rescoring import rescore_interactions
+from .precomputed_feeds import FEED_SIZE, active_user_ids, get_precomputed_feed
+from .retention import rollup_interactions
+from .popularity import reconcile_counters
+from .context import RecommendationContext
+from .reranking import DAY_SECONDS, Candidates, BrandCap, FuelBoost, FreshnessBoost, MMRDiversity, Truncate, rerank
+from .candidates import BrandSource, CandidateSource, PriceBandSource, generate_candidates
+from .views import hybrid_recommendations
+from .feed_cache import get_cached_feed, set_cached_feed, invalidate_user_feeds, feed_cache_stats
+from .feature_index import listings_version, mark_listings_changed
 
-# Create your tests here.
+
+def baseline_scores(rows, now):
+    """Matricea utilizator -> {anunț: scor} calculată ca în implementarea inițială (pandas, rând cu rând)."""
+    matrix = {}
+    for user_id, listing_id, interaction_type, count, last_interaction in rows:
+        weight = {'favorit': 3.0, 'contact': 2.0}.get(interaction_type, 1.0)
+        score = count * weight / (1.0 + 0.1 * min((now - last_interaction).days, 30))
+        user_scores = matrix.setdefault(user_id, {})
+        user_scores[listing_id] = user_scores.get(listing_id, 0.0) + score
+    return matrix
+
+
+def cosine(a, b):
+    dot = sum(value * b.get(key, 0.0) for key, value in a.items())
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+
+class RecommendationTestCase(TestCase):
+    """Artefactele sunt scrise într-un director temporar, iar singleton-urile procesului și cache-ul sunt golite."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_override = self.settings(RECOMMENDATION_ARTIFACTS_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        for reset in (
+            reset_loaded_interaction_matrix,
+            reset_loaded_listing_feature_index,
+            reset_loaded_item_similarity_index,
+            reset_loaded_user_index,
+            reset_loaded_als_model,
+            reset_loaded_listing_columns,
+        ):
+            reset()
+            self.addCleanup(reset)
+        cache.clear()
+
+        self.now = timezone.now()
+        self.seller = User.objects.create_user('vanzator', 'vanzator@example.com', 'parola123', real_name='Vânzător')
+
+    def _users(self, n, prefix='cumparator'):
+        # Fără parolă: hash-ul ar domina durata testelor cu mulți utilizatori
+        return [
+            User.objects.create_user(f'{prefix}{i}', f'{prefix}{i}@example.com', real_name=f'Cumpărător {i}')
+            for i in range(n)
+        ]
+
+    def _listings(self, n, brand='Dacia', model='Logan'):
+        return [
+            CarListing.objects.create(
+                user=self.seller, title=f'{brand} {model} {i}', brand=brand, model=model,
+                mileage=100000 + i, power=90, engine_capacity=1461, color='alb',
+                condition_state='utilizat', year_of_manufacture=2018, fuel_type='diesel',
+                price=7000 + i, emission_standard='Euro 6', transmission='manuala',
+                drive_type='fata', location='Cluj'
+            )
+            for i in range(n)
+        ]
+
+    def _interact(self, user, listing, interaction_type='vizualizare', count=1, days=0, at=None):
+        interaction = UserInteraction.objects.create(
+            user=user, car_listing=listing, interaction_type=interaction_type, interaction_count=count
+        )
+        # last_interaction are auto_now, deci momentul din trecut se scrie cu update
+        moment = (at or self.now) - datetime.timedelta(days=days)
+        UserInteraction.objects.filter(id=interaction.id).update(last_interaction=moment, first_interaction=moment)
+        return interaction
+
+
+class InteractionMatrixTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = self._users(6)
+        self.listings = self._listings(8)
+        rng = np.random.default_rng(7)
+        for user in self.users:
+            for listing in rng.choice(self.listings, size=4, replace=False):
+                self._interact(user, listing, rng.choice(['vizualizare', 'contact', 'favorit']),
+                               count=int(rng.integers(1, 4)), days=int(rng.integers(0, 45)))
+
+    def _baseline(self):
+        rows = UserInteraction.objects.values_list(
+            'user_id', 'car_listing_id', 'interaction_type', 'interaction_count', 'last_interaction'
+        )
+        return baseline_scores(rows, self.now)
+
+    def test_build_matches_baseline_scores(self):
+        matrix = InteractionMatrix.build(now=self.now)
+        expected = self._baseline()
+
+        self.assertEqual(set(matrix.user_ids), set(expected))
+        for user_id, scores in expected.items():
+            actual = matrix.user_scores(user_id)
+            self.assertEqual(set(actual), set(scores))
+            for listing_id, score in scores.items():
+                self.assertAlmostEqual(actual[listing_id], score, places=4)
+
+    def test_neighbours_match_brute_force_cosine(self):
+        matrix = InteractionMatrix.build(now=self.now)
+        expected = self._baseline()
+
+        for user in self.users:
+            similarities = {
+                other: cosine(expected[user.id], scores)
+                for other, scores in expected.items() if other != user.id
+            }
+            neighbours = matrix.neighbours(user.id, n_neighbors=3)
+            best = sorted((s for s in similarities.values() if s > 0), reverse=True)[:3]
+            self.assertEqual(len(neighbours), len(best))
+            for (other, similarity), expected_similarity in zip(neighbours, best):
+                self.assertAlmostEqual(similarity, similarities[other], places=5)
+                self.assertAlmostEqual(similarity, expected_similarity, places=5)
+
+    def test_incremental_updates_match_rebuild(self):
+        matrix = InteractionMatrix.build()
+        newcomer = self._users(1, prefix='nou')[0]
+        extra = self._listings(1, brand='Audi', model='A4')[0]
+        shared = UserInteraction.objects.filter(user=self.users[0]).first().car_listing
+        self._interact(newcomer, shared, 'contact', at=timezone.now())
+        self._interact(newcomer, extra, 'favorit', at=timezone.now())
+        UserInteraction.objects.filter(user=self.users[0]).update(
+            interaction_count=5, last_interaction=timezone.now()
+        )
+
+        self.assertGreater(matrix.catch_up(), 0)
+        rebuilt = InteractionMatrix.build()
+
+        for user in self.users + [newcomer]:
+            incremental = matrix.neighbours(user.id, n_neighbors=10)
+            fresh = rebuilt.neighbours(user.id, n_neighbors=10)
+            self.assertEqual({uid for uid, _ in incremental}, {uid for uid, _ in fresh})
+            for (_, similarity), (_, fresh_similarity) in zip(sorted(incremental), sorted(fresh)):
+                self.assertAlmostEqual(similarity, fresh_similarity, places=5)
+
+            listing_ids, scores = matrix.neighbourhood_scores(user.id, incremental)
+            fresh_ids, fresh_scores = rebuilt.neighbourhood_scores(user.id, fresh)
+            self.assertEqual(dict(zip(listing_ids, scores.round(4))), dict(zip(fresh_ids, fresh_scores.round(4))))
+
+        # Utilizatorul adăugat după construire este vecin candidat pentru ceilalți
+        others = [uid for uid, _ in matrix.neighbours(self.users[0].id, n_neighbors=10)]
+        self.assertIn(newcomer.id, others)
+
+
+    def test_updates_are_read_through_delta(self):
+        matrix = InteractionMatrix.build()
+        base = matrix.matrix
+        user, other = self.users[0], self.users[1]
+        listing_id = next(iter(matrix.user_scores(user.id)))
+
+        matrix.set_score(user.id, listing_id, 0)
+        matrix.set_score(other.id, listing_id, 3.5)
+        matrix.set_score(user.id, self.listings[0].id, matrix.user_scores(user.id).get(self.listings[0].id, 0.0))
+
+        # Citirile nu compactează, iar celulele anulate nu apar în rezultate
+        self.assertIs(matrix.matrix, base)
+        self.assertNotIn(listing_id, matrix.user_scores(user.id))
+        self.assertEqual(matrix.user_scores(other.id)[listing_id], 3.5)
+        neighbours = matrix.neighbours(user.id, n_neighbors=10)
+        self.assertIs(matrix.matrix, base)
+
+        expected = {uid: scores for uid, scores in (
+            (u.id, matrix.user_scores(u.id)) for u in self.users
+        )}
+        for other_id, similarity in neighbours:
+            self.assertAlmostEqual(similarity, cosine(expected[user.id], expected[other_id]), places=5)
+
+        matrix.compact()
+        self.assertIsNot(matrix.matrix, base)
+        self.assertTrue((matrix.matrix.data > 0).all())
+        self.assertEqual(matrix.matrix.nnz, matrix.nnz)
+        self.assertEqual(matrix.neighbours(user.id, n_neighbors=10), neighbours)
+
+    def test_deletions_reach_loaded_snapshot(self):
+        InteractionMatrix.build().save()
+        interaction = UserInteraction.objects.filter(user=self.users[0]).first()
+        pair = (interaction.user_id, interaction.car_listing_id)
+        UserInteraction.objects.filter(user_id=pair[0], car_listing_id=pair[1]).delete()
+        self.assertTrue(InteractionTombstone.objects.filter(user_id=pair[0], car_listing_id=pair[1]).exists())
+
+        matrix = get_interaction_matrix()
+        self.assertNotIn(pair[1], matrix.user_scores(pair[0]))
+        self.assertEqual(matrix.user_scores(pair[0]), InteractionMatrix.build().user_scores(pair[0]))
+
+        # O matrice nouă conține deja ștergerea, deci marcajele vechi dispar
+        InteractionMatrix.build(now=timezone.now() + datetime.timedelta(seconds=1)).save()
+        self.assertFalse(InteractionTombstone.objects.exists())
+
+    def test_missing_artifact_is_not_built_on_request(self):
+        self.assertIsNone(get_interaction_matrix())
+        self.assertIsNone(InteractionMatrix.load())
+
+        context = RecommendationContext(self.users[0])
+        self.assertEqual(set(context.user_scores), set(InteractionMatrix.build().user_scores(self.users[0].id)))
+
+
+class PreferenceProfileTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self._users(1)[0]
+        self.dacia = self._listings(2)
+        self.audi = self._listings(1, brand='Audi', model='A4')[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self._interact(self.user, self.dacia[0])
+            self._interact(self.user, self.audi, 'contact')
+        get_preference_profile(self.user.id)
+
+    def _assert_matches_rebuild(self):
+        stored = _profile_data(get_preference_profile(self.user.id))
+        expected = build_profile_data(self.user.id)
+
+        self.assertEqual(stored['item_weights'], {str(k): v for k, v in expected['item_weights'].items()})
+        self.assertEqual(stored['item_attributes'], expected['item_attributes'])
+        self.assertAlmostEqual(stored['total_weight'], expected['total_weight'])
+        for field, counter in expected['counters'].items():
+            self.assertEqual(set(stored['counters'][field]), set(counter), field)
+            for key, value in counter.items():
+                self.assertAlmostEqual(stored['counters'][field][key], value)
+        for name, stats in expected['ranges'].items():
+            self.assertAlmostEqual(stored['ranges'][name]['sum'], stats['sum'])
+            self.assertEqual((stored['ranges'][name]['min'], stored['ranges'][name]['max']), (stats['min'], stats['max']))
+
+    def test_incremental_updates_match_rebuild(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.user, car_listing=self.dacia[1])
+            self._interact(self.user, self.dacia[0], 'contact')
+        self._assert_matches_rebuild()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserInteraction.objects.filter(user=self.user, car_listing=self.audi).delete()
+        self._assert_matches_rebuild()
+        self.assertNotIn('Audi', get_preference_profile(self.user.id).brands)
+
+    def test_edited_listing_loses_its_old_attributes(self):
+        listing = self.dacia[0]
+        listing.brand, listing.model, listing.price = 'Skoda', 'Octavia', 15000
+        listing.save()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.user, car_listing=listing)
+
+        profile = get_preference_profile(self.user.id)
+        self.assertNotIn('Dacia', profile.brands)
+        self.assertEqual(profile.brands['Skoda'], 50.0)
+        self._assert_matches_rebuild()
+
+    def test_deleted_listing_is_subtracted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.audi.delete()
+
+        profile = get_preference_profile(self.user.id)
+        self.assertEqual(set(profile.item_weights), {str(self.dacia[0].id)})
+        self.assertNotIn('Audi', profile.brands)
+        self._assert_matches_rebuild()
+
+class RecommendationContextTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = self._users(4)
+        self.listings = self._listings(6) + self._listings(6, brand='Audi', model='A4')
+        for i, user in enumerate(self.users):
+            for listing in self.listings[i:i + 5]:
+                self._interact(user, listing, 'contact' if listing.brand == 'Audi' else 'vizualizare')
+        InteractionMatrix.build().save()
+
+    def test_hybrid_loads_shared_data_once(self):
+        user = self.users[0]
+        context = RecommendationContext(user)
+        recommendations = hybrid_recommendations(user, limit=6, context=context)
+
+        self.assertTrue(recommendations)
+        self.assertFalse({listing.id for listing in recommendations} & set(context.favorite_ids))
+        # Colaborativ și content-based citesc aceleași date, o singură dată
+        for stage in ('favorites', 'interactions'):
+            self.assertEqual(context.stats[stage]['queries'], 1)
+
+
+class FailingSource(CandidateSource):
+    name = 'failing'
+
+    def generate(self, user, preferences, exclude_ids, user_scores):
+        raise RuntimeError('sursă indisponibilă')
+
+
+class CandidateGenerationTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self._users(1)[0]
+        self.dacia = self._listings(8)
+        self.audi = self._listings(4, brand='Audi', model='A4')
+        self.own = CarListing.objects.create(
+            user=self.user, title='Dacia Logan proprie', brand='Dacia', model='Logan', mileage=1, power=90,
+            engine_capacity=1461, color='alb', condition_state='utilizat', year_of_manufacture=2018,
+            fuel_type='diesel', price=7000, emission_standard='Euro 6', transmission='manuala',
+            drive_type='fata', location='Cluj'
+        )
+        self.preferences = {
+            'brands': {'Dacia': 3.0}, 'fuel_types': {'diesel': 1.0},
+            'price_range': {'min': 7000, 'max': 7010, 'avg': 7003},
+        }
+
+    def test_sources_are_bounded_and_report_stats(self):
+        sources = [BrandSource(limit=3), PriceBandSource(limit=4), FailingSource()]
+        excluded = self.dacia[0].id
+        with self.assertLogs('recommendations.candidates', 'ERROR'):
+            candidate_ids, stats = generate_candidates(
+                self.user, self.preferences, exclude_ids={excluded}, sources=sources, max_candidates=5
+            )
+
+        self.assertEqual(len(candidate_ids), 5)
+        self.assertEqual(len(set(candidate_ids)), 5)
+        self.assertNotIn(excluded, candidate_ids)
+        self.assertNotIn(self.own.id, candidate_ids)
+        self.assertEqual([s['source'] for s in stats], ['brand', 'price_band', 'failing'])
+        self.assertEqual([s['candidates'] for s in stats], [3, 4, 0])
+        self.assertEqual(sum(s['added'] for s in stats), 5)
+        self.assertTrue(all(s['ms'] >= 0 for s in stats))
+
+    def test_sources_are_configurable(self):
+        paths = ['recommendations.candidates.BrandSource']
+        with self.settings(RECOMMENDATION_CANDIDATE_SOURCES=paths, RECOMMENDATION_MAX_CANDIDATES=100):
+            candidate_ids, stats = generate_candidates(self.user, self.preferences)
+        self.assertEqual([s['source'] for s in stats], ['brand'])
+        self.assertEqual(set(candidate_ids), {listing.id for listing in self.dacia})
+
+
+class PrecomputedFeedTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.active = self._users(3)
+        self.inactive = self._users(1, prefix='inactiv')[0]
+        User.objects.filter(id=self.inactive.id).update(last_activity=self.now - datetime.timedelta(days=30))
+        self.listings = self._listings(8) + self._listings(8, brand='Audi', model='A4')
+        for i, user in enumerate(self.active[:2] + [self.inactive]):
+            for listing in self.listings[i * 3:i * 3 + 6]:
+                self._interact(user, listing, days=1)
+        InteractionMatrix.build().save()
+
+    def _precompute(self, **options):
+        call_command('precompute_feeds', days=7, chunk_size=1, stdout=StringIO(), **options)
+
+    def test_feeds_for_active_users_match_hybrid(self):
+        self._precompute()
+
+        feeds = dict(PrecomputedFeed.objects.values_list('user_id', 'listing_ids'))
+        # fără utilizatorul inactiv și fără cel activ dar fără istoric
+        self.assertEqual(set(feeds), {user.id for user in self.active[:2]})
+        for user in self.active[:2]:
+            expected = [listing.id for listing in hybrid_recommendations(user)[:FEED_SIZE]]
+            self.assertEqual(feeds[user.id], expected)
+
+    def test_incremental_mode_and_api(self):
+        self._precompute()
+        stale, fresh = self.active[:2]
+        self._interact(stale, self.listings[-1], at=timezone.now())
+
+        self.assertEqual(active_user_ids(7, incremental=True), [stale.id])
+        self.assertIsNone(get_precomputed_feed(stale))
+
+        feed = get_precomputed_feed(fresh)
+        self.assertTrue(feed)
+        client = APIClient()
+        client.force_authenticate(fresh)
+        response = client.get('/api/recommendations/for_you/')
+        self.assertEqual([item['id'] for item in response.data], feed)
+
+        self._precompute(incremental=True)
+        self.assertIsNotNone(get_precomputed_feed(stale))
+        self.assertEqual(active_user_ids(7, incremental=True), [])
+
+
+class FeedCacheTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = self._users(2)
+        self.listings = self._listings(3)
+
+    def _shared_cache(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        return self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': directory,
+        }})
+
+    def test_process_local_cache_is_not_used(self):
+        set_cached_feed(self.users[0].id, 'hybrid', [listing.id for listing in self.listings])
+        self.assertIsNone(get_cached_feed(self.users[0].id, 'hybrid'))
+        self.assertFalse(feed_cache_stats()['enabled'])
+
+    def test_invalidation_in_shared_cache(self):
+        ids = [listing.id for listing in self.listings]
+        with self._shared_cache():
+            for user in self.users:
+                set_cached_feed(user.id, 'hybrid', ids)
+                set_cached_feed(user.id, 'content', ids[:1])
+            self.assertEqual(get_cached_feed(self.users[0].id, 'hybrid'), ids)
+
+            invalidate_user_feeds(self.users[0].id)
+            self.assertIsNone(get_cached_feed(self.users[0].id, 'hybrid'))
+            self.assertIsNone(get_cached_feed(self.users[0].id, 'content'))
+            self.assertEqual(get_cached_feed(self.users[1].id, 'hybrid'), ids)
+
+            # O interacțiune nouă invalidează feed-urile utilizatorului prin semnale
+            self._interact(self.users[1], self.listings[0])
+            self.assertIsNone(get_cached_feed(self.users[1].id, 'hybrid'))
+            self.assertTrue(feed_cache_stats()['enabled'])
+
+    def test_listing_version_without_shared_cache(self):
+        with self.settings(RECOMMENDATION_LISTING_SYNC_INTERVAL=1e-6):
+            # Cu un cache local versiunea se schimbă și fără semnalul altui proces
+            self.assertNotEqual(listings_version(), listings_version())
+
+        with self._shared_cache():
+            version = listings_version()
+            self.assertEqual(listings_version(), version)
+            mark_listings_changed()
+            self.assertNotEqual(listings_version(), version)
+
+
+class ListingFeatureIndexTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.listings = self._listings(3) + self._listings(3, brand='Audi', model='A4')
+
+    def _brute_force(self, profile_listings, listings):
+        """Similaritățile calculate ca în implementarea inițială: TF-IDF reantrenat la fiecare cerere."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        vectors = TfidfVectorizer(stop_words='english').fit_transform([listing_feature_text(l) for l in listings])
+        rows = [listings.index(listing) for listing in profile_listings]
+        profile = np.asarray(vectors[rows].mean(axis=0))
+        return np.asarray(vectors @ profile.T).ravel()
+
+    def test_similarities_match_refitted_tfidf(self):
+        index = ListingFeatureIndex.build()
+        ids = [listing.id for listing in self.listings]
+        scores = index.similarities_for(ids, index.profile(self.listings[:2]))
+        np.testing.assert_allclose(scores, self._brute_force(self.listings[:2], self.listings), rtol=1e-5)
+
+    def test_artifact_is_memory_mapped_and_follows_listings(self):
+        ListingFeatureIndex.build().save()
+        # Procesul încarcă artefactul salvat, fără să reantreneze TF-IDF
+        with mock.patch.object(ListingFeatureIndex, 'build', side_effect=AssertionError):
+            index = get_listing_feature_index()
+        self.assertIsNotNone(index.loaded_mtime)
+
+        ids = [listing.id for listing in self.listings]
+        profile = index.profile(self.listings[3:4])
+        before = index.similarities_for(ids, profile)
+
+        edited, removed = self.listings[0], self.listings[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            edited.brand, edited.model = 'Audi', 'A4'
+            edited.save()
+            removed.delete()
+
+        self.assertIs(get_loaded_listing_feature_index(), index)
+        after = index.similarities_for(ids, profile)
+        self.assertAlmostEqual(after[0], before[3], places=5)
+        self.assertEqual(after[1], 0.0)
+        np.testing.assert_allclose(after[2:], before[2:])
+
+
+class ItemSimilarityTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = self._users(8)
+        self.listings = self._listings(6)
+        for i, user in enumerate(self.users):
+            for j, listing in enumerate(self.listings):
+                if (i + j) % 3 != 0:
+                    self._interact(user, listing, count=1 + (i * j) % 3)
+
+    def _item_vectors(self, matrix):
+        vectors = {}
+        for user_id in matrix.user_ids:
+            for listing_id, score in matrix.user_scores(user_id).items():
+                vectors.setdefault(listing_id, {})[user_id] = score
+        return vectors
+
+    def _assert_rows_exact(self, index, matrix, listing_ids):
+        vectors = self._item_vectors(matrix)
+        for listing_id in listing_ids:
+            neighbour_ids, scores = index.neighbours_of(listing_id)
+            similarities = sorted(
+                (cosine(vectors[listing_id], vectors[other]) for other in vectors if other != listing_id),
+                reverse=True
+            )[:index.top_k]
+            np.testing.assert_allclose(scores, similarities, rtol=1e-5)
+            for neighbour_id, score in zip(neighbour_ids.tolist(), scores.tolist()):
+                self.assertAlmostEqual(score, cosine(vectors[listing_id], vectors[neighbour_id]), places=5)
+
+    def test_top_k_matches_brute_force(self):
+        matrix = InteractionMatrix.build()
+        index = ItemSimilarityIndex.build(matrix, top_k=3, batch_size=2)
+
+        self.assertEqual(index.listing_ids.tolist(), sorted(listing.id for listing in self.listings))
+        self._assert_rows_exact(index, matrix, index.listing_ids.tolist())
+
+    def test_delta_update(self):
+        # K=3 umple rândurile (recalculare la ieșirea unui vecin), K=10 nu
+        indexes = [ItemSimilarityIndex.build(InteractionMatrix.build(), top_k=top_k) for top_k in (3, 10)]
+        for user in self.users[:3]:
+            self._interact(user, self.listings[0], 'favorit', at=timezone.now())
+        removed = self.listings[-1]
+        removed.delete()
+
+        matrix = InteractionMatrix.build()
+        for index in indexes:
+            touched = touched_listing_ids(index.built_at)
+            self.assertIn(self.listings[0].id, touched)
+            updated = index.update(matrix, touched)
+
+            self.assertNotIn(removed.id, updated.listing_ids.tolist())
+            self.assertFalse(np.isin(removed.id, np.asarray(updated.neighbours)).any())
+            # și rândurile neatinse au scorurile noi ale anunțurilor atinse
+            self._assert_rows_exact(updated, matrix, updated.listing_ids.tolist())
+
+            # Recomandările nu conțin anunțurile deja văzute
+            user_scores = matrix.user_scores(self.users[0].id)
+            recommended, _ = updated.recommend(user_scores)
+            self.assertFalse(set(recommended) & set(user_scores))
+
+
+class UserLSHIndexTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Trei grupuri de utilizatori, fiecare cu anunțurile unei mărci
+        self.groups = []
+        for brand in ('Dacia', 'Audi', 'BMW'):
+            users = self._users(12, prefix=f'{brand.lower()}_')
+            listings = self._listings(6, brand=brand, model='X')
+            for i, user in enumerate(users):
+                for j, listing in enumerate(listings):
+                    if (i + j) % 4 != 0:
+                        self._interact(user, listing, count=1 + (i + j) % 2)
+            self.groups.append((users, listings))
+
+    def test_recall_against_exact_search(self):
+        matrix = InteractionMatrix.build()
+        index = UserLSHIndex.build(matrix)
+        user_ids = [user.id for users, _ in self.groups for user in users]
+
+        recall, _, _ = recall_at_k(matrix, index, user_ids, k=5)
+        self.assertGreaterEqual(recall, 0.9)
+
+    def test_updated_users_are_candidates(self):
+        matrix = InteractionMatrix.build()
+        index = UserLSHIndex.build(matrix)
+        users, listings = self.groups[0]
+        newcomer = self._users(1, prefix='nou')[0]
+        for listing in listings:
+            self._interact(newcomer, listing, at=timezone.now())
+
+        matrix.catch_up()
+        self.assertEqual(index.catch_up(matrix), 1)
+        neighbours = [uid for uid, _ in index.neighbours(matrix, newcomer.id, n_neighbors=5)]
+        self.assertTrue(neighbours)
+        self.assertTrue(set(neighbours) <= {user.id for user in users})
+
+    def test_updates_are_merged_past_limit(self):
+        matrix = InteractionMatrix.build()
+        index = UserLSHIndex.build(matrix)
+        users, listings = self.groups[0]
+        newcomers = self._users(3, prefix='nou')
+        for newcomer in newcomers:
+            for listing in listings:
+                self._interact(newcomer, listing, at=timezone.now())
+        matrix.catch_up()
+
+        with mock.patch.object(UserLSHIndex, 'OVERLAY_LIMIT', 2):
+            index.update_users(matrix, [user.id for user in newcomers])
+
+        self.assertFalse(index._overlay or index._removed)
+        self.assertTrue({user.id for user in newcomers} <= set(index.user_ids.tolist()))
+        neighbours = [uid for uid, _ in index.neighbours(matrix, newcomers[0].id, n_neighbors=5)]
+        self.assertTrue(set(neighbours) <= {user.id for user in users + newcomers[1:]})
+        self.assertTrue({user.id for user in newcomers[1:]} <= set(neighbours))
+
+
+class ApplyEventsTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self._users(1)[0]
+        self.listing, self.other = self._listings(2)
+
+    def _row(self, interaction_type, listing=None):
+        return UserInteraction.objects.get(
+            user=self.user, car_listing=listing or self.listing, interaction_type=interaction_type
+        )
+
+    def test_events_are_aggregated(self):
+        now = timezone.now()
+        events = [(self.user.id, self.listing.id, 'vizualizare', now)] * 3 + [
+            (self.user.id, self.listing.id, 'contact', now),
+            (self.user.id, self.other.id, 'vizualizare', now),
+        ]
+        self.assertEqual(apply_events(events), 3)
+        self.assertEqual(apply_events(events[:2]), 1)
+
+        view = self._row('vizualizare')
+        self.assertEqual((view.interaction_count, view.interaction_score, view.decay_days), (5, 5.0, 0))
+        self.assertEqual(self._row('contact').interaction_score, 2.0)
+        self.assertEqual(self._row('vizualizare', self.other).interaction_count, 1)
+        self.assertEqual(UserInteraction.objects.count(), 3)
+
+    def test_favorite_is_clamped(self):
+        now = timezone.now()
+        apply_events([(self.user.id, self.listing.id, 'favorit', now)] * 3)
+        apply_events([(self.user.id, self.listing.id, 'favorit', now)])
+
+        favorite = self._row('favorit')
+        self.assertEqual((favorite.interaction_count, favorite.interaction_score), (1, 3.0))
+
+    def test_old_event_on_new_row(self):
+        moment = timezone.now() - datetime.timedelta(days=10, hours=1)
+        apply_events([(self.user.id, self.listing.id, 'contact', moment)])
+
+        row = self._row('contact')
+        self.assertEqual((row.last_interaction, row.first_interaction, row.decay_days), (moment, moment, 10))
+        self.assertAlmostEqual(row.interaction_score, 2.0 * float(time_decay(10)))
+
+    def test_older_event_keeps_last_interaction(self):
+        recent = timezone.now() - datetime.timedelta(days=2, hours=1)
+        apply_events([(self.user.id, self.listing.id, 'vizualizare', recent)])
+        older = recent - datetime.timedelta(days=5)
+        apply_events([(self.user.id, self.listing.id, 'vizualizare', older)])
+
+        row = self._row('vizualizare')
+        self.assertEqual((row.last_interaction, row.first_interaction), (recent, older))
+        self.assertEqual((row.interaction_count, row.decay_days), (2, 2))
+        self.assertAlmostEqual(row.interaction_score, 2 * float(time_decay(2)))
+
+        # Un eveniment nou mută last_interaction înainte și resetează decăderea
+        now = timezone.now()
+        apply_events([(self.user.id, self.listing.id, 'vizualizare', now)])
+        row = self._row('vizualizare')
+        self.assertEqual((row.last_interaction, row.first_interaction), (now, older))
+        self.assertEqual((row.interaction_count, row.interaction_score, row.decay_days), (3, 3.0, 0))
+
+
+class InteractionBufferTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self._users(1)[0]
+        self.listings = self._listings(2)
+        # Firul de scriere nu pornește un flush în timpul testului
+        settings_override = self.settings(
+            RECOMMENDATION_BUFFERED_INGESTION=True, RECOMMENDATION_INGESTION_FLUSH_INTERVAL=3600
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_interaction_buffer()
+        self.addCleanup(reset_interaction_buffer)
+
+    def test_flush_aggregates_and_counts(self):
+        buffer = InteractionBuffer(flush_interval=3600, flush_size=100, max_size=4)
+        for _ in range(3):
+            self.assertTrue(buffer.append(self.user.id, self.listings[0].id, 'vizualizare'))
+        self.assertTrue(buffer.append(self.user.id, 999999, 'contact'))
+        self.assertFalse(buffer.append(self.user.id, self.listings[1].id, 'contact'))
+
+        self.assertEqual(buffer.flush(), 4)
+
+        row = UserInteraction.objects.get(user=self.user)
+        self.assertEqual((row.car_listing_id, row.interaction_count), (self.listings[0].id, 3))
+        stats = ingestion_stats()
+        self.assertEqual(
+            (stats['accepted'], stats['flushed_events'], stats['dropped_invalid'], stats['dropped_overflow']),
+            (4, 3, 1, 1)
+        )
+        self.assertEqual(len(buffer), 0)
+
+    def test_unfavorite_writes_pending_events_first(self):
+        other = self._users(1, prefix='alt')[0]
+        client = APIClient()
+        client.force_authenticate(self.user)
+        listing_id = self.listings[0].id
+
+        response = client.post('/api/recommendations/interactions/', {'listing_id': listing_id, 'type': 'favorite'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        get_interaction_buffer().append(other.id, listing_id, 'favorit')
+
+        response = client.post('/api/recommendations/interactions/', {'listing_id': listing_id, 'type': 'unfavorite'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        # Favoritul utilizatorului a fost scris și apoi șters; al celuilalt rămâne în buffer
+        self.assertFalse(UserInteraction.objects.filter(user=self.user).exists())
+        self.assertEqual(len(get_interaction_buffer()), 1)
+        get_interaction_buffer().flush()
+        self.assertFalse(UserInteraction.objects.filter(user=self.user).exists())
+        self.assertTrue(UserInteraction.objects.filter(user=other, interaction_type='favorit').exists())
+
+
+class ScoringTests(SimpleTestCase):
+
+    def test_days_old(self):
+        now = datetime.datetime(2026, 3, 10, 12, tzinfo=datetime.timezone.utc)
+        bucharest = datetime.timezone(datetime.timedelta(hours=2))
+        timestamps = [
+            now - datetime.timedelta(days=2, hours=1),
+            (now - datetime.timedelta(hours=23)).astimezone(bucharest),
+            None,
+        ]
+        self.assertEqual(days_old(timestamps, now).tolist(), [2, 0, 30])
+        self.assertEqual(decay_bucket(days_old([now - datetime.timedelta(days=90)], now)).tolist(), [30])
+
+    def test_warning_filter_is_scoped(self):
+        filters = list(warnings.filters)
+        days_old([timezone.now()], timezone.now())
+        self.assertEqual(warnings.filters, filters)
+
+
+class ListingColumnsTests(SimpleTestCase):
+
+    def _row(self, listing_id, price, brand):
+        created_at = datetime.datetime(2026, 3, 1, tzinfo=datetime.timezone.utc)
+        return (listing_id, 1, created_at, price, 2020, 50000, 150, brand, 'Model', 'Benzina', None, '')
+
+    def _assert_same(self, columns, rows):
+        expected = ListingColumns(rows)
+        ids = [row[0] for row in rows] + [999]
+        positions = columns.positions(ids)
+        self.assertEqual(positions[-1], -1)
+        self.assertEqual(columns.ids[positions[:-1]].tolist(), ids[:-1])
+        self.assertEqual(columns.numeric['price'][positions[:-1]].tolist(), [row[3] for row in rows])
+        brands = [columns.vocab['brand'][code] for code in columns.codes['brand'][positions[:-1]]]
+        self.assertEqual(brands, [row[7] for row in rows])
+        self.assertEqual(sorted(columns.ids[columns.live_positions()].tolist()), expected.ids.tolist())
+
+    def test_changes_are_appended_without_resorting(self):
+        rows = {i: self._row(i, 1000.0 * i, 'Audi') for i in range(1, 11)}
+        columns = ListingColumns(list(rows.values()))
+        original = columns
+
+        rows[3] = self._row(3, 99.0, 'Dacia')
+        rows[12] = self._row(12, 12000.0, 'BMW')
+        del rows[5]
+        columns = columns.with_changes([rows[3], rows[12]], {5})
+        rows[12] = self._row(12, 13000.0, 'BMW')
+        rows[11] = self._row(11, 11000.0, 'Audi')
+        columns = columns.with_changes([rows[12], rows[11]], set())
+
+        self.assertEqual(columns._sorted, 10)
+        self._assert_same(columns, list(rows.values()))
+        # instanța publicată anterior vede în continuare rândurile ei
+        self._assert_same(original, [self._row(i, 1000.0 * i, 'Audi') for i in range(1, 11)])
+
+    def test_compaction_resorts_rows(self):
+        rows = {i: self._row(i, float(i), 'Audi') for i in range(1, 6)}
+        columns = ListingColumns(list(rows.values()))
+        with mock.patch.object(ListingColumns, 'COMPACT_MIN_ROWS', 3):
+            for listing_id in (9, 7, 8, 6):
+                rows[listing_id] = self._row(listing_id, float(listing_id), 'Ford')
+                columns = columns.with_changes([rows[listing_id]], set())
+
+        self.assertEqual(columns._sorted, 9)
+        self.assertEqual(columns.ids.tolist(), list(range(1, 10)))
+        self._assert_same(columns, [rows[i] for i in sorted(rows)])
+
+class RerankingTests(SimpleTestCase):
+
+    def _candidates(self, brand, fuel=None, model=None, created_ts=None):
+        n = len(brand)
+        return Candidates(
+            np.arange(1, n + 1), np.linspace(1.0, 0.1, n), brand,
+            model if model is not None else np.zeros(n), fuel if fuel is not None else np.zeros(n),
+            created_ts if created_ts is not None else np.zeros(n)
+        )
+
+    def test_brand_cap_matches_quadratic_loop(self):
+        brand = np.random.default_rng(3).integers(0, 4, size=60)
+        candidates = self._candidates(brand)
+
+        # varianta inițială: numărătoare per element și căutări în listă
+        accepted, rest = [], []
+        for listing_id, b in zip(candidates.ids.tolist(), brand.tolist()):
+            count = sum(1 for other in accepted if brand[other - 1] == b)
+            (accepted if count < 2 else rest).append(listing_id)
+
+        self.assertEqual(rerank(candidates, [BrandCap(max_per_brand=2)]), accepted + rest)
+
+    def test_fuel_boost_reserves_positions(self):
+        fuel = np.array([0, 1, 0, 1, 1, 0])
+        candidates = self._candidates(np.zeros(6), fuel=fuel)
+        self.assertEqual(rerank(candidates, [FuelBoost(1)]), [2, 4, 5, 1, 3, 6])
+        self.assertEqual(rerank(candidates, [FuelBoost(1, reserved=2)]), [2, 4, 1, 3, 6, 5])
+        self.assertEqual(rerank(candidates, [FuelBoost(-1)]), [1, 2, 3, 4, 5, 6])
+
+    def test_freshness_boost_and_truncate(self):
+        now = 100 * DAY_SECONDS
+        created_ts = np.array([now - 60 * DAY_SECONDS, now, now - 10 * DAY_SECONDS])
+        candidates = Candidates([1, 2, 3], [1.0, 0.9, 0.85], [0, 0, 0], [0, 0, 0], [0, 0, 0], created_ts)
+        self.assertEqual(rerank(candidates, [FreshnessBoost(weight=0.2, now=now), Truncate(2)]), [2, 1])
+
+    def test_mmr_demotes_repeated_models(self):
+        candidates = self._candidates(
+            brand=np.array([0, 0, 1, 0, 2]), model=np.array([0, 0, 1, 1, 2]), fuel=np.array([0, 0, 0, 1, 1])
+        )
+        self.assertEqual(rerank(candidates, [MMRDiversity(lambda_=0.3)]), [1, 3, 5, 4, 2])
+        self.assertEqual(rerank(self._candidates(np.zeros(0)), [MMRDiversity()]), [])
+
+
+class WarmUpTests(RecommendationTestCase):
+
+    def test_heavy_modules_are_not_imported_at_startup(self):
+        stdout = StringIO()
+        call_command('recommendation_import_times', top=5, stdout=stdout)
+        output = stdout.getvalue()
+        self.assertIn('Total:', output)
+        self.assertNotIn('Dependențe grele', output)
+        self.assertTrue(all(name not in output for name in HEAVY_MODULES))
+
+    def test_warm_up_loads_artifacts(self):
+        users = self._users(2)
+        for listing in self._listings(3):
+            self._interact(users[0], listing)
+        InteractionMatrix.build().save()
+
+        def failing():
+            raise RuntimeError('artefact corupt')
+
+        with mock.patch('recommendations.warmup.WARM_UP_STEPS', WARM_UP_STEPS + [('failing', failing)]):
+            with self.assertLogs('recommendations.warmup', 'ERROR'):
+                timings = warm_up()
+
+        self.assertIsNone(timings.pop('failing'))
+        self.assertEqual(list(timings), [name for name, _ in WARM_UP_STEPS])
+        self.assertTrue(all(elapsed is not None for elapsed in timings.values()))
+        self.assertIsNotNone(get_loaded_interaction_matrix())
+        self.assertIsNotNone(get_loaded_listing_columns())
+
+
+class RescoreTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self._users(1)[0]
+        listings = self._listings(6)
+        # Momente la limitele treptelor de decădere
+        ages = [
+            datetime.timedelta(days=1) - datetime.timedelta(seconds=1),
+            datetime.timedelta(days=1),
+            datetime.timedelta(days=2, hours=12),
+            datetime.timedelta(days=30),
+            datetime.timedelta(days=45),
+            datetime.timedelta(days=400),
+        ]
+        for listing, age in zip(listings, ages):
+            interaction = UserInteraction.objects.create(
+                user=self.user, car_listing=listing, interaction_type='contact', interaction_count=2
+            )
+            UserInteraction.objects.filter(id=interaction.id).update(last_interaction=self.now - age)
+
+    def _assert_scores(self, now):
+        for row in UserInteraction.objects.all():
+            bucket = int(decay_bucket(days_old([row.last_interaction], now))[0])
+            self.assertEqual(row.decay_days, bucket)
+            self.assertAlmostEqual(
+                row.interaction_score, score_interaction('contact', 2, row.last_interaction, now), places=6
+            )
+
+    def test_bucket_boundaries(self):
+        self.assertEqual(rescore_interactions(now=self.now, full=True), 5)
+        self._assert_scores(self.now)
+        self.assertEqual(
+            sorted(UserInteraction.objects.values_list('decay_days', flat=True)), [0, 1, 2, 30, 30, 30]
+        )
+
+    def test_watermark(self):
+        rescore_interactions(now=self.now)
+        # Nimic nu s-a schimbat de treaptă
+        self.assertEqual(rescore_interactions(now=self.now), 0)
+
+        # După o zi avansează doar treptele sub orizont
+        later = self.now + datetime.timedelta(days=1)
+        self.assertEqual(rescore_interactions(now=later), 3)
+        self._assert_scores(later)
+
+
+class RollupTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = self._users(1)[0]
+        self.listings = self._listings(3)
+        self.old = [
+            self._interact(self.user, self.listings[0], 'vizualizare', count=3, days=100),
+            self._interact(self.user, self.listings[1], 'vizualizare', count=2, days=120),
+            self._interact(self.user, self.listings[1], 'favorit', days=90),
+        ]
+        self.recent = self._interact(self.user, self.listings[2], 'vizualizare', days=5)
+        InteractionRollup.objects.create(
+            user=self.user, brand='Dacia', car_model='Logan', interaction_type='vizualizare',
+            interaction_count=4, listing_count=1, weight=0.5, last_interaction=self.now - datetime.timedelta(days=200)
+        )
+
+    def test_merge_and_delete(self):
+        moved, user_ids = rollup_interactions(now=self.now, days=60, batch_size=2)
+
+        self.assertEqual((moved, user_ids), (3, {self.user.id}))
+        self.assertEqual(list(UserInteraction.objects.values_list('id', flat=True)), [self.recent.id])
+
+        decay = float(time_decay(30))
+        views = InteractionRollup.objects.get(user=self.user, interaction_type='vizualizare')
+        self.assertEqual((views.interaction_count, views.listing_count), (9, 3))
+        self.assertAlmostEqual(views.weight, 0.5 + 2 * ROLLUP_WEIGHTS['vizualizare'] * decay)
+        self.assertEqual(views.last_interaction, self.now - datetime.timedelta(days=100))
+
+        favorite = InteractionRollup.objects.get(user=self.user, interaction_type='favorit')
+        self.assertEqual((favorite.interaction_count, favorite.listing_count), (1, 1))
+        self.assertAlmostEqual(favorite.weight, ROLLUP_WEIGHTS['favorit'] * decay)
+
+        # O a doua rulare nu mai găsește nimic de mutat
+        self.assertEqual(rollup_interactions(now=self.now, days=60), (0, set()))
+
+
+    def test_reconcile_keeps_rolled_up_counts(self):
+        counters = ('view_count', 'contact_count', 'favorite_count', 'popularity_score')
+        before = {row[0]: row[1:] for row in CarListing.objects.values_list('id', *counters)}
+
+        rollup_interactions(now=self.now, days=60, batch_size=2)
+        rollup_interactions(now=self.now + datetime.timedelta(days=200), days=60)
+        reconcile_counters()
+
+        after = {row[0]: row[1:] for row in CarListing.objects.values_list('id', *counters)}
+        self.assertEqual(after, before)
+        self.assertFalse(UserInteraction.objects.exists())
+
+    def test_rollups_keep_counters_and_reach_models(self):
+        other = self._users(1, prefix='alt')[0]
+        InteractionRollup.objects.create(
+            user=other, brand='Dacia', car_model='Logan', interaction_type='contact',
+            interaction_count=2, listing_count=1, weight=1.0, last_interaction=self.now - datetime.timedelta(days=300)
+        )
+        InteractionMatrix.build().save()
+        popularity = dict(CarListing.objects.values_list('id', 'popularity_score'))
+        PrecomputedFeed.objects.create(user=self.user, listing_ids=[self.listings[0].id], computed_at=self.now)
+
+        rollup_interactions(now=self.now, days=60)
+
+        # Rândurile mutate rămân în contoarele anunțurilor, dar ies din feed-uri și din matrice
+        self.assertEqual(dict(CarListing.objects.values_list('id', 'popularity_score')), popularity)
+        self.assertFalse(PrecomputedFeed.objects.filter(user=self.user).exists())
+        self.assertEqual(
+            set(InteractionTombstone.objects.values_list('user_id', 'car_listing_id')),
+            {(self.user.id, self.listings[0].id), (self.user.id, self.listings[1].id)}
+        )
+
+        pseudo_id = rollup_listing_id('Dacia', 'Logan')
+        decay = float(time_decay(30))
+        rebuilt = InteractionMatrix.build()
+        scores = rebuilt.user_scores(self.user.id)
+        self.assertEqual(set(scores), {pseudo_id, self.listings[2].id})
+        self.assertAlmostEqual(
+            scores[pseudo_id], (9 * INTERACTION_WEIGHTS['vizualizare'] + INTERACTION_WEIGHTS['favorit']) * decay, places=4
+        )
+
+        loaded = get_interaction_matrix()
+        for user_id in (self.user.id, other.id):
+            self.assertEqual(loaded.user_scores(user_id).keys(), rebuilt.user_scores(user_id).keys())
+            for listing_id, score in rebuilt.user_scores(user_id).items():
+                self.assertAlmostEqual(loaded.user_scores(user_id)[listing_id], score, places=4)
+
+        # Pseudo-anunțul apropie utilizatorii, dar nu este recomandat
+        neighbours = rebuilt.neighbours(other.id)
+        self.assertEqual([uid for uid, _ in neighbours], [self.user.id])
+        listing_ids, _ = rebuilt.neighbourhood_scores(other.id, neighbours)
+        self.assertEqual(listing_ids, [self.listings[2].id])
+
+        item_index = ItemSimilarityIndex.build(rebuilt)
+        self.assertTrue((item_index.listing_ids >= 0).all())
+        self.assertTrue(set(item_index.neighbours.ravel().tolist()) <= {-1, self.listings[2].id})
+
+        model = ALSModel.train(rebuilt, factors=2, iterations=2)
+        listing_ids, _ = model.recommend(model.fold_in(rebuilt.user_scores(other.id)))
+        self.assertEqual(listing_ids, [self.listings[2].id])
+
+class ALSFoldInTests(RecommendationTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = self._users(10)
+        self.listings = self._listings(12)
+        for i, user in enumerate(self.users):
+            for j, listing in enumerate(self.listings):
+                if (i * 7 + j * 3) % 5 < 2:
+                    self._interact(user, listing, count=1 + (i + j) % 3)
+        self.matrix = InteractionMatrix.build()
+        self.model = ALSModel.train(self.matrix, factors=4, iterations=5)
+
+    def test_fold_in_matches_als_step(self):
+        item_factors = np.asarray(self.model.item_factors, dtype=np.float64)
+        expected = als_step(self.matrix.matrix, item_factors, self.model.regularization, self.model.alpha)
+
+        for user in self.users:
+            row = self.matrix.user_index[user.id]
+            vector = self.model.user_vector(user.id, self.matrix.user_scores(user.id))
+            np.testing.assert_allclose(vector, expected[row], rtol=1e-4, atol=1e-6)
+
+    def test_unknown_listings_are_ignored(self):
+        user_scores = self.matrix.user_scores(self.users[0].id)
+        unknown = max(self.matrix.listing_ids) + 1000
+
+        self.assertIsNone(self.model.fold_in({unknown: 1.0}))
+        np.testing.assert_allclose(
+            self.model.fold_in({**user_scores, unknown: 5.0}), self.model.fold_in(user_scores), rtol=1e-6
+        )
+
+        listing_ids, _ = self.model.recommend(self.model.fold_in(user_scores), exclude_ids=user_scores, n=5)
+        self.assertEqual(len(listing_ids), 5)
+        self.assertFalse(set(listing_ids) & set(user_scores))
+
+    def test_stored_zeros_are_not_preferences(self):
+        with_zero = InteractionMatrix.build()
+        with_zero.matrix.data[0] = 0
+        without = InteractionMatrix.build()
+        without.matrix = with_zero.matrix.copy()
+        without.matrix.eliminate_zeros()
+
+        trained = ALSModel.train(with_zero, factors=4, iterations=3)
+        expected = ALSModel.train(without, factors=4, iterations=3)
+
+        self.assertEqual(with_zero.matrix.nnz, without.matrix.nnz + 1)
+        np.testing.assert_allclose(trained.user_factors, expected.user_factors, rtol=1e-5, atol=1e-7)
+        np.testing.assert_allclose(trained.item_factors, expected.item_factors, rtol=1e-5, atol=1e-7)
@@ -1,8 +1,14 @@
 from django.urls import path
-from .views import for_you_recommendations, record_interaction, get_recommendations_by_algorithm
+from .views import (
+    for_you_recommendations, record_interaction, record_interactions_batch, get_recommendations_by_algorithm,
+    recommendation_cache_stats, recommendation_ingestion_stats
+)
 
 urlpatterns = [
     path('for_you/', for_you_recommendations, name='for-you-recommendations'),
     path('interactions/', record_interaction, name='record-interaction'),
+    path('interactions/batch/', record_interactions_batch, name='record-interactions-batch'),
     path('algorithm/<str:algorithm>/', get_recommendations_by_algorithm, name='get-recommendations-by-algorithm'),
+    path('cache_stats/', recommendation_cache_stats, name='recommendation-cache-stats'),
+    path('ingestion_stats/', recommendation_ingestion_stats, name='recommendation-ingestion-stats'),
 ]
\ No newline at end of file
@@ -0,0 +1,315 @@
+import time
+import datetime
+import threading
+import logging
+import numpy as np
+from django.utils import timezone
+from listings.models import Favorite
+from .models import UserInteraction
+from .artifacts import save_arrays, load_arrays, artifact_mtime
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_NAME = 'user_lsh'
+
+DEFAULT_TABLES = 16
+LISTING_BLOCK = 20000
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_MASK64 = (1 << 64) - 1
+
+
+def _plane_signs(listing_ids, n_planes, seed):
+    """
+    Componentele ±1 ale hiperplanelor aleatoare pentru fiecare anunț, derivate
+    determinist din id (hash splitmix64). Anunțurile noi nu cer reconstruirea
+    planelor, iar toate procesele obțin aceleași valori.
+    """
+    ids = np.asarray(listing_ids, dtype=np.uint64)
+    x = ids[:, None] * np.uint64(n_planes) + np.arange(n_planes, dtype=np.uint64)[None, :]
+    x += np.uint64((seed * _GOLDEN) & _MASK64)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return np.where(x >> np.uint64(63), 1.0, -1.0).astype(np.float32)
+
+
+def lsh_codes(rows, listing_ids, n_tables, n_bits, seed):
+    """
+    Codurile LSH (n x n_tables) pentru rândurile unei matrice rare, cu
+    coloanele corespunzătoare listing_ids. Proiecțiile se calculează pe
+    blocuri de anunțuri, fără matricea completă a hiperplanelor.
+    """
+    n_planes = n_tables * n_bits
+    projections = np.zeros((rows.shape[0], n_planes), dtype=np.float32)
+    listing_ids = np.asarray(listing_ids, dtype=np.int64)
+    for start in range(0, len(listing_ids), LISTING_BLOCK):
+        block = slice(start, start + LISTING_BLOCK)
+        projections += rows[:, block] @ _plane_signs(listing_ids[block], n_planes, seed)
+
+    bits = (projections > 0).reshape(rows.shape[0], n_tables, n_bits)
+    weights = np.left_shift(1, np.arange(n_bits, dtype=np.int64))
+    return (bits * weights).sum(axis=2).astype(np.int64)
+
+
+def default_bits(n_users):
+    """
+    Numărul de biți per tabelă, ales astfel încât o găleată să aibă ~32
+    utilizatori. Vectorii de interacțiuni sunt foarte rari și vecinii reali
+    au similarități mici, deci găleți mai fine scad mult recall-ul.
+    """
+    return int(np.clip(np.ceil(np.log2(max(n_users, 2))) - 5, 4, 20))
+
+
+class UserLSHIndex:
+    """
+    Index aproximativ de vecini pentru vectorii de interacțiuni ai
+    utilizatorilor (LSH cu hiperplane aleatoare, similaritate cosinus).
+    Fiecare din cele n_tables tabele împarte utilizatorii în găleți după
+    semnul proiecțiilor pe n_bits hiperplane. La căutare se citesc doar
+    găleata utilizatorului și cele aflate la un bit distanță, iar candidații
+    sunt reordonați după cosinusul exact.
+    Utilizatorii actualizați după construire sunt ținuți separat și sunt
+    contopiți în tabele (în memoria procesului) când depășesc OVERLAY_LIMIT.
+    """
+
+    OVERLAY_LIMIT = 2000
+
+    def __init__(self, user_ids, codes, n_bits, seed=42, orders=None, built_at=None):
+        self.user_ids = user_ids
+        self.codes = codes
+        self.n_bits = n_bits
+        self.seed = seed
+        self.built_at = built_at or timezone.now()
+        self.loaded_mtime = None
+
+        if orders is None:
+            orders = np.argsort(codes, axis=0, kind='stable').T
+        self.orders = orders
+        self.sorted_codes = np.take_along_axis(np.asarray(codes).T, np.asarray(orders), axis=1)
+
+        self._overlay = {}
+        self._removed = set()
+        self._lock = threading.RLock()
+
+    @property
+    def n_tables(self):
+        return self.codes.shape[1]
+
+    @classmethod
+    def build(cls, interaction_matrix, n_tables=DEFAULT_TABLES, n_bits=None, seed=42):
+        built_at = timezone.now()
+        interaction_matrix.compact()
+        matrix = interaction_matrix.matrix
+
+        has_vector = np.diff(matrix.indptr) > 0
+        rows = np.flatnonzero(has_vector)
+        user_ids = np.asarray(interaction_matrix.user_ids, dtype=np.int64)[rows]
+        n_bits = n_bits or default_bits(len(user_ids))
+
+        codes = lsh_codes(matrix[rows], interaction_matrix.listing_ids, n_tables, n_bits, seed)
+
+        order = np.argsort(user_ids)
+        index = cls(user_ids[order], codes[order], n_bits, seed=seed, built_at=built_at)
+        logger.info(
+            f"Index LSH construit: {len(user_ids)} utilizatori, "
+            f"{n_tables} tabele x {n_bits} biți"
+        )
+        return index
+
+    def save(self):
+        with self._lock:
+            save_arrays(
+                ARTIFACT_NAME,
+                user_ids=self.user_ids,
+                codes=self.codes,
+                orders=self.orders,
+                params=np.array([self.n_bits, self.seed], dtype=np.int64),
+                built_at=np.array([self.built_at.timestamp()], dtype=np.float64),
+            )
+            self.loaded_mtime = artifact_mtime(ARTIFACT_NAME)
+
+    @classmethod
+    def load(cls):
+        mtime = artifact_mtime(ARTIFACT_NAME)
+        arrays = load_arrays(ARTIFACT_NAME, mmap=True)
+        if arrays is None:
+            return None
+
+        n_bits, seed = (int(x) for x in arrays['params'])
+        built_at = datetime.datetime.fromtimestamp(float(arrays['built_at'][0]), tz=datetime.timezone.utc)
+        instance = cls(
+            arrays['user_ids'], arrays['codes'], n_bits, seed=seed,
+            orders=arrays['orders'], built_at=built_at
+        )
+        instance.loaded_mtime = mtime
+        return instance
+
+    def update_users(self, interaction_matrix, user_ids):
+        """Recalculează codurile utilizatorilor ai căror vectori s-au schimbat."""
+        from scipy.sparse import csr_matrix
+
+        with self._lock:
+            for user_id in user_ids:
+                row = interaction_matrix.user_index.get(user_id)
+                self._removed.add(user_id)
+                if row is None:
+                    self._overlay.pop(user_id, None)
+                    continue
+
+                cols, values = interaction_matrix._user_vector(row)
+                if cols.size == 0:
+                    self._overlay.pop(user_id, None)
+                    continue
+
+                vector = csr_matrix(values.reshape(1, -1))
+                listing_ids = [interaction_matrix.listing_ids[c] for c in cols]
+                self._overlay[user_id] = lsh_codes(vector, listing_ids, self.n_tables, self.n_bits, self.seed)[0]
+
+            if len(self._removed) > self.OVERLAY_LIMIT:
+                self._merge_overlay()
+
+    def _merge_overlay(self):
+        """
+        Mută utilizatorii actualizați în array-urile tabelelor și golește
+        _overlay și _removed. Tabelele se reordonează o singură dată pentru
+        toate actualizările adunate.
+        """
+        user_ids = np.asarray(self.user_ids)
+        keep = ~np.isin(user_ids, list(self._removed))
+        overlay_ids = np.fromiter(self._overlay.keys(), dtype=np.int64, count=len(self._overlay))
+        overlay_codes = np.vstack(list(self._overlay.values())) if self._overlay else np.zeros((0, self.n_tables), dtype=self.codes.dtype)
+
+        user_ids = np.concatenate([user_ids[keep], overlay_ids])
+        codes = np.vstack([np.asarray(self.codes)[keep], overlay_codes.astype(self.codes.dtype)])
+        order = np.argsort(user_ids)
+        self.user_ids = user_ids[order]
+        self.codes = codes[order]
+        self.orders = np.argsort(self.codes, axis=0, kind='stable').T
+        self.sorted_codes = np.take_along_axis(self.codes.T, self.orders, axis=1)
+        self._overlay = {}
+        self._removed = set()
+        logger.info(f"Index LSH: actualizările contopite, {len(self.user_ids)} utilizatori")
+
+    def catch_up(self, interaction_matrix):
+        """Actualizează utilizatorii cu interacțiuni sau favorite după construire."""
+        changed = set(UserInteraction.objects.filter(
+            last_interaction__gt=self.built_at
+        ).values_list('user_id', flat=True).distinct())
+        changed.update(Favorite.objects.filter(
+            created_at__gt=self.built_at
+        ).values_list('user_id', flat=True).distinct())
+        if changed:
+            self.update_users(interaction_matrix, changed)
+        return len(changed)
+
+    def _codes_of(self, user_id):
+        if user_id in self._overlay:
+            return self._overlay[user_id]
+        pos = np.searchsorted(self.user_ids, user_id)
+        if pos < len(self.user_ids) and self.user_ids[pos] == user_id:
+            return np.asarray(self.codes[pos])
+        return None
+
+    def _probes(self, code):
+        """Codul găleții și codurile aflate la distanța Hamming 1."""
+        flips = np.left_shift(1, np.arange(self.n_bits, dtype=np.int64))
+        return np.concatenate([[code], np.bitwise_xor(code, flips)])
+
+    def candidates(self, user_id, codes=None):
+        """Utilizatorii care împart cel puțin o găleată (sau una vecină) cu user_id."""
+        with self._lock:
+            if codes is None:
+                codes = self._codes_of(user_id)
+            if codes is None:
+                return np.zeros(0, dtype=np.int64)
+
+            found = []
+            for table in range(self.n_tables):
+                probes = self._probes(int(codes[table]))
+                sorted_codes = self.sorted_codes[table]
+                left = np.searchsorted(sorted_codes, probes, side='left')
+                right = np.searchsorted(sorted_codes, probes, side='right')
+                for l, r in zip(left.tolist(), right.tolist()):
+                    if r > l:
+                        found.append(np.asarray(self.orders[table][l:r]))
+
+            user_ids = np.asarray(self.user_ids)[np.unique(np.concatenate(found))] if found else np.zeros(0, dtype=np.int64)
+            if self._removed:
+                user_ids = user_ids[~np.isin(user_ids, list(self._removed))]
+
+            if self._overlay:
+                overlay_ids = np.fromiter(self._overlay.keys(), dtype=np.int64, count=len(self._overlay))
+                overlay_codes = np.vstack(list(self._overlay.values()))
+                match = np.zeros(len(overlay_ids), dtype=bool)
+                for table in range(self.n_tables):
+                    match |= np.isin(overlay_codes[:, table], self._probes(int(codes[table])))
+                user_ids = np.union1d(user_ids, overlay_ids[match])
+
+            return user_ids[user_ids != user_id]
+
+    def neighbours(self, interaction_matrix, user_id, n_neighbors=20):
+        """
+        Vecinii aproximativi ai utilizatorului, în același format ca
+        InteractionMatrix.neighbours: listă de (user_id, similaritate).
+        """
+        candidate_ids = self.candidates(user_id)
+        if candidate_ids.size == 0:
+            return []
+        return interaction_matrix.cosine_neighbours(user_id, candidate_ids, n_neighbors)
+
+
+def recall_at_k(interaction_matrix, index, user_ids, k=10):
+    """
+    Recall@k al indexului față de căutarea exactă, plus timpii medii (ms)
+    ai celor două căutări. Returnează (recall, approx_ms, exact_ms).
+    """
+    hits, total = 0, 0
+    approx_time, exact_time = 0.0, 0.0
+    for user_id in user_ids:
+        start = time.perf_counter()
+        exact = interaction_matrix.neighbours(user_id, n_neighbors=k)
+        exact_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx = index.neighbours(interaction_matrix, user_id, n_neighbors=k)
+        approx_time += time.perf_counter() - start
+
+        exact_ids = {uid for uid, _ in exact}
+        hits += len(exact_ids & {uid for uid, _ in approx})
+        total += len(exact_ids)
+
+    n = max(len(user_ids), 1)
+    recall = hits / total if total else 1.0
+    return recall, approx_time * 1000 / n, exact_time * 1000 / n
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_user_index(interaction_matrix):
+    """
+    Indexul LSH al procesului curent sau None dacă nu a fost construit cu
+    comanda build_user_index. La încărcare se actualizează utilizatorii cu
+    activitate ulterioară construirii.
+    """
+    global _index
+    with _index_lock:
+        mtime = artifact_mtime(ARTIFACT_NAME)
+        if mtime is None:
+            _index = None
+        elif _index is None or _index.loaded_mtime != mtime:
+            _index = UserLSHIndex.load()
+            _index.catch_up(interaction_matrix)
+        return _index
+
+
+def get_loaded_user_index():
+    return _index
+
+
+def reset_loaded_user_index():
+    global _index
+    with _index_lock:
+        _index = None
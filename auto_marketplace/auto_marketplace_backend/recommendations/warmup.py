@@ -0,0 +1,93 @@
+import time
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Dependențele grele sunt importate la prima utilizare a motorului de recomandări
+HEAVY_MODULES = ['scipy.sparse', 'sklearn.feature_extraction.text', 'sklearn.preprocessing']
+
+
+def warm_up_enabled():
+    return getattr(settings, 'RECOMMENDATION_WARM_UP', False)
+
+
+def _import_heavy_modules():
+    import importlib
+
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+
+
+def _load_interaction_matrix():
+    from .interaction_matrix import get_interaction_matrix
+    from .user_index import get_user_index
+
+    matrix = get_interaction_matrix()
+    if matrix is not None:
+        get_user_index(matrix)
+
+
+def _load_item_similarity():
+    from .item_similarity import get_item_similarity_index
+
+    get_item_similarity_index()
+
+
+def _load_als_model():
+    from .als import get_als_model
+
+    get_als_model()
+
+
+def _load_feature_index():
+    from .feature_index import get_listing_feature_index
+
+    index = get_listing_feature_index()
+    if index is not None:
+        # Vectorizatorul TF-IDF este creat abia la prima proiecție
+        index.vectorizer
+
+
+def _load_listing_columns():
+    from .content_engine import get_listing_columns
+
+    get_listing_columns()
+
+
+def _prime_popular_listings():
+    from .popularity import popular_listing_pairs
+
+    popular_listing_pairs()
+
+
+WARM_UP_STEPS = [
+    ('imports', _import_heavy_modules),
+    ('interaction_matrix', _load_interaction_matrix),
+    ('item_similarity', _load_item_similarity),
+    ('als', _load_als_model),
+    ('feature_index', _load_feature_index),
+    ('listing_columns', _load_listing_columns),
+    ('popular_listings', _prime_popular_listings),
+]
+
+
+def warm_up():
+    """
+    Încarcă artefactele persistate (matrice, indexuri, model ALS) și
+    cache-ul de anunțuri populare în procesul curent, ca prima cerere să nu
+    plătească aceste costuri. O etapă care eșuează este doar raportată.
+    Returnează durata fiecărei etape în ms (None pentru etapele eșuate).
+    """
+    timings = {}
+    for name, step in WARM_UP_STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+            timings[name] = round((time.perf_counter() - start) * 1000, 2)
+        except Exception as e:
+            logger.exception(f"Eroare la încălzirea etapei {name}: {str(e)}")
+            timings[name] = None
+
+    logger.info(f"Motorul de recomandări încălzit: {timings}")
+    return timings